@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Throughput of :func:`.write_collection` with and without gzip.
+
+Usage::
+
+    python benchmarks/bench_collection.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import time
+
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser.collection import write_collection
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 1000
+
+
+# Functions & classes =========================================================
+class CountingFile(object):
+    """
+    File, which just counts the written bytes.
+    """
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data):
+        self.size += len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def main():
+    records = []
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records.append(MARCXMLRecord(f.read()))
+
+    for name, kwargs in [("MARC XML", {}),
+                         ("MARC XML, gzip", {"use_gzip": True}),
+                         ("OAI-PMH", {"oai_marc": True})]:
+        output = CountingFile()
+
+        start = time.time()
+        count = write_collection(
+            (record for _ in xrange(REPEAT) for record in records),
+            output,
+            flush_every=1000,
+            **kwargs
+        )
+        duration = time.time() - start
+
+        print "%-16s %8.0f records/s %8.1f MB/s written" % (
+            name,
+            count / duration,
+            output.size / duration / 1024 / 1024,
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the extraction of the highlevel getters from the collection: one
+record at a time, by :func:`.extract` and by :func:`.extract` with the
+records parsed in the worker processes.
+
+Usage::
+
+    python benchmarks/bench_extract.py [workers]
+"""
+# Imports =====================================================================
+import os
+import sys
+import glob
+import time
+import multiprocessing
+
+from marcxml_parser import tools
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser.extract import extract
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 100
+GETTERS = [
+    "get_name",
+    "get_authors",
+    "get_ISBNs",
+    "get_pub_date",
+    "get_publisher",
+    "get_pub_type",
+]
+
+
+# Functions & classes =========================================================
+def one_by_one(raw_records):
+    rows = []
+    for record_xml in raw_records:
+        record = MARCXMLRecord(record_xml)
+
+        row = {}
+        for name in GETTERS:
+            try:
+                row[name] = getattr(record, name)()
+            except KeyError:
+                row[name] = None
+
+        rows.append(row)
+
+    return rows
+
+
+def measure(fn):
+    start = time.time()
+    fn()
+
+    return time.time() - start
+
+
+def main(workers=None):
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+
+    records = ""
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records += f.read()
+
+    raw_records = list(tools.split_records(records * REPEAT))
+
+    cases = [
+        ("one by one", lambda: one_by_one(raw_records)),
+        ("extract()", lambda: extract(raw_records, GETTERS)),
+        ("extract(workers=%d)" % workers, lambda: extract(
+            raw_records,
+            GETTERS,
+            workers=workers,
+            batch_size=50,
+        )),
+    ]
+
+    for name, fn in cases:
+        print "%-22s %8.3f s for %d records" % (
+            name,
+            measure(fn),
+            len(raw_records),
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,91 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Memory and lookup time of the datafields stored as nested dicts
+(``storage="dict"``) and as :class:`.FieldTable` (``storage="table"``).
+
+Usage::
+
+    python benchmarks/bench_field_table.py [file.xml ...]
+"""
+# Imports =====================================================================
+import os
+import sys
+import glob
+import timeit
+
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser.structures import FieldTable
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+LOOKUPS = 1000
+
+
+# Functions & classes =========================================================
+def deep_size(obj, seen=None):
+    """
+    Size of the `obj` and everything it references, shared objects are
+    counted once.
+    """
+    if seen is None:
+        seen = set()
+
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(
+            deep_size(key, seen) + deep_size(value, seen)
+            for key, value in obj.iteritems()
+        )
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif isinstance(obj, FieldTable):
+        size += deep_size(obj.__dict__, seen)
+
+    if hasattr(obj, "__dict__") and not isinstance(obj, FieldTable):
+        size += deep_size(obj.__dict__, seen)
+
+    return size
+
+
+def lookup_time(records):
+    """
+    Time of :meth:`.get_subfields` over all tags of all `records`.
+    """
+    def lookup():
+        for record in records:
+            for tag in record.datafields:
+                record.get_subfields(tag, "a", exception=False)
+
+    return min(timeit.repeat(lookup, number=LOOKUPS, repeat=3)) / LOOKUPS
+
+
+def main(paths):
+    data = []
+    for path in paths:
+        with open(path) as f:
+            data.append(f.read())
+
+    print "%-8s %12s %16s" % ("storage", "memory [B]", "lookups [ms]")
+    for storage in ("dict", "table"):
+        records = [MARCXMLRecord(xml, storage=storage) for xml in data]
+        memory = sum(deep_size(record.datafields) for record in records)
+
+        print "%-8s %12d %16.3f" % (
+            storage,
+            memory,
+            lookup_time(records) * 1000,
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main(sys.argv[1:] or sorted(glob.glob(os.path.join(DATA_DIR, "*.xml"))))
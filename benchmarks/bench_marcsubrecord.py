@@ -0,0 +1,104 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Memory used by the :class:`.MARCSubrecord` objects.
+
+Compares the current subrecords, which share one context per datafield, with
+the old layout, where each subrecord had its own ``__dict__`` and its value
+was stored twice.
+
+Usage::
+
+    python benchmarks/bench_marcsubrecord.py [file.xml ...]
+"""
+# Imports =====================================================================
+import os
+import sys
+import glob
+
+from marcxml_parser import MARCXMLRecord
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+
+
+# Functions & classes =========================================================
+class LegacySubrecord(str):
+    """
+    Subrecord with the layout used before the shared contexts.
+    """
+    def __new__(self, val, i1, i2, other_subfields):
+        return str.__new__(self, val)
+
+    def __init__(self, val, i1, i2, other_subfields):
+        self.val = val
+        self.i1 = i1
+        self.i2 = i2
+        self.other_subfields = other_subfields
+
+
+def _subrecords(record):
+    for fields in record.datafields.values():
+        for field in fields:
+            for subrecords in field.values():
+                if isinstance(subrecords, list):
+                    for subrecord in subrecords:
+                        yield subrecord
+
+
+def current_size(subrecords):
+    """
+    Bytes used by the `subrecords`, contexts are counted only once.
+    """
+    size = 0
+    contexts = {}
+    for subrecord in subrecords:
+        size += sys.getsizeof(subrecord)
+        contexts[id(subrecord.__dict__)] = subrecord.__dict__
+
+    return size + sum(sys.getsizeof(ctx) for ctx in contexts.values())
+
+
+def legacy_size(subrecords):
+    """
+    Bytes, which would be used by the same subrecords in the old layout.
+    """
+    size = 0
+    for subrecord in subrecords:
+        value = str(subrecord)
+        legacy = LegacySubrecord(value, subrecord.i1, subrecord.i2, None)
+
+        size += sys.getsizeof(legacy)
+        size += sys.getsizeof(legacy.__dict__)
+        size += sys.getsizeof(value)  # .val was separate string
+
+    return size
+
+
+def main(paths):
+    subrecords = []
+    for path in paths:
+        with open(path) as f:
+            subrecords.extend(_subrecords(MARCXMLRecord(f.read())))
+
+    if not subrecords:
+        print "No subrecords found."
+        return
+
+    count = len(subrecords)
+    legacy = legacy_size(subrecords)
+    current = current_size(subrecords)
+
+    print "Subrecords:      %d" % count
+    print "Legacy layout:   %8.1f B per subfield" % (float(legacy) / count)
+    print "Current layout:  %8.1f B per subfield" % (float(current) / count)
+    print "Saved:           %8.1f %%" % (100.0 * (legacy - current) / legacy)
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main(sys.argv[1:] or sorted(glob.glob(os.path.join(DATA_DIR, "*.xml"))))
@@ -0,0 +1,91 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Memory retained by records held in memory with and without the original
+XML (``keep_original`` parameter of the :class:`.MARCXMLParser`).
+
+Memory is measured as the size of all objects reachable from the list of
+records (each object counted once), because the resident size of the
+process doesn't go down, when the DOM is freed.
+
+Usage::
+
+    python benchmarks/bench_original_xml.py
+"""
+# Imports =====================================================================
+import os
+import sys
+import glob
+
+from marcxml_parser import record_iterator
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 10
+
+VARIANTS = [
+    ("DOM, kept", dict(keep_original=True)),
+    ("DOM, dropped", dict(keep_original=False)),
+    ("stream, kept", dict(stream=True, keep_original=True)),
+    ("stream, dropped", dict(stream=True, keep_original=False)),
+]
+
+
+# Functions & classes =========================================================
+def retained_size(obj):
+    """
+    Size of `obj` and all objects reachable from it. Modules and classes are
+    not followed.
+    """
+    seen = set()
+    size = 0
+
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, (type, type(sys))):
+            continue
+
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+
+        if isinstance(obj, dict):
+            stack.extend(obj.iterkeys())
+            stack.extend(obj.itervalues())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+
+        if hasattr(obj, "__dict__"):
+            stack.append(obj.__dict__)
+
+    return size
+
+
+def collection():
+    records = ""
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records += f.read()
+
+    return "<collection>\n" + records * REPEAT + "</collection>\n"
+
+
+def main():
+    xml = collection()
+
+    for name, kwargs in VARIANTS:
+        records = list(record_iterator(xml, **kwargs))
+
+        print "%-16s %8.1f kB per record" % (
+            name,
+            retained_size(records) / 1024.0 / len(records),
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Throughput of :class:`.MARCXMLRecord` objects sent between processes by the
+:class:`multiprocessing.Pool`.
+
+Compares the compact pickle state with pickling of the whole ``__dict__``
+(without the ``resorted`` function and ``backend`` module, which can't be
+pickled).
+
+Usage::
+
+    python benchmarks/bench_pickle.py [workers]
+"""
+# Imports =====================================================================
+import os
+import sys
+import glob
+import time
+import cPickle as pickle
+import multiprocessing
+
+from marcxml_parser import MARCXMLRecord
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 100
+
+
+# Functions & classes =========================================================
+class DictRecord(MARCXMLRecord):
+    """
+    Record pickled with its whole ``__dict__``, like before the compact
+    state was introduced.
+    """
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("resorted", None)
+        state.pop("backend", None)
+
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+
+def echo(record):
+    return record
+
+
+def load_records(cls):
+    records = []
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records.append(cls(f.read()))
+
+    return records * REPEAT
+
+
+def main(workers=2):
+    pool = multiprocessing.Pool(int(workers))
+    try:
+        for name, cls in [("__dict__", DictRecord),
+                          ("compact", MARCXMLRecord)]:
+            records = load_records(cls)
+            size = sum(
+                len(pickle.dumps(record, pickle.HIGHEST_PROTOCOL))
+                for record in records
+            )
+
+            start = time.time()
+            pool.map(echo, records, chunksize=50)
+            duration = time.time() - start
+
+            print "%-10s %8.1f kB per record %10.1f records/s" % (
+                name,
+                size / 1024.0 / len(records),
+                len(records) / duration,
+            )
+    finally:
+        pool.close()
+        pool.join()
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
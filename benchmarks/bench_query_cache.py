@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Profile of the highlevel getters called repeatedly over the same records, as
+the indexing code does. Prints time per record and how many times was
+:meth:`.get_subfields` called.
+
+Usage::
+
+    python benchmarks/bench_query_cache.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import pstats
+import cProfile
+
+from marcxml_parser import MARCXMLRecord
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+ROUNDS = 50
+
+
+# Functions & classes =========================================================
+def index_record(record):
+    for _ in range(ROUNDS):
+        record.is_monographic()
+        record.is_multi_mono()
+        record.is_continuing()
+        record.is_single_unit()
+        record.get_name()
+        record.get_authors()
+        record.get_ISBNs()
+        record.get_publisher()
+        record.get_pub_date()
+
+
+def measure(memoize):
+    records = []
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records.append(MARCXMLRecord(f.read(), memoize=memoize))
+
+    profile = cProfile.Profile()
+    profile.runcall(lambda: [index_record(record) for record in records])
+
+    stats = pstats.Stats(profile)
+    calls = sum(
+        stat[1]
+        for func, stat in stats.stats.items()
+        if func[2] == "get_subfields"
+    )
+
+    print "memoize=%-5s %8.3f ms per record, %d get_subfields() calls " \
+          "per record" % (
+              memoize,
+              stats.total_tt * 1000 / len(records),
+              calls / len(records),
+          )
+
+
+def main():
+    measure(memoize=False)
+    measure(memoize=True)
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the subfield lookups by :meth:`.get_subfields`, by the string index
+and by the precompiled :class:`.Selector`.
+
+Usage::
+
+    python benchmarks/bench_selector.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import timeit
+
+from marcxml_parser import Selector
+from marcxml_parser import MARCXMLRecord
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+NUMBER = 2000
+
+SPECS = ["260c  ", "264c", "020a", "020z", "650a07", "245a", "245b"]
+
+
+# Functions & classes =========================================================
+def main():
+    records = []
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records.append(MARCXMLRecord(f.read()))
+
+    selectors = [Selector(spec) for spec in SPECS]
+    arguments = [
+        (spec[:3], spec[3], spec[4:5] or None, spec[5:6] or None)
+        for spec in SPECS
+    ]
+    multi_code = Selector("245abnp")
+
+    cases = [
+        ("get_subfields()", lambda record: [
+            record.get_subfields(*args)
+            for args in arguments
+        ]),
+        ("record[spec]", lambda record: [record[spec] for spec in SPECS]),
+        ("Selector", lambda record: [
+            selector(record)
+            for selector in selectors
+        ]),
+        ("4x get_subfields() 245abnp", lambda record: [
+            record.get_subfields("245", code)
+            for code in "abnp"
+        ]),
+        ("Selector('245abnp')", multi_code),
+    ]
+
+    for name, fn in cases:
+        duration = min(timeit.repeat(
+            lambda: [fn(record) for record in records],
+            number=NUMBER,
+            repeat=3,
+        ))
+
+        print "%-28s %8.2f us per record" % (
+            name,
+            duration * 1e6 / NUMBER / len(records),
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
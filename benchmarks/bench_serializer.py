@@ -0,0 +1,69 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the XML serialization of records with growing number of fields.
+
+Usage::
+
+    python benchmarks/bench_serializer.py
+"""
+# Imports =====================================================================
+import timeit
+from cStringIO import StringIO
+
+from marcxml_parser import MARCXMLRecord
+
+
+# Variables ===================================================================
+SIZES = [100, 1000, 10000]
+
+
+# Functions & classes =========================================================
+def make_record(fields):
+    """
+    Create record with `fields` datafields, each with three subfields.
+    """
+    record = MARCXMLRecord()
+    record.leader = "-----nam-a22------a-4500"
+    record.add_ctl_field("001", "bench%d" % fields)
+
+    for cnt in xrange(fields):
+        record.add_data_field(
+            "9%02d" % (cnt % 100),
+            " ",
+            "1",
+            {"a": "value %d" % cnt, "b": ["x" * 40, "y" * 40]}
+        )
+
+    return record
+
+
+def main():
+    print "%8s %14s %14s" % ("fields", "to_XML [ms]", "write_xml [ms]")
+    for size in SIZES:
+        record = make_record(size)
+        number = max(1, 10000 / size)
+
+        to_xml = min(timeit.repeat(record.to_XML, number=number, repeat=3))
+
+        write_xml = float("nan")
+        if hasattr(record, "write_xml"):
+            write_xml = min(timeit.repeat(
+                lambda: record.write_xml(StringIO()),
+                number=number,
+                repeat=3
+            ))
+
+        print "%8d %14.3f %14.3f" % (
+            size,
+            to_xml * 1000 / number,
+            write_xml * 1000 / number,
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of parsing the MARC XML collection compared with loading the records
+from the snapshot.
+
+Usage::
+
+    python benchmarks/bench_snapshot.py [collection.xml]
+
+Without arguments, collection made of the test data repeated
+:attr:`REPEAT` times is used.
+"""
+# Imports =====================================================================
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+
+from marcxml_parser import record_iterator
+from marcxml_parser.snapshot import cached_records
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 50
+
+
+# Functions & classes =========================================================
+def make_collection(path):
+    records = ""
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records += f.read()
+
+    with open(path, "wb") as f:
+        f.write("<collection>\n" + records * REPEAT + "</collection>\n")
+
+
+def measure(fn):
+    start = time.time()
+    count = sum(1 for _ in fn())
+
+    return count, time.time() - start
+
+
+def main(path=None):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        if path is None:
+            path = os.path.join(tmp_dir, "collection.xml")
+            make_collection(path)
+
+        snapshot_path = os.path.join(tmp_dir, "collection.snapshot")
+
+        def parse():
+            with open(path, "rb") as f:
+                for record in record_iterator(f, stream=True):
+                    yield record
+
+        cached = lambda **kwargs: cached_records(
+            path,
+            snapshot_path,
+            **kwargs
+        )
+
+        for name, fn in [("parse XML", parse),
+                         ("rebuild snapshot", cached),
+                         ("load snapshot", cached),
+                         ("load lazy", lambda: cached(lazy=True))]:
+            count, duration = measure(fn)
+            print "%-18s %6d records %8.3f s" % (name, count, duration)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main(*sys.argv[1:2])
@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the SQLite export of already parsed records: row by row with
+commit after each record and the indexes created before the load, compared
+with :func:`.export_sqlite`.
+
+Usage::
+
+    python benchmarks/bench_sqlite_export.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import time
+import shutil
+import sqlite3
+import tempfile
+
+from marcxml_parser import record_iterator
+from marcxml_parser import sqlite_export
+from marcxml_parser.sqlite_export import export_sqlite
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 100
+
+
+# Functions & classes =========================================================
+def row_by_row(records, path):
+    connection = sqlite3.connect(path)
+    sqlite_export.create_schema(connection)
+    sqlite_export.create_indexes(connection)
+
+    datafield_id = 1
+    for record_id, record in enumerate(records, 1):
+        rows = sqlite_export._Rows(())
+        datafield_id = rows.add_record(record_id, datafield_id, record)
+
+        for table, table_rows in [("records", rows.records),
+                                  ("controlfields", rows.controlfields),
+                                  ("datafields", rows.datafields),
+                                  ("subfields", rows.subfields)]:
+            for row in table_rows:
+                connection.execute(
+                    "INSERT INTO %s VALUES (%s)" % (
+                        table,
+                        ", ".join("?" * len(row))
+                    ),
+                    row
+                )
+
+        connection.commit()
+
+    connection.close()
+
+
+def measure(fn, *args, **kwargs):
+    start = time.time()
+    fn(*args, **kwargs)
+
+    return time.time() - start
+
+
+def main():
+    data = ""
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            data += f.read()
+
+    records = list(record_iterator(data * REPEAT, backend="expat"))
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print "row by row      %8.3f s for %d records" % (
+            measure(row_by_row, records, os.path.join(tmp_dir, "a.sqlite")),
+            len(records),
+        )
+        print "export_sqlite() %8.3f s for %d records" % (
+            measure(
+                export_sqlite,
+                records,
+                os.path.join(tmp_dir, "b.sqlite"),
+                derived=(),
+            ),
+            len(records),
+        )
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
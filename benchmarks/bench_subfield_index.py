@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the indicator-filtered subfield lookups with and without the
+``index_subfields`` option, including the time to build the index.
+
+Usage::
+
+    python benchmarks/bench_subfield_index.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import timeit
+
+from marcxml_parser.parser import MARCXMLParser
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+NUMBER = 2000
+
+LOOKUPS = [
+    ("856", "u", "4", "2"),
+    ("856", "u", "4", "0"),
+    ("650", "a", "0", "7"),
+    ("650", "a", "0", "9"),
+    ("260", "c", " ", " "),
+    ("020", "a", None, None),
+    ("245", "a", None, None),
+]
+
+
+# Functions & classes =========================================================
+def main():
+    sources = []
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            sources.append(f.read())
+
+    for index_subfields in (False, True):
+        records = [
+            MARCXMLParser(xml, index_subfields=index_subfields)
+            for xml in sources
+        ]
+
+        build = min(timeit.repeat(
+            lambda: [record.mark_dirty() or record.get_subfields("245", "a")
+                     for record in records],
+            number=NUMBER,
+            repeat=3,
+        ))
+
+        lookup = min(timeit.repeat(
+            lambda: [
+                record.get_subfields(*args)
+                for record in records
+                for args in LOOKUPS
+            ],
+            number=NUMBER,
+            repeat=3,
+        ))
+
+        print "index_subfields=%-6s build %6.2f us, %d lookups %6.2f us " \
+              "per record" % (
+                  index_subfields,
+                  build * 1e6 / NUMBER / len(records),
+                  len(LOOKUPS),
+                  lookup * 1e6 / NUMBER / len(records),
+              )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the parsing and the first serialization of the record, and of the
+re-serialization after one field of the record is added, with and without
+the ``track_changes`` option.
+
+Usage::
+
+    python benchmarks/bench_track_changes.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import timeit
+
+from marcxml_parser import MARCXMLRecord
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+NUMBER = 200
+
+
+# Functions & classes =========================================================
+def enrich_and_serialize(record):
+    # replace the field from the previous round, so the record doesn't grow
+    record.datafields.pop("910", None)
+    record.add_data_field("910", " ", " ", {"a": "ABA001"})
+    record.to_XML()
+
+
+def parse_and_serialize(xml, track_changes):
+    record = MARCXMLRecord(xml, backend="expat", track_changes=track_changes)
+    record.to_XML()
+
+
+def main():
+    sources = []
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            sources.append(f.read())
+
+    for track_changes in (False, True):
+        duration = min(timeit.repeat(
+            lambda: [
+                parse_and_serialize(xml, track_changes)
+                for xml in sources
+            ],
+            number=NUMBER,
+            repeat=3,
+        ))
+
+        print "track_changes=%-6s %8.3f ms per parsed record" % (
+            track_changes,
+            duration * 1000 / NUMBER / len(sources),
+        )
+
+    for track_changes in (False, True):
+        records = [
+            MARCXMLRecord(xml, track_changes=track_changes)
+            for xml in sources
+        ]
+
+        # first serialization renders all the fragments
+        for record in records:
+            record.to_XML()
+
+        duration = min(timeit.repeat(
+            lambda: [enrich_and_serialize(record) for record in records],
+            number=NUMBER,
+            repeat=3,
+        ))
+
+        print "track_changes=%-6s %8.3f ms per record" % (
+            track_changes,
+            duration * 1000 / NUMBER / len(records),
+        )
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
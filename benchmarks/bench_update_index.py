@@ -0,0 +1,83 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Time of the full build of the keyed index compared with the incremental
+update after few records were appended, and time of the lookups.
+
+Usage::
+
+    python benchmarks/bench_update_index.py
+"""
+# Imports =====================================================================
+import os
+import glob
+import time
+import shutil
+import tempfile
+
+from marcxml_parser.offset_index import RecordIndex
+from marcxml_parser.offset_index import build_index
+from marcxml_parser.offset_index import update_index
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+REPEAT = 100
+KEYS = ["001", "isbn", "issn", "author"]
+LOOKUPS = 1000
+
+
+# Functions & classes =========================================================
+def read_records():
+    records = ""
+    for fn in sorted(glob.glob(os.path.join(DATA_DIR, "aleph_*.xml"))):
+        with open(fn) as f:
+            records += f.read()
+
+    return records
+
+
+def measure(fn, *args, **kwargs):
+    start = time.time()
+    fn(*args, **kwargs)
+
+    return time.time() - start
+
+
+def main():
+    records = read_records()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp_dir, "collection.xml")
+        with open(path, "wb") as f:
+            f.write("<collection>\n" + records * REPEAT + "</collection>\n")
+
+        print "build_index()  %8.3f s" % measure(build_index, path, keys=KEYS)
+
+        # append one more copy of the test data
+        with open(path, "wb") as f:
+            f.write(
+                "<collection>\n" + records * (REPEAT + 1) + "</collection>\n"
+            )
+
+        print "update_index() %8.3f s" % measure(update_index, path)
+
+        with RecordIndex(path) as index:
+            print "%d records, %d keys" % (len(index), index.key_count)
+
+            duration = measure(lambda: [
+                index.find("author", "Eric S. Raymond")
+                for _ in xrange(LOOKUPS)
+            ])
+            print "find()         %8.3f ms" % (duration * 1000 / LOOKUPS)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,11 @@ setup(
     include_package_data=True,
 
     zip_safe=False,
+    entry_points={
+        "console_scripts": [
+            "marcxml_convert = marcxml_parser.convert:main",
+        ],
+    },
     install_requires=[
         'setuptools',
         "pyDHTMLParser>=2.0.7",
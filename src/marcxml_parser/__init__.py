@@ -6,6 +6,7 @@
 # Imports =====================================================================
 from .record import MARCXMLRecord
 from .record import record_iterator
+from .selector import Selector
 
 from .structures import Person
 from .structures import Corporation
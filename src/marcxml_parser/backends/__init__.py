@@ -0,0 +1,116 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from collections import OrderedDict
+
+from .raw_record import RawRecord
+
+from . import dhtml_backend
+from . import expat_backend
+
+
+# Variables ===================================================================
+#: Available parser backends. Each of them is module with ``parse_record()``
+#: and ``iter_records()`` functions.
+BACKENDS = OrderedDict([
+    ["dhtmlparser", dhtml_backend],
+    ["expat", expat_backend],
+])
+DEFAULT_BACKEND = "dhtmlparser"  #: Used when no backend is specified.
+
+
+# Functions & classes =========================================================
+def get_backend(name=None):
+    """
+    Return parser backend module registered in :attr:`BACKENDS` as `name`.
+
+    Args:
+        name (str, default None): Name of the backend. If None,
+             :attr:`DEFAULT_BACKEND` is used.
+
+    Returns:
+        module: Backend module.
+
+    Raises:
+        ValueError: If there is no such backend.
+    """
+    if name is None:
+        name = DEFAULT_BACKEND
+
+    if name not in BACKENDS:
+        raise ValueError(
+            "Unknown backend '%s'! Use one of: %s." % (
+                name,
+                ", ".join(BACKENDS.keys())
+            )
+        )
+
+    return BACKENDS[name]
+
+
+def tag_filter(tags):
+    """
+    Convert `tags` to the form used by the backends to skip unwanted fields.
+
+    Args:
+        tags (iterable/dict): Strings with the tag, optionally followed by
+             the subfield codes (``["020", "245abnp"]``), or dict, which is
+             returned as it is. None means no filtering.
+
+    Returns:
+        dict: ``{tag: frozenset of codes or None for all codes}`` or None.
+    """
+    if tags is None or isinstance(tags, dict):
+        return tags
+
+    if isinstance(tags, basestring):
+        tags = [tags]
+
+    parsed = {}
+    for spec in tags:
+        if len(spec) < 3:
+            raise ValueError("Required at least 3 chars for field id.")
+
+        tag, codes = spec[:3], spec[3:]
+
+        if not codes or (tag in parsed and parsed[tag] is None):
+            parsed[tag] = None
+        else:
+            parsed[tag] = parsed.get(tag, frozenset()) | frozenset(codes)
+
+    return parsed
+
+
+def filter_fields(fields, tags):
+    """
+    Filter data fields already parsed by the backend with `tags`.
+
+    Args:
+        fields (list): ``(tag, i1, i2, subfields)`` tuples.
+        tags (dict): Result of :func:`tag_filter`.
+
+    Returns:
+        list: ``(tag, i1, i2, subfields)`` tuples with just the wanted fields.
+    """
+    if tags is None:
+        return fields
+
+    filtered = []
+    for tag, i1, i2, subfields in fields:
+        if tag not in tags:
+            continue
+
+        codes = tags[tag]
+        if codes is not None:
+            subfields = [
+                (code, value)
+                for code, value in subfields
+                if code in codes
+            ]
+
+        filtered.append((tag, i1, i2, subfields))
+
+    return filtered
@@ -0,0 +1,243 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import dhtmlparser
+from dhtmlparser import HTMLElement
+
+from .raw_record import RawRecord
+
+
+# Variables ===================================================================
+#: Name of the control field element -> (oai_marc, tag parameter name).
+_CONTROL_FIELDS = {
+    "controlfield": (False, "tag"),
+    "fixfield": (True, "id"),
+}
+
+#: Name of the data field element -> (oai_marc, tag, subfield code and
+#: indicator prefix parameter names).
+_DATA_FIELDS = {
+    "datafield": (False, "tag", "code", "ind"),
+    "varfield": (True, "id", "label", "i"),
+}
+
+
+# Functions & classes =========================================================
+def _is_element(el):
+    """
+    Is the `el` opening or non-pair tag? Text, comments and closing tags are
+    just skipped by the parser.
+    """
+    return el.isTag() and not el.isEndTag() and not el.isComment()
+
+
+def _parse_data_field(field, tag_id="tag", sub_id="code", i_name="ind",
+                      codes=None):
+    """
+    Parse data field and its subfields.
+
+    Args:
+        field (obj): HTMLElement with the field.
+        tag_id (str): parameter name, which holds the information, about
+                      field name this is normally "tag", but in case of
+                      oai_marc "id"
+        sub_id (str): id of parameter, which holds informations about
+                      subfield name this is normally "code" but in case of
+                      oai_marc "label"
+        i_name (str): prefix of the indicator parameters, "ind" or "i" in
+                      case of oai_marc.
+        codes (set, default None): Codes of the subfields, which should be
+              parsed. None for all.
+
+    Returns:
+        tuple: ``(tag, i1, i2, subfields)``.
+    """
+    params = field.params
+
+    subfields = [
+        (subfield.params[sub_id], subfield.getContent().strip())
+        for subfield in field.childs
+        if _is_element(subfield) and sub_id in subfield.params and
+        subfield.getTagName().lower() == "subfield" and
+        (codes is None or subfield.params[sub_id] in codes)
+    ]
+
+    return (
+        params[tag_id],
+        params.get(i_name + "1", " "),
+        params.get(i_name + "2", " "),
+        subfields,
+    )
+
+
+def _source_chunks(el, chunks):
+    """
+    Add the source of `el` and its childs without the end tag to `chunks`.
+    End tags of the childs are between the childs of `el`.
+    """
+    chunks.append(el._element)
+    for child in el.childs:
+        _source_chunks(child, chunks)
+
+
+def _element_source(el):
+    """
+    Return the source XML of `el`, exactly as it was in the input.
+
+    ``str(el)`` is not used, because it renders the tags again from their
+    parameters (and it is also several times slower).
+    """
+    chunks = []
+    _source_chunks(el, chunks)
+
+    if el.endtag is not None:
+        chunks.append(el.endtag._element)
+
+    return "".join(chunks)
+
+
+def _find_record(xml):
+    """
+    Return the `xml` itself, if it is the ``<record>``, or first
+    ``<record>`` in it.
+    """
+    if xml.isTag() and xml.getTagName().lower() == "record":
+        return xml
+
+    record = xml.find("record")
+    if not record:
+        raise ValueError("There is no <record> in your MARC XML document!")
+
+    return record[0]
+
+
+def _parse_data_field_el(el, tags=None):
+    """
+    Parse data field `el` of any dialect, filtered by `tags`.
+    """
+    _, tag_id, sub_id, i_name = _DATA_FIELDS[el.getTagName().lower()]
+    codes = tags[el.params[tag_id]] if tags is not None else None
+
+    return _parse_data_field(el, tag_id, sub_id, i_name, codes)
+
+
+def _data_fields_loader(fields, tags=None):
+    """
+    Return function, which parses the data field elements in `fields`.
+    """
+    def load():
+        return [_parse_data_field_el(el, tags) for el in fields]
+
+    return load
+
+
+def parse_record(xml, lazy=False, tags=None, sources=False):
+    """
+    Parse first ``<record>`` in `xml` using the :mod:`dhtmlparser`.
+
+    The record is processed in one linear pass over its elements, which are
+    dispatched by their names. Fields of both MARC XML and OAI MARC dialects
+    are collected, the right ones are picked once the whole record is read.
+
+    Args:
+        xml (str or HTMLElement): input data
+        lazy (bool, default False): Don't parse the data fields, just keep
+             their elements. :attr:`.RawRecord.datafields` is then function,
+             which parses them, when called.
+        tags (dict, default None): Parse only these data fields, see
+             :func:`.tag_filter`.
+        sources (bool, default False): Collect also the source XML of the
+                data fields to :attr:`.RawRecord.sources`. Ignored in `lazy`
+                mode.
+
+    Returns:
+        obj: :class:`.RawRecord` instance.
+    """
+    if not isinstance(xml, HTMLElement):
+        xml = dhtmlparser.parseString(str(xml))
+
+    record = _find_record(xml)
+
+    oai_marc = False
+    leader = None
+    controlfields = {False: [], True: []}
+    datafields = {False: [], True: []}
+    field_sources = {False: [], True: []}
+    sources = sources and not lazy
+
+    stack = [el for el in reversed(record.childs) if _is_element(el)]
+    while stack:
+        el = stack.pop()
+        name = el.getTagName().lower()
+
+        if name in _DATA_FIELDS:
+            oai, tag_id = _DATA_FIELDS[name][:2]
+            if tag_id not in el.params:
+                continue
+
+            if tags is not None and el.params[tag_id] not in tags:
+                continue
+
+            if lazy:
+                datafields[oai].append(el)
+            else:
+                datafields[oai].append(_parse_data_field_el(el, tags))
+
+            # the source doesn't match the field with filtered subfields
+            if sources:
+                filtered = tags is not None and tags[el.params[tag_id]]
+                field_sources[oai].append(
+                    None if filtered else _element_source(el)
+                )
+
+        elif name in _CONTROL_FIELDS:
+            oai, tag_id = _CONTROL_FIELDS[name]
+            if tag_id in el.params:
+                controlfields[oai].append(
+                    (el.params[tag_id], el.getContent().strip())
+                )
+
+        elif name == "leader":
+            if leader is None:
+                leader = el.getContent()
+
+        else:
+            # <metadata>, <oai_marc> and other containers
+            if name == "oai_marc":
+                oai_marc = True
+
+            stack.extend(el for el in reversed(el.childs) if _is_element(el))
+
+    datafields = datafields[oai_marc]
+    if lazy:
+        datafields = _data_fields_loader(datafields, tags)
+
+    return RawRecord(
+        oai_marc=oai_marc,
+        leader=None if oai_marc else leader,
+        controlfields=controlfields[oai_marc],
+        datafields=datafields,
+        sources=field_sources[oai_marc] if sources else None,
+    )
+
+
+def iter_records(xml):
+    """
+    Parse whole `xml` and return all ``<record>`` elements from it.
+
+    Args:
+        xml (str): Input string with XML.
+
+    Returns:
+        list: HTMLElements, which may be passed to :func:`parse_record`.
+    """
+    dom = None
+    try:
+        dom = dhtmlparser.parseString(xml)
+    except UnicodeError:
+        dom = dhtmlparser.parseString(xml.encode("utf-8"))
+
+    return dom.findB("record")
@@ -0,0 +1,294 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from xml.parsers import expat
+
+from .. import tools
+from .raw_record import RawRecord
+
+
+# Variables ===================================================================
+_CONTENT_TAGS = {"leader", "controlfield", "fixfield", "subfield"}
+_FIELD_TAGS = {"datafield", "varfield"}
+
+
+# Functions & classes =========================================================
+class _StopParsing(Exception):
+    """
+    Raised from the handlers to stop the expat, once the record is parsed.
+    """
+
+
+class _RecordHandler(object):
+    """
+    Expat handlers, which collect the fields of the first ``<record>``.
+
+    Content of the elements is not taken from the character data handler,
+    but sliced directly from the input using the byte positions reported by
+    expat. This keeps the entities untouched, exactly as the
+    :mod:`dhtmlparser` does. The content starts at the position of the first
+    event after the start tag (character data, comment, child element or
+    the end tag), because ``>`` may be also inside the attribute values.
+
+    Fields of both MARC XML and OAI MARC dialects are collected, the right
+    ones are picked once the whole record is read.
+
+    In `lazy` mode, data fields and subfields are skipped completely. Data
+    fields and subfields not wanted by `tags` are skipped without reading
+    their content.
+
+    With `sources`, the source XML of each data field is sliced from the
+    input in the same way, from its start tag to the end of its end tag.
+    """
+    def __init__(self, xml, parser, lazy=False, tags=None, sources=False):
+        self.xml = xml
+        self.parser = parser
+        self.lazy = lazy
+        self.tags = tags
+        self.sources = {False: [], True: []} if sources else None
+
+        self.open_records = 0
+        self.oai_marc = False
+        self.leader = None
+
+        self.controlfields = {False: [], True: []}
+        self.datafields = {False: [], True: []}
+
+        self._content_stack = []
+        self._field_stack = []
+
+        # content element, which waits for the position of its content
+        self._pending = None
+
+    def _wanted_subfield(self, attrs):
+        """
+        Should be the subfield with `attrs` parsed?
+        """
+        if not self._field_stack:
+            return False
+
+        oai, _, subfields, codes, _ = self._field_stack[-1]
+        if subfields is None:  # unwanted field
+            return False
+
+        sub_id = "label" if oai else "code"
+
+        return sub_id in attrs and (codes is None or attrs[sub_id] in codes)
+
+    def _start_field(self, name, attrs):
+        oai = name == "varfield"
+        tag = attrs.get("id" if oai else "tag")
+
+        if tag is None or (self.tags is not None and tag not in self.tags):
+            self._field_stack.append((oai, attrs, None, None, None))
+            return
+
+        codes = self.tags[tag] if self.tags is not None else None
+        self._field_stack.append(
+            (oai, attrs, [], codes, self.parser.CurrentByteIndex)
+        )
+
+    def _wait_for_content(self, entry):
+        """
+        Remember the position of the next event as the start of the content
+        of the `entry`.
+        """
+        self._pending = entry
+
+        self.parser.CharacterDataHandler = self.mark_content_start
+        self.parser.CommentHandler = self.mark_content_start
+        self.parser.ProcessingInstructionHandler = self.mark_content_start
+        self.parser.StartCdataSectionHandler = self.mark_content_start
+
+    def mark_content_start(self, *args):
+        """
+        Handler of the first event after the start tag of the content
+        element.
+        """
+        if self._pending is None:
+            return
+
+        self._pending[1] = self.parser.CurrentByteIndex
+        self._pending = None
+
+        self.parser.CharacterDataHandler = None
+        self.parser.CommentHandler = None
+        self.parser.ProcessingInstructionHandler = None
+        self.parser.StartCdataSectionHandler = None
+
+    def start(self, name, attrs):
+        self.mark_content_start()
+        name = name.lower()
+
+        if name == "record":
+            self.open_records += 1
+        if not self.open_records:
+            return
+
+        if self.lazy and (name == "subfield" or name in _FIELD_TAGS):
+            return
+
+        if name in _CONTENT_TAGS:
+            if name == "subfield" and not self._wanted_subfield(attrs):
+                self._content_stack.append((attrs, None))
+                return
+
+            entry = [attrs, None]
+            self._content_stack.append(entry)
+            self._wait_for_content(entry)
+        elif name in _FIELD_TAGS:
+            self._start_field(name, attrs)
+        elif name == "oai_marc":
+            self.oai_marc = True
+
+    def end(self, name):
+        self.mark_content_start()
+        name = name.lower()
+
+        if not self.open_records:
+            return
+
+        if name == "record":
+            self.open_records -= 1
+            if not self.open_records:
+                raise _StopParsing()
+
+        if self.lazy and (name == "subfield" or name in _FIELD_TAGS):
+            return
+
+        if name in _CONTENT_TAGS:
+            self._end_content_tag(name)
+        elif name in _FIELD_TAGS:
+            oai, attrs, subfields, codes, start = self._field_stack.pop()
+            if subfields is None:
+                return
+
+            if self.sources is not None:
+                self.sources[oai].append(
+                    self._field_source(start, subfields, codes)
+                )
+
+            tag_id, i_name = ("id", "i") if oai else ("tag", "ind")
+            self.datafields[oai].append((
+                attrs[tag_id],
+                attrs.get(i_name + "1", " "),
+                attrs.get(i_name + "2", " "),
+                subfields,
+            ))
+
+    def _field_source(self, start, subfields, codes):
+        """
+        Return source XML of the data field, which starts at `start` and ends
+        at the current end tag.
+
+        Fields with filtered subfields (`codes`) don't match their source.
+        Fields without subfields may be empty elements, which have no end
+        tag and the current position is already behind them, so they are
+        skipped as well.
+        """
+        if codes is not None or not subfields:
+            return None
+
+        end = self.xml.index(">", self.parser.CurrentByteIndex) + 1
+
+        return self.xml[start:end]
+
+    def _end_content_tag(self, name):
+        attrs, content_start = self._content_stack.pop()
+        if content_start is None:  # skipped
+            return
+
+        content_end = max(content_start, self.parser.CurrentByteIndex)
+        content = self.xml[content_start:content_end]
+
+        if name == "subfield":
+            oai, _, subfields, _, _ = self._field_stack[-1]
+            sub_id = "label" if oai else "code"
+
+            subfields.append((attrs[sub_id], content.strip()))
+
+        elif name == "controlfield" and "tag" in attrs:
+            self.controlfields[False].append((attrs["tag"], content.strip()))
+
+        elif name == "fixfield" and "id" in attrs:
+            self.controlfields[True].append((attrs["id"], content.strip()))
+
+        elif name == "leader" and self.leader is None:
+            self.leader = content
+
+    def to_raw_record(self):
+        oai = self.oai_marc
+
+        return RawRecord(
+            oai_marc=oai,
+            leader=None if oai else self.leader,
+            controlfields=self.controlfields[oai],
+            datafields=self.datafields[oai],
+            sources=self.sources[oai] if self.sources is not None else None,
+        )
+
+
+def parse_record(xml, lazy=False, tags=None, sources=False):
+    """
+    Parse first ``<record>`` in `xml` using the stdlib's expat.
+
+    Args:
+        xml (str): input data
+        lazy (bool, default False): Skip the data fields.
+             :attr:`.RawRecord.datafields` is then function, which parses the
+             `xml` again and returns just the data fields.
+        tags (dict, default None): Parse only these data fields, see
+             :func:`.tag_filter`.
+        sources (bool, default False): Collect also the source XML of the
+                data fields to :attr:`.RawRecord.sources`. Ignored in `lazy`
+                mode.
+
+    Returns:
+        obj: :class:`.RawRecord` instance.
+
+    Raises:
+        ValueError: If there is no record, or the `xml` is not well-formed.
+    """
+    if isinstance(xml, unicode):
+        xml = xml.encode("utf-8")
+    elif not isinstance(xml, str):
+        xml = str(xml)
+
+    parser = expat.ParserCreate()
+    parser.returns_unicode = False
+
+    handler = _RecordHandler(xml, parser, lazy, tags, sources and not lazy)
+    parser.StartElementHandler = handler.start
+    parser.EndElementHandler = handler.end
+
+    try:
+        parser.Parse(xml, True)
+    except _StopParsing:
+        raw_record = handler.to_raw_record()
+    except expat.ExpatError as e:
+        raise ValueError("Can't parse the MARC XML document: %s" % e)
+    else:
+        raise ValueError("There is no <record> in your MARC XML document!")
+
+    if lazy:
+        return raw_record._replace(
+            datafields=lambda: parse_record(xml, tags=tags).datafields
+        )
+
+    return raw_record
+
+
+def iter_records(xml):
+    """
+    Split `xml` to the ``<record>`` elements.
+
+    Args:
+        xml (str): Input string with XML.
+
+    Returns:
+        iterator: Strings, which may be passed to :func:`parse_record`.
+    """
+    return tools.split_records(xml)
@@ -0,0 +1,42 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from collections import namedtuple
+
+
+# Functions & classes =========================================================
+class RawRecord(namedtuple("RawRecord", ["oai_marc",
+                                         "leader",
+                                         "controlfields",
+                                         "datafields",
+                                         "sources"])):
+    """
+    Backend-independent result of parsing of one ``<record>``.
+
+    This is what the parser backends produce and what the
+    :class:`.MARCXMLParser` converts to its :attr:`.controlfields` and
+    :attr:`.datafields` structures.
+
+    Attributes:
+        oai_marc (bool): True if the record is in OAI MARC format.
+        leader (str): Content of the ``<leader>`` element or None.
+        controlfields (list): List of ``(tag, value)`` tuples.
+        datafields (list): List of ``(tag, i1, i2, subfields)`` tuples, where
+                   `subfields` is list of ``(code, value)`` tuples.
+        sources (list): Source XML of each of the `datafields` (None for the
+                fields without the source, for example those with filtered
+                subfields), if the backend was asked for it, else None.
+    """
+    def __new__(cls, oai_marc, leader, controlfields, datafields,
+                sources=None):
+        return super(RawRecord, cls).__new__(
+            cls,
+            oai_marc,
+            leader,
+            controlfields,
+            datafields,
+            sources,
+        )
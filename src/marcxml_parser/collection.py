@@ -0,0 +1,153 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import gzip
+import datetime
+from xml.sax.saxutils import escape
+
+
+# Variables ===================================================================
+BUFFER_SIZE = 64 * 1024  #: Default size of the write buffer.
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+_COLLECTION_HEADER = '<collection xmlns="http://www.loc.gov/MARC21/slim/">\n'
+_COLLECTION_FOOTER = '</collection>\n'
+
+_OAI_PMH_HEADER = """<OAI-PMH xmlns="http://www.openarchives.org/OAI/2.0/">
+<responseDate>%s</responseDate>
+<request verb="ListRecords" metadataPrefix="oai_marc">%s</request>
+<ListRecords>
+"""
+_OAI_PMH_RESUMPTION = "<resumptionToken>%s</resumptionToken>\n"
+_OAI_PMH_FOOTER = "</ListRecords>\n</OAI-PMH>\n"
+
+
+# Functions & classes =========================================================
+class _BufferedWriter(object):
+    """
+    Collect small writes and pass them to `fp` in blocks of `buffer_size`
+    bytes. Unicode is encoded to UTF-8.
+    """
+    def __init__(self, fp, buffer_size=BUFFER_SIZE):
+        self.fp = fp
+        self.buffer_size = buffer_size
+
+        self._chunks = []
+        self._size = 0
+
+    def write(self, data):
+        if isinstance(data, unicode):
+            data = data.encode("utf-8")
+
+        self._chunks.append(data)
+        self._size += len(data)
+
+        if self._size >= self.buffer_size:
+            self.flush_buffer()
+
+    def flush_buffer(self):
+        """
+        Write the buffered data to `fp`.
+        """
+        if self._chunks:
+            self.fp.write("".join(self._chunks))
+
+        self._chunks = []
+        self._size = 0
+
+    def flush(self):
+        """
+        Write the buffered data and flush the `fp`.
+        """
+        self.flush_buffer()
+
+        if hasattr(self.fp, "flush"):
+            self.fp.flush()
+
+
+def write_collection(records, fp, oai_marc=False, use_gzip=False,
+                     buffer_size=BUFFER_SIZE, flush_every=None,
+                     base_url="", resumption_token=None):
+    """
+    Write `records` to `fp` as one MARC XML ``<collection>`` document, or as
+    OAI-PMH ``ListRecords`` page with OAI MARC records.
+
+    Records are serialized one by one by :meth:`.MARCXMLSerializer.write_xml`
+    to the buffer, which is written to `fp` in blocks, so the memory usage
+    doesn't depend on the number of records.
+
+    Note:
+        OAI-PMH records are written in the same form as they are parsed
+        (``<record><metadata><oai_marc>``), without the OAI ``<header>``.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects, or records
+                already serialized to XML strings. Any iterable, for example
+                :func:`.record_iterator`, may be used.
+        fp (str/file): Path of the output file, or file-like object opened in
+           binary mode.
+        oai_marc (bool, default False): Write OAI-PMH page instead of MARC XML
+                 collection. Records are converted to the dialect, if needed.
+        use_gzip (bool, default False): Compress the output with gzip.
+        buffer_size (int, default BUFFER_SIZE): Size of the write buffer.
+        flush_every (int, default None): Flush the output after each
+                    `flush_every` records.
+        base_url (str, default ""): Base URL of the OAI-PMH repository, used
+                 in the ``<request>`` element. It is XML-escaped.
+        resumption_token (str, default None): ``<resumptionToken>`` of the
+                         OAI-PMH page. It is XML-escaped.
+
+    Returns:
+        int: Number of written records.
+    """
+    close = []  # files, which should be closed at the end
+    if not hasattr(fp, "write"):
+        fp = open(fp, "wb")
+        close.append(fp)
+
+    try:
+        if use_gzip:
+            fp = gzip.GzipFile(fileobj=fp, mode="wb")
+            close.insert(0, fp)
+
+        writer = _BufferedWriter(fp, buffer_size)
+        writer.write(XML_DECLARATION)
+
+        if oai_marc:
+            writer.write(_OAI_PMH_HEADER % (
+                datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+                escape(base_url),
+            ))
+        else:
+            writer.write(_COLLECTION_HEADER)
+
+        count = 0
+        for record in records:
+            if isinstance(record, basestring):
+                writer.write(record)
+            else:
+                record.write_xml(writer, oai_marc=oai_marc)
+
+            count += 1
+
+            if flush_every and count % flush_every == 0:
+                writer.flush()
+
+        if oai_marc:
+            if resumption_token is not None:
+                writer.write(_OAI_PMH_RESUMPTION % escape(resumption_token))
+
+            writer.write(_OAI_PMH_FOOTER)
+        else:
+            writer.write(_COLLECTION_FOOTER)
+
+        writer.flush()
+    finally:
+        for f in close:
+            f.close()
+
+    return count
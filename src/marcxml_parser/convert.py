@@ -0,0 +1,230 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Streaming conversion of collections between MARC XML and OAI MARC.
+
+Records are read one by one from the source, converted (optionally in pool
+of worker processes) and written to the target by
+:func:`.write_collection`, so the memory usage doesn't depend on the size
+of the collection.
+
+Conversion maps ``fixfield``/``varfield``/``i1``/``i2`` to the
+``controlfield``/``datafield``/``ind1``/``ind2`` and back. ``LDR`` fixfield
+is carried to the ``<leader>`` and the leader to the ``LDR`` fixfield.
+"""
+# Imports =====================================================================
+import sys
+import argparse
+
+from . import tools
+from . import backends
+from .record import MARCXMLRecord
+from .collection import write_collection
+
+
+# Functions & classes =========================================================
+def convert_record(record_xml, oai_marc, backend=None, resort=True):
+    """
+    Convert one record to the dialect given by `oai_marc`.
+
+    Args:
+        record_xml (str): XML of the record in any dialect.
+        oai_marc (bool): True for OAI MARC output, False for MARC XML.
+        backend (str, default None): Parser backend.
+        resort (bool, default True): Sort the output alphabetically?
+
+    Returns:
+        str: XML of the converted record.
+    """
+    if isinstance(record_xml, unicode):
+        record_xml = record_xml.encode("utf-8")
+
+    record = MARCXMLRecord(
+        record_xml,
+        resort,
+        backend=backend,
+        keep_original=False
+    )
+
+    return record.to_XML(oai_marc, leader_fixfield=True)
+
+
+def _convert_batch(args):
+    """
+    Convert batch of records in the worker process.
+
+    Args:
+        args (tuple): ``(oai_marc, backend, resort, list of record strings)``.
+
+    Returns:
+        list: Converted records.
+    """
+    oai_marc, backend, resort, batch = args
+
+    return [
+        convert_record(record_xml, oai_marc, backend, resort)
+        for record_xml in batch
+    ]
+
+
+def converted_records(source, oai_marc, backend=None, resort=True,
+                      workers=None, batch_size=100, max_pending=None,
+                      chunk_size=tools.CHUNK_SIZE):
+    """
+    Read records from the `source` and convert them one by one.
+
+    Args:
+        source (str/file): MARC XML or OAI MARC collection, string or
+               file-like object.
+        oai_marc (bool): True for OAI MARC output, False for MARC XML.
+        backend (str, default None): Parser backend.
+        resort (bool, default True): Sort the output alphabetically?
+        workers (int, default None): Convert the records in pool of
+                `workers` processes.
+        batch_size (int, default 100): Number of records sent to the worker
+                   process at once.
+        max_pending (int, default None): Maximal number of batches being
+                    converted at the same time. ``2 * workers`` if not set.
+        chunk_size (int, default tools.CHUNK_SIZE): How much data is read at
+                   once.
+
+    Yields:
+        str: XML of the converted records, in the original order.
+    """
+    records = tools.split_records(source, chunk_size)
+
+    if not workers:
+        for record_xml in records:
+            yield convert_record(record_xml, oai_marc, backend, resort)
+
+        return
+
+    tasks = (
+        (oai_marc, backend, resort, batch)
+        for batch in tools.batches(records, batch_size)
+    )
+    converted_batches = tools.parallel_map(
+        _convert_batch,
+        tasks,
+        workers=workers,
+        max_pending=max_pending,
+    )
+
+    for converted_batch in converted_batches:
+        for record_xml in converted_batch:
+            yield record_xml
+
+
+def convert(source, target, oai_marc, backend=None, resort=True,
+            workers=None, batch_size=100, max_pending=None,
+            chunk_size=tools.CHUNK_SIZE, **kwargs):
+    """
+    Convert collection in `source` to the dialect given by `oai_marc` and
+    write it to the `target`.
+
+    Args:
+        source (str/file): Path of the source collection, or file-like object
+               with it.
+        target (str/file): Path of the output file, or file-like object
+               opened in binary mode.
+        oai_marc (bool): True for OAI MARC output, False for MARC XML.
+        kwargs: Other arguments are same as for :func:`converted_records`
+                and :func:`.write_collection`.
+
+    Returns:
+        int: Number of converted records.
+    """
+    close = False
+    if not hasattr(source, "read"):
+        source = open(source, "rb")
+        close = True
+
+    try:
+        records = converted_records(
+            source,
+            oai_marc,
+            backend=backend,
+            resort=resort,
+            workers=workers,
+            batch_size=batch_size,
+            max_pending=max_pending,
+            chunk_size=chunk_size,
+        )
+
+        return write_collection(records, target, oai_marc=oai_marc, **kwargs)
+    finally:
+        if close:
+            source.close()
+
+
+def main(args=None):
+    """
+    Console entry point (``marcxml_convert``).
+    """
+    parser = argparse.ArgumentParser(
+        description="Convert MARC XML collection to OAI MARC and back."
+    )
+    parser.add_argument(
+        "source",
+        help="Path to the source collection, '-' for stdin."
+    )
+    parser.add_argument(
+        "target",
+        help="Path to the output file, '-' for stdout."
+    )
+    parser.add_argument(
+        "-t",
+        "--to",
+        choices=["marc", "oai"],
+        default="marc",
+        help="Dialect of the output. Default 'marc'."
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of worker processes. Default none."
+    )
+    parser.add_argument(
+        "-b",
+        "--backend",
+        choices=backends.BACKENDS.keys(),
+        default=None,
+        help="Parser backend."
+    )
+    parser.add_argument(
+        "--no-resort",
+        action="store_true",
+        help="Keep the original order of the fields."
+    )
+    parser.add_argument(
+        "-z",
+        "--gzip",
+        action="store_true",
+        help="Compress the output with gzip."
+    )
+    args = parser.parse_args(args)
+
+    source = sys.stdin if args.source == "-" else args.source
+    target = sys.stdout if args.target == "-" else args.target
+
+    count = convert(
+        source,
+        target,
+        oai_marc=args.to == "oai",
+        backend=args.backend,
+        resort=not args.no_resort,
+        workers=args.workers,
+        use_gzip=args.gzip,
+    )
+
+    sys.stderr.write("Converted %d records.\n" % count)
+
+
+# Main program ================================================================
+if __name__ == '__main__':
+    main()
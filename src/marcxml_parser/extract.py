@@ -0,0 +1,485 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Batch extraction of the highlevel getters from many records into columns.
+
+Each column is one flat list of values. Columns of getters returning lists
+(:meth:`.get_authors`, :meth:`.get_ISBNs`, ..) also have list of offsets,
+where the values of each record start::
+
+    >>> columns = extract(records, ["get_name", "get_ISBNs"])
+    >>> columns["get_ISBNs"].values
+    ['80-251-0225-4', '978-80-260-9077-9', '978-80-260-9076-2']
+    >>> columns["get_ISBNs"].offsets
+    [0, 1, 1, 3]
+    >>> columns["get_ISBNs"][2]
+    ['978-80-260-9077-9', '978-80-260-9076-2']
+
+Records may be processed in parallel batches and written directly to CSV
+or JSON Lines by :func:`write_csv` and :func:`write_jsonl`.
+"""
+# Imports =====================================================================
+import csv
+import json
+from enum import Enum
+from collections import OrderedDict
+
+from . import tools
+from .record import MARCXMLRecord
+from .selector import Selector
+
+
+# Functions & classes =========================================================
+class Column(object):
+    """
+    One column of the extracted values.
+
+    Attributes:
+        name (str): Name of the getter or the selector.
+        values (list): Values of all records. For single-valued columns one
+               value per record, None for missing values.
+        offsets (list): For multi-valued columns, position of the first
+                value of each record in :attr:`values`, followed by the
+                length of :attr:`values`. None for single-valued columns.
+    """
+    def __init__(self, name, values=None, offsets=None):
+        self.name = name
+        self.values = values if values is not None else []
+        self.offsets = offsets
+
+    @classmethod
+    def from_rows(cls, name, rows):
+        """
+        Build the column from the results of the getter.
+
+        Args:
+            name (str): Name of the column.
+            rows (list): Result of the getter for each record. Column is
+                 multi-valued, if any of the results is list.
+
+        Returns:
+            obj: :class:`Column` instance.
+        """
+        column = cls(name, list(rows))
+
+        if any(isinstance(row, list) for row in rows):
+            column._to_multi()
+
+        return column
+
+    @property
+    def is_multi(self):
+        """
+        bool: True for multi-valued columns.
+        """
+        return self.offsets is not None
+
+    def _to_multi(self):
+        """
+        Convert single-valued column to multi-valued. None is converted to
+        blank list, other values to lists with one item.
+        """
+        if self.is_multi:
+            return
+
+        rows = self.values
+
+        self.values = []
+        self.offsets = [0]
+        for row in rows:
+            if isinstance(row, list):
+                self.values.extend(row)
+            elif row is not None:
+                self.values.append(row)
+
+            self.offsets.append(len(self.values))
+
+    def extend(self, other):
+        """
+        Append rows from the `other` column.
+
+        Args:
+            other (obj): :class:`Column` instance.
+        """
+        if other.is_multi or self.is_multi:
+            self._to_multi()
+            other._to_multi()
+
+            base = len(self.values)
+            self.values.extend(other.values)
+            self.offsets.extend(base + offset for offset in other.offsets[1:])
+        else:
+            self.values.extend(other.values)
+
+    def __len__(self):
+        if self.is_multi:
+            return len(self.offsets) - 1
+
+        return len(self.values)
+
+    def __getitem__(self, row):
+        """
+        Returns:
+            obj: Value of the record on `row` position, list for \
+                 multi-valued columns.
+        """
+        if not self.is_multi:
+            return self.values[row]
+
+        if row < 0:
+            row += len(self)
+
+        if not 0 <= row < len(self):
+            raise IndexError("Row index out of range!")
+
+        return self.values[self.offsets[row]:self.offsets[row + 1]]
+
+    def __iter__(self):
+        for row in xrange(len(self)):
+            yield self[row]
+
+    def __repr__(self):
+        return "%s(%r, %d rows)" % (
+            self.__class__.__name__,
+            self.name,
+            len(self),
+        )
+
+
+def _plain(value):
+    """
+    Convert `value` returned by the getter to plain value, which doesn't
+    reference the record.
+    """
+    if isinstance(value, list):
+        return [_plain(item) for item in value]
+
+    if isinstance(value, str):
+        return str.__str__(value)
+
+    if isinstance(value, unicode):
+        return unicode.__unicode__(value)
+
+    if isinstance(value, Enum):
+        return value.name
+
+    return value
+
+
+def _getter(name):
+    """
+    Return function, which applies the getter or selector `name` to the
+    record.
+
+    Raises:
+        ValueError: If there is no such getter and `name` is not selector.
+    """
+    if name.startswith(("get_", "is_")):
+        method = getattr(MARCXMLRecord, name, None)
+        if not callable(method):
+            raise ValueError("Unknown getter '%s'!" % name)
+
+        return method
+
+    try:
+        return Selector.compile(name)
+    except ValueError:
+        raise ValueError("Unknown getter '%s'!" % name)
+
+
+def _compile_getters(getters):
+    """
+    Return functions for all `getters`.
+
+    Raises:
+        ValueError: For invalid or duplicate `getters`.
+    """
+    if len(set(getters)) != len(getters):
+        raise ValueError("Duplicate getters!")
+
+    return [_getter(name) for name in getters]
+
+
+def _apply(record, functions, backend):
+    """
+    Apply the compiled getter `functions` to the `record`.
+    """
+    if isinstance(record, basestring):
+        record = MARCXMLRecord(
+            record,
+            backend=backend,
+            keep_original=False,
+            memoize=True,
+        )
+
+    values = []
+    for fn in functions:
+        try:
+            value = fn(record)
+        except KeyError:
+            value = None
+
+        values.append(_plain(value))
+
+    return values
+
+
+def extract_row(record, getters, backend=None):
+    """
+    Apply `getters` to one `record`.
+
+    Getters, which raise :exc:`~exceptions.KeyError` (:meth:`.get_name`
+    for records without the name), return None.
+
+    Args:
+        record (obj/str): :class:`.MARCXMLRecord` or XML of the record.
+        getters (list): Names of the getters (``"get_name"``,
+                ``"is_continuing"``, ..), or :class:`.Selector` strings
+                (``"245abnp"``).
+        backend (str, default None): Parser backend used for XML records.
+
+    Returns:
+        list: Plain value of each getter.
+
+    Raises:
+        ValueError: For unknown getters.
+    """
+    return _apply(record, _compile_getters(getters), backend)
+
+
+def _extract_batch(args):
+    """
+    Extract the columns from batch of records in the worker process.
+
+    Args:
+        args (tuple): ``(getters, backend, list of records)``.
+
+    Returns:
+        list: :class:`Column` for each getter.
+    """
+    getters, backend, batch = args
+
+    functions = _compile_getters(getters)
+    rows = [_apply(record, functions, backend) for record in batch]
+
+    return [
+        Column.from_rows(name, [row[cnt] for row in rows])
+        for cnt, name in enumerate(getters)
+    ]
+
+
+def iter_batches(records, getters, backend=None, workers=None,
+                 batch_size=1000, max_pending=None):
+    """
+    Extract the `getters` from `records` in batches.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects, or XML strings
+                of the records (see :func:`.split_records`), which are
+                parsed in the worker processes.
+        getters (list): Names of the getters, see :func:`extract_row`.
+        backend (str, default None): Parser backend used for XML records.
+        workers (int, default None): Process the batches in pool of
+                `workers` processes.
+        batch_size (int, default 1000): Number of records in each batch.
+        max_pending (int, default None): Maximal number of batches being
+                    processed at the same time. ``2 * workers`` if not set.
+
+    Yields:
+        OrderedDict: ``{getter name: Column}`` for each batch, in the order \
+                     of the `records`.
+
+    Raises:
+        ValueError: For unknown getters.
+    """
+    getters = list(getters)
+    _compile_getters(getters)
+
+    tasks = (
+        (getters, backend, batch)
+        for batch in tools.batches(records, batch_size)
+    )
+
+    if workers:
+        results = tools.parallel_map(
+            _extract_batch,
+            tasks,
+            workers=workers,
+            max_pending=max_pending,
+        )
+    else:
+        results = (_extract_batch(task) for task in tasks)
+
+    for columns in results:
+        yield OrderedDict((column.name, column) for column in columns)
+
+
+def extract(records, getters, **kwargs):
+    """
+    Extract the `getters` from all `records` into columns.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects or XML strings.
+        getters (list): Names of the getters, see :func:`extract_row`.
+        kwargs: Other arguments are same as for :func:`iter_batches`.
+
+    Returns:
+        OrderedDict: ``{getter name: Column}``.
+
+    Raises:
+        ValueError: For unknown getters.
+    """
+    getters = list(getters)
+
+    result = OrderedDict((name, Column(name)) for name in getters)
+    for batch in iter_batches(records, getters, **kwargs):
+        for name, column in batch.iteritems():
+            result[name].extend(column)
+
+    return result
+
+
+def _iter_rows(batches):
+    """
+    Convert columnar batches back to rows.
+
+    Yields:
+        list: Values of each record.
+    """
+    for batch in batches:
+        columns = batch.values()
+        if not columns:
+            continue
+
+        for row in xrange(len(columns[0])):
+            yield [column[row] for column in columns]
+
+
+def _csv_value(value, separator):
+    """
+    Convert `value` to string for the CSV cell.
+    """
+    if value is None:
+        return ""
+
+    if isinstance(value, list):
+        return separator.join(_csv_value(item, separator) for item in value)
+
+    if isinstance(value, tuple):  # Person, Corporation
+        return " ".join(_csv_value(item, separator) for item in value if item)
+
+    if isinstance(value, unicode):
+        return value.encode("utf-8")
+
+    return str(value)
+
+
+def _json_value(value):
+    """
+    Convert `value` to object, which may be serialized to JSON.
+    """
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+
+    if hasattr(value, "_asdict"):  # Person, Corporation
+        return OrderedDict(
+            (key, _json_value(val))
+            for key, val in value._asdict().iteritems()
+        )
+
+    if isinstance(value, str):
+        return value.decode("utf-8", "replace")
+
+    return value
+
+
+def _open_output(fp):
+    """
+    Open `fp`, if it is path.
+
+    Returns:
+        tuple: ``(file, should be closed)``.
+    """
+    if hasattr(fp, "write"):
+        return fp, False
+
+    return open(fp, "wb"), True
+
+
+def write_csv(records, getters, fp, separator="|", header=True, **kwargs):
+    """
+    Extract the `getters` from `records` and write them to CSV, one row for
+    each record. Records are processed in batches, so the memory usage
+    doesn't depend on the number of records.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects or XML strings.
+        getters (list): Names of the getters, see :func:`extract_row`.
+        fp (str/file): Path of the output file, or file-like object opened in
+           binary mode.
+        separator (str, default "|"): Separator of the values of
+                  multi-valued columns.
+        header (bool, default True): Write the names of the getters to the
+               first row.
+        kwargs: Other arguments are same as for :func:`iter_batches`.
+
+    Returns:
+        int: Number of written records.
+    """
+    getters = list(getters)
+    batches = iter_batches(records, getters, **kwargs)
+
+    fp, close = _open_output(fp)
+    try:
+        writer = csv.writer(fp)
+        if header:
+            writer.writerow(getters)
+
+        count = 0
+        for row in _iter_rows(batches):
+            writer.writerow([_csv_value(value, separator) for value in row])
+            count += 1
+    finally:
+        if close:
+            fp.close()
+
+    return count
+
+
+def write_jsonl(records, getters, fp, **kwargs):
+    """
+    Extract the `getters` from `records` and write them as JSON Lines, one
+    JSON object for each record. Records are processed in batches, so the
+    memory usage doesn't depend on the number of records.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects or XML strings.
+        getters (list): Names of the getters, see :func:`extract_row`.
+        fp (str/file): Path of the output file, or file-like object opened in
+           binary mode.
+        kwargs: Other arguments are same as for :func:`iter_batches`.
+
+    Returns:
+        int: Number of written records.
+    """
+    getters = list(getters)
+    batches = iter_batches(records, getters, **kwargs)
+
+    fp, close = _open_output(fp)
+    try:
+        count = 0
+        for row in _iter_rows(batches):
+            line = OrderedDict(
+                (name, _json_value(value))
+                for name, value in zip(getters, row)
+            )
+            fp.write(json.dumps(line) + "\n")
+            count += 1
+    finally:
+        if close:
+            fp.close()
+
+    return count
@@ -0,0 +1,176 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from StringIO import StringIO
+from xml.sax.saxutils import escape
+
+from .record import MARCXMLRecord
+from .backends import RawRecord
+from .tools import LEADER_LENGTH
+from .tools import FIELD_TERMINATOR
+from .tools import SUBFIELD_DELIMITER
+
+
+# Functions & classes =========================================================
+def _read_records(fp):
+    """
+    Read binary records from `fp` one by one, using the record length from
+    the leader. Whitespace between the records is skipped.
+
+    Yields:
+        str: Binary records.
+    """
+    while True:
+        head = fp.read(5).lstrip()
+        while head and len(head) < 5:
+            data = fp.read(5 - len(head))
+            if not data:
+                break
+
+            head = (head + data).lstrip()
+
+        if not head:
+            return
+
+        if len(head) < 5 or not head.isdigit():
+            raise ValueError("Invalid record length '%s'!" % head)
+
+        length = int(head)
+        rest = fp.read(length - 5)
+        if len(rest) != length - 5:
+            raise ValueError("Unexpected end of the record!")
+
+        yield head + rest
+
+
+def _is_control_field(tag, data):
+    """
+    Control fields are ``001``-``009`` and also non-numeric fields (such as
+    Aleph's ``FMT``) without subfields.
+    """
+    if tag.isdigit():
+        return tag.startswith("00")
+
+    return SUBFIELD_DELIMITER not in data
+
+
+def parse_iso2709(data):
+    """
+    Parse one binary ISO 2709 record.
+
+    Values are XML-escaped, so they are stored in the same form as values
+    parsed from the MARC XML. Data are not decoded, so UTF-8 records (``a`` on
+    9th position of the leader) give UTF-8 strings and MARC-8 records are
+    passed through unchanged.
+
+    Args:
+        data (str): Binary record.
+
+    Returns:
+        obj: :class:`.RawRecord` instance.
+
+    Raises:
+        ValueError: If the record is not valid ISO 2709 record.
+    """
+    if len(data) < LEADER_LENGTH:
+        raise ValueError("Record is too short!")
+
+    leader = data[:LEADER_LENGTH]
+
+    length_digits = int(leader[20]) if leader[20].isdigit() else 4
+    start_digits = int(leader[21]) if leader[21].isdigit() else 5
+    entry_size = 3 + length_digits + start_digits
+
+    if not leader[12:17].isdigit():
+        raise ValueError("Invalid base address '%s'!" % leader[12:17])
+    base_address = int(leader[12:17])
+
+    directory_end = data.find(FIELD_TERMINATOR, LEADER_LENGTH)
+    if directory_end == -1:
+        raise ValueError("Unterminated directory!")
+    directory = data[LEADER_LENGTH:directory_end]
+
+    controlfields = []
+    datafields = []
+    for entry_start in range(0, len(directory) - entry_size + 1, entry_size):
+        entry = directory[entry_start:entry_start + entry_size]
+
+        tag = entry[:3]
+        length = int(entry[3:3 + length_digits])
+        start = base_address + int(entry[3 + length_digits:])
+
+        field = data[start:start + length]
+        if field.endswith(FIELD_TERMINATOR):
+            field = field[:-1]
+
+        if _is_control_field(tag, field):
+            controlfields.append((tag, escape(field)))
+            continue
+
+        indicators, _, subfields = field.partition(SUBFIELD_DELIMITER)
+        indicators = indicators.ljust(2)
+
+        datafields.append((
+            tag,
+            indicators[0],
+            indicators[1],
+            [
+                (subfield[:1], escape(subfield[1:]))
+                for subfield in subfields.split(SUBFIELD_DELIMITER)
+                if subfield
+            ],
+        ))
+
+    return RawRecord(
+        oai_marc=False,
+        leader=leader,
+        controlfields=controlfields,
+        datafields=datafields,
+    )
+
+
+def iso2709_iterator(fp, resort=True, **kwargs):
+    """
+    Iterate over all records in binary ISO 2709 (``.mrc``) file.
+
+    The records are read one by one using their length, so the whole file is
+    never loaded into memory and no XML is involved at all.
+
+    Args:
+        fp (str/file): File-like object opened in binary mode, or string
+           with the binary data.
+        resort (bool, default True): See :class:`.MARCXMLParser`.
+        kwargs: Other arguments passed to the :class:`.MARCXMLRecord`.
+
+    Yields:
+        MARCXMLRecord: For each record.
+    """
+    if not hasattr(fp, "read"):
+        fp = StringIO(fp)
+
+    for data in _read_records(fp):
+        yield MARCXMLRecord(parse_iso2709(data), resort, **kwargs)
+
+
+def write_iso2709(records, fp):
+    """
+    Write all `records` to `fp` as binary ISO 2709 (``.mrc``) file.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects. Any iterable,
+                for example :func:`.record_iterator`, may be used, records are
+                written one by one.
+        fp (file): File-like object opened in binary mode.
+
+    Returns:
+        int: Number of written records.
+    """
+    count = 0
+    for record in records:
+        fp.write(record.to_ISO2709())
+        count += 1
+
+    return count
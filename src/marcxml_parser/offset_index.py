@@ -0,0 +1,721 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import os
+import re
+import mmap
+import zlib
+import heapq
+import shutil
+import struct
+import bisect
+import tempfile
+import unicodedata
+
+from . import tools
+from .record import MARCXMLRecord
+
+
+# Variables ===================================================================
+INDEX_SUFFIX = ".idx"  #: Suffix of the sidecar index file.
+
+_MAGIC = "MXMLIDX2"
+
+# magic, records, keys, source size, CRC32 of the last record, length of the
+# names of the indexed keys, which follow the header
+_HEADER = struct.Struct("<8sQQQIH")
+_SPAN = struct.Struct("<QI")  # offset, length
+_KEY = struct.Struct("<QIQ")  # offset in key blob, key length, ordinal
+
+_ISXN_JUNK_RE = re.compile(r"[^0-9X]")
+_NAME_JUNK_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _author_names(record):
+    return [
+        " ".join([author.name, author.second_name, author.surname])
+        for author in record.get_authors()
+    ]
+
+
+#: Functions used to get the lookup keys from the :class:`.MARCXMLRecord`.
+KEY_EXTRACTORS = {
+    "001": lambda record: [record.controlfields.get("001", "")],
+    "isbn": lambda record: record.get_ISBNs(),
+    "issn": lambda record: record.get_ISSNs(),
+    "author": _author_names,
+}
+
+
+# Functions & classes =========================================================
+def _normalize_isxn(value):
+    """
+    Keep just the digits and ``X`` of the ISBN/ISSN (``80-251-0225-4`` ->
+    ``8025102254``).
+    """
+    return _ISXN_JUNK_RE.sub("", value.upper())
+
+
+def _normalize_name(value):
+    """
+    Remove the diacritics, punctuation and case from the name and sort its
+    words, so ``Raymond, Eric S.`` is same as ``Eric S. Raymond``.
+    """
+    if not isinstance(value, unicode):
+        value = value.decode("utf-8", "replace")
+
+    value = unicodedata.normalize("NFKD", value)
+    value = u"".join(c for c in value if not unicodedata.combining(c))
+    words = _NAME_JUNK_RE.sub(u" ", value.lower()).split()
+
+    return u" ".join(sorted(words)).encode("utf-8")
+
+
+#: Functions used to normalize the keys before they are indexed or searched.
+KEY_NORMALIZERS = {
+    "001": lambda value: value.strip(),
+    "isbn": _normalize_isxn,
+    "issn": _normalize_isxn,
+    "author": _normalize_name,
+}
+
+
+def normalize_key(kind, value):
+    """
+    Normalize the `value` of the key by the :attr:`KEY_NORMALIZERS`.
+
+    Args:
+        kind (str): Name of the key (``"001"``, ``"isbn"``, ..).
+        value (str): Value of the key.
+
+    Returns:
+        str: Normalized value. Kinds without normalizer are returned as \
+             they are.
+    """
+    if isinstance(value, unicode):
+        value = value.encode("utf-8")
+
+    normalizer = KEY_NORMALIZERS.get(kind)
+    if normalizer is None:
+        return value
+
+    return normalizer(value)
+
+
+def _encode_key(kind, value):
+    """
+    Put the `kind` of the key and its normalized `value` to one string.
+    """
+    return kind + "\x00" + normalize_key(kind, value)
+
+
+def _record_keys(record_xml, keys, backend):
+    """
+    Return all encoded `keys` of the record in `record_xml`.
+    """
+    record = MARCXMLRecord(record_xml, backend=backend, keep_original=False)
+
+    encoded_keys = set()
+    for kind in keys:
+        for value in KEY_EXTRACTORS[kind](record):
+            key = _encode_key(kind, value)
+
+            if not key.endswith("\x00"):  # skip blank values
+                encoded_keys.add(key)
+
+    return encoded_keys
+
+
+def _keys_batch(args):
+    """
+    Get the keys of batch of records in the worker process.
+
+    Args:
+        args (tuple): ``(keys, backend, list of (offset, record string))``.
+
+    Returns:
+        list: ``(offset, length, set of encoded keys)`` tuples.
+    """
+    keys, backend, batch = args
+
+    return [
+        (offset, len(record_xml), _record_keys(record_xml, keys, backend))
+        for offset, record_xml in batch
+    ]
+
+
+def _scan(f, keys, backend, workers, batch_size, chunk_size):
+    """
+    Find the records in `f` from its current position and get their keys.
+
+    Yields:
+        tuple: ``(offset, length, set of encoded keys)`` for each record. \
+               Offsets are absolute positions in the file.
+    """
+    base_offset = f.tell()
+    records = (
+        (base_offset + offset, record_xml)
+        for offset, record_xml in tools.record_spans(f, chunk_size)
+    )
+
+    if not keys:
+        for offset, record_xml in records:
+            yield offset, len(record_xml), ()
+
+        return
+
+    if not workers:
+        for offset, record_xml in records:
+            yield offset, len(record_xml), _record_keys(
+                record_xml,
+                keys,
+                backend
+            )
+
+        return
+
+    tasks = (
+        (keys, backend, batch)
+        for batch in tools.batches(records, batch_size)
+    )
+    for result in tools.parallel_map(_keys_batch, tasks, workers=workers):
+        for item in result:
+            yield item
+
+
+def _check_keys(keys):
+    """
+    Raise ValueError, if any of the `keys` is not in the
+    :attr:`KEY_EXTRACTORS`.
+    """
+    for kind in keys:
+        if kind not in KEY_EXTRACTORS:
+            raise ValueError("Unknown key '%s'!" % kind)
+
+
+def _copy_mapped(mapped, start, end, f, block_size=tools.CHUNK_SIZE):
+    """
+    Copy `start`:`end` range of the `mapped` file to file `f` in blocks.
+    """
+    for position in xrange(start, end, block_size):
+        f.write(mapped[position:min(position + block_size, end)])
+
+
+def _write_index(index_path, spans, key_pairs, source_size, last_crc=0,
+                 keys=(), base=None):
+    """
+    Write the sidecar index file. The index is written to temporary file,
+    which replaces the old one only when it is complete.
+
+    Args:
+        index_path (str): Where to put the index.
+        spans (list): ``(offset, length)`` tuples for each record.
+        key_pairs (iterable): Sorted ``(encoded key, ordinal)`` tuples.
+        source_size (int): Size of the indexed file.
+        last_crc (int, default 0): CRC32 of the last record.
+        keys (list, default ()): Names of the indexed keys.
+        base (obj, default None): :class:`RecordIndex`, which is extended by
+             the `spans` and `key_pairs`. Its spans and keys are streamed
+             from the mapped index to the new one.
+    """
+    key_names = ",".join(keys)
+
+    record_count = len(spans)
+    if base is not None:
+        record_count += base.record_count
+        key_pairs = heapq.merge(base.iter_keys(), key_pairs)
+
+    directory = os.path.dirname(os.path.abspath(index_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=INDEX_SUFFIX)
+
+    try:
+        with os.fdopen(fd, "w+b") as f, tempfile.TemporaryFile() as blob:
+            f.write(_HEADER.pack(_MAGIC, 0, 0, 0, 0, 0))  # written later
+            f.write(key_names)
+
+            if base is not None:
+                _copy_mapped(base._index, base._spans_start,
+                             base._keys_start, f)
+
+            for offset, length in spans:
+                f.write(_SPAN.pack(offset, length))
+
+            # keys are put to the table and their values to the blob,
+            # which is appended after the table
+            key_count = 0
+            blob_offset = 0
+            for key, ordinal in key_pairs:
+                f.write(_KEY.pack(blob_offset, len(key), ordinal))
+                blob.write(key)
+                blob_offset += len(key)
+                key_count += 1
+
+            blob.seek(0)
+            shutil.copyfileobj(blob, f)
+
+            f.seek(0)
+            f.write(_HEADER.pack(
+                _MAGIC,
+                record_count,
+                key_count,
+                source_size,
+                last_crc,
+                len(key_names),
+            ))
+
+        os.rename(tmp_path, index_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def _read_key_names(index_path):
+    """
+    Read the names of the indexed keys from the header of the index.
+
+    Returns:
+        tuple: Names of the keys, or None if the index is not valid.
+    """
+    with open(index_path, "rb") as f:
+        header = f.read(_HEADER.size)
+
+        if len(header) < _HEADER.size:
+            return None
+
+        magic, _, _, _, _, names_length = _HEADER.unpack(header)
+        if magic != _MAGIC:
+            return None
+
+        names = f.read(names_length)
+
+    return tuple(names.split(",")) if names else ()
+
+
+def _record_crc(f, span):
+    """
+    Compute CRC32 of the record on `span` in file `f`.
+    """
+    offset, length = span
+    f.seek(offset)
+
+    return zlib.crc32(f.read(length)) & 0xffffffff
+
+
+def _index_records(path, index_path, keys, backend, workers, batch_size,
+                   chunk_size, base=None):
+    """
+    Scan the collection in `path` after the last record of the `base`
+    :class:`RecordIndex` and write the index with the records of the `base`
+    extended by the new records. Only the new records are kept in memory.
+    """
+    first_ordinal = 0
+    start = 0
+    last_span = None
+    if base is not None and base.record_count:
+        first_ordinal = base.record_count
+        last_span = base.get_span(-1)
+        start = sum(last_span)
+
+    spans = []
+    new_key_pairs = []
+    with open(path, "rb") as f:
+        f.seek(start)
+
+        records = _scan(f, keys, backend, workers, batch_size, chunk_size)
+        for ordinal, (offset, length, record_keys) in enumerate(records,
+                                                                first_ordinal):
+            spans.append((offset, length))
+            new_key_pairs.extend((key, ordinal) for key in record_keys)
+
+        if spans:
+            last_span = spans[-1]
+
+        last_crc = _record_crc(f, last_span) if last_span else 0
+        source_size = os.fstat(f.fileno()).st_size
+
+    # nothing to update
+    if base is not None and not spans and base.source_size == source_size:
+        return index_path
+
+    new_key_pairs.sort()
+    _write_index(
+        index_path,
+        spans,
+        new_key_pairs,
+        source_size,
+        last_crc,
+        keys,
+        base,
+    )
+
+    return index_path
+
+
+def build_index(path, index_path=None, keys=(), backend=None, workers=None,
+                batch_size=100, chunk_size=tools.CHUNK_SIZE):
+    """
+    Scan the MARC XML collection in `path` once and write the sidecar index,
+    which maps the ordinal number of each record to its byte offset and
+    length in the file, and optionally the `keys` to the ordinal numbers.
+
+    Args:
+        path (str): Path to the MARC XML collection.
+        index_path (str, default None): Where to put the index. `path` with
+                   :attr:`INDEX_SUFFIX` is used if not set.
+        keys (list, default ()): Names of the :attr:`KEY_EXTRACTORS`, which
+             should be indexed. Values are normalized by the
+             :attr:`KEY_NORMALIZERS`. Each record has to be parsed for this,
+             so the scan is much slower with the keys.
+        backend (str, default None): Parser backend used for the keys.
+        workers (int, default None): Parse the records for the keys in pool
+                of `workers` processes.
+        batch_size (int, default 100): Number of records sent to the worker
+                   process at once.
+        chunk_size (int, default tools.CHUNK_SIZE): How much data is read at
+                   once.
+
+    Returns:
+        str: Path of the index.
+    """
+    _check_keys(keys)
+
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+
+    return _index_records(
+        path,
+        index_path,
+        keys,
+        backend,
+        workers,
+        batch_size,
+        chunk_size
+    )
+
+
+def update_index(path, index_path=None, keys=None, backend=None,
+                 workers=None, batch_size=100, chunk_size=tools.CHUNK_SIZE):
+    """
+    Add the records appended to the collection in `path` to the index.
+
+    Only the part of the collection after the last indexed record is
+    scanned. The whole index is built again by :func:`build_index`, if it
+    doesn't exist, it was built with different `keys`, or the indexed part
+    of the collection has changed (the last indexed record is compared by
+    its CRC32). Spans and keys of the old index are streamed from the
+    mapped index to the new one, so only the new records are kept in
+    memory.
+
+    Args:
+        path (str): Path to the MARC XML collection.
+        index_path (str, default None): Path to the index. `path` with
+                   :attr:`INDEX_SUFFIX` is used if not set.
+        keys (list, default None): Names of the indexed keys. Same keys as
+             in the old index are used if not set.
+        backend, workers, batch_size, chunk_size: See :func:`build_index`.
+
+    Returns:
+        str: Path of the index.
+    """
+    if keys is not None:
+        _check_keys(keys)
+
+    if index_path is None:
+        index_path = path + INDEX_SUFFIX
+
+    # stale index is built again with the same keys
+    if keys is None:
+        keys = ()
+        if os.path.exists(index_path):
+            keys = _read_key_names(index_path) or ()
+
+    def rebuild():
+        return build_index(
+            path,
+            index_path,
+            keys,
+            backend,
+            workers,
+            batch_size,
+            chunk_size
+        )
+
+    if not os.path.exists(index_path):
+        return rebuild()
+
+    try:
+        index = RecordIndex(path, index_path)
+    except ValueError:  # invalid or stale index
+        return rebuild()
+
+    with index:
+        if set(keys) != set(index.keys):
+            return rebuild()
+
+        return _index_records(
+            path,
+            index_path,
+            index.keys,
+            backend,
+            workers,
+            batch_size,
+            chunk_size,
+            index,
+        )
+
+
+def _mmap_file(f):
+    """
+    Map the file `f` to the memory in read only mode. Blank files can't be
+    mapped, so blank string is returned for them.
+    """
+    if not os.fstat(f.fileno()).st_size:
+        return ""
+
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class _KeyView(object):
+    """
+    Sequence of the keys in the index, used for the binary search.
+    """
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return self.index.key_count
+
+    def __getitem__(self, item):
+        return self.index._read_key(item)[0]
+
+
+class RecordIndex(object):
+    """
+    Random access to the records in MARC XML collection using the index
+    created by :func:`build_index`.
+
+    Both the collection and the index are memory mapped, so the lookups
+    don't depend on the size of the files and only the requested records are
+    parsed.
+
+    Attributes:
+        record_count (int): Number of records in the collection.
+        key_count (int): Number of keys in the index.
+        source_size (int): Size of the collection when it was indexed.
+        keys (tuple): Names of the indexed keys.
+    """
+    def __init__(self, path, index_path=None, backend=None):
+        """
+        Constructor.
+
+        Args:
+            path (str): Path to the MARC XML collection.
+            index_path (str, default None): Path to the index. `path` with
+                       :attr:`INDEX_SUFFIX` is used if not set.
+            backend (str, default None): Parser backend used for records.
+
+        Raises:
+            ValueError: If the index is not valid, or it is stale (the \
+                        indexed part of the collection was changed). Use \
+                        :func:`update_index` to fix stale index.
+        """
+        if index_path is None:
+            index_path = path + INDEX_SUFFIX
+
+        self.path = path
+        self.index_path = index_path
+        self.backend = backend
+
+        self._data_file = open(path, "rb")
+        self._index_file = open(index_path, "rb")
+        self._data = _mmap_file(self._data_file)
+        self._index = _mmap_file(self._index_file)
+
+        try:
+            self._read_header()
+            self._check_source()
+        except ValueError:
+            self.close()
+            raise
+
+    def _read_header(self):
+        """
+        Read the header of the index.
+
+        Raises:
+            ValueError: If the index is not valid.
+        """
+        index_path = self.index_path
+        if len(self._index) < _HEADER.size:
+            raise ValueError("'%s' is not valid index!" % index_path)
+
+        header = _HEADER.unpack_from(self._index)
+        magic, records, keys, source_size, last_crc, names_length = header
+        if magic != _MAGIC:
+            raise ValueError("'%s' is not valid index!" % index_path)
+
+        self.record_count = records
+        self.key_count = keys
+        self.source_size = source_size
+        self.last_crc = last_crc
+
+        names = self._index[_HEADER.size:_HEADER.size + names_length]
+        self.keys = tuple(names.split(",")) if names else ()
+
+        self._spans_start = _HEADER.size + names_length
+        self._keys_start = self._spans_start + records * _SPAN.size
+        self._blob_start = self._keys_start + keys * _KEY.size
+
+    def _check_source(self):
+        """
+        Make sure, that the indexed part of the collection wasn't changed.
+        Collection may only grow by the appended records.
+
+        Raises:
+            ValueError: If the index is stale.
+        """
+        source_size = os.fstat(self._data_file.fileno()).st_size
+
+        if source_size < self.source_size or not self.is_valid():
+            raise ValueError(
+                "Index '%s' is stale, '%s' was changed!" % (
+                    self.index_path,
+                    self.path,
+                )
+            )
+
+    def __len__(self):
+        return self.record_count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Unmap and close the files.
+        """
+        for mapped in (self._data, self._index):
+            if hasattr(mapped, "close"):
+                mapped.close()
+
+        self._data_file.close()
+        self._index_file.close()
+
+    def get_span(self, ordinal):
+        """
+        Args:
+            ordinal (int): Position of the record in the collection. Negative
+                    numbers are counted from the end.
+
+        Returns:
+            tuple: ``(offset, length)`` of the record in the collection.
+
+        Raises:
+            IndexError: If there is no such record.
+        """
+        if ordinal < 0:
+            ordinal += self.record_count
+
+        if not 0 <= ordinal < self.record_count:
+            raise IndexError("Record index out of range!")
+
+        return _SPAN.unpack_from(
+            self._index,
+            self._spans_start + ordinal * _SPAN.size
+        )
+
+    def get_xml(self, ordinal):
+        """
+        Returns:
+            str: XML of the record on `ordinal` position.
+        """
+        offset, length = self.get_span(ordinal)
+
+        return self._data[offset:offset + length]
+
+    def __getitem__(self, ordinal):
+        """
+        Returns:
+            obj: :class:`.MARCXMLRecord` on `ordinal` position.
+        """
+        record = MARCXMLRecord(self.get_xml(ordinal), backend=self.backend)
+        record.source_span = self.get_span(ordinal)
+
+        return record
+
+    def _read_key(self, position):
+        blob_offset, length, ordinal = _KEY.unpack_from(
+            self._index,
+            self._keys_start + position * _KEY.size
+        )
+        start = self._blob_start + blob_offset
+
+        return self._index[start:start + length], ordinal
+
+    def iter_keys(self):
+        """
+        Yields:
+            tuple: Sorted ``(encoded key, ordinal)`` pairs.
+        """
+        for position in xrange(self.key_count):
+            yield self._read_key(position)
+
+    def is_valid(self):
+        """
+        Check, that the indexed part of the collection wasn't changed.
+
+        Returns:
+            bool: True if the last indexed record is still on its place.
+        """
+        if not self.record_count:
+            return True
+
+        offset, length = self.get_span(-1)
+        if offset + length > len(self._data):
+            return False
+
+        record_xml = self._data[offset:offset + length]
+
+        return zlib.crc32(record_xml) & 0xffffffff == self.last_crc
+
+    def find(self, kind, value):
+        """
+        Find ordinal numbers of the records with `value` under `kind` key.
+        The `value` is normalized same way as the indexed keys, see
+        :func:`normalize_key`.
+
+        Args:
+            kind (str): Name of the key (``"001"``, ``"isbn"``, ..).
+            value (str): Value of the key.
+
+        Returns:
+            list: Ordinal numbers of matching records.
+        """
+        key = _encode_key(kind, value)
+        position = bisect.bisect_left(_KeyView(self), key)
+
+        ordinals = []
+        while position < self.key_count:
+            found_key, ordinal = self._read_key(position)
+            if found_key != key:
+                break
+
+            ordinals.append(ordinal)
+            position += 1
+
+        return ordinals
+
+    def get_records(self, kind, value):
+        """
+        Same as :meth:`find`, but returns parsed records.
+
+        Returns:
+            list: :class:`.MARCXMLRecord` objects.
+        """
+        return [self[ordinal] for ordinal in self.find(kind, value)]
@@ -6,14 +6,34 @@
 # Imports =====================================================================
 from collections import OrderedDict
 
-import dhtmlparser
-from dhtmlparser import HTMLElement
-
 from . import tools
+from . import backends
+from .structures import DataField
+from .structures import FieldTable
 from .structures import MARCSubrecord
+from .structures.datafield import ordered_subfields
+
+
+# Variables ===================================================================
+STORAGES = ("dict", "table")  #: Possible values of the `storage` parameter.
 
 
 # Functions & classes =========================================================
+def _snapshot(fields):
+    """
+    Copy the `fields` of one tag, so it may be found out later, whether they
+    were changed. The values are copied one level deep, because the
+    subfields are immutable strings.
+    """
+    return [
+        {
+            key: list(value) if isinstance(value, list) else value
+            for key, value in dict.iteritems(field)
+        }
+        for field in fields
+    ]
+
+
 class MARCXMLParser(object):
     """
     This class parses everything between ``<root>`` elements. It checks, if
@@ -57,22 +77,83 @@ class MARCXMLParser(object):
       controlfields  (dict): Controlfields stored in dict.
       datafields     (dict of arrays of dict of arrays of strings): Datafileds
                      stored in nested dicts/arrays.
+      dirty_fields   (set): Names of the fields changed after parsing.
+      source_span    (tuple): ``(offset, length)`` of the record in the
+                     source, if known (set by :func:`.record_iterator` in
+                     `stream` mode and by :class:`.RecordIndex`), else None.
     """
-    def __init__(self, xml=None, resort=True):
+    def __init__(self, xml=None, resort=True, backend=None, lazy=False,
+                 tags=None, storage="dict", keep_original=True,
+                 track_changes=False, index_subfields=False, memoize=False):
         """
         Constructor.
 
         Args:
             xml (str/file, default None): XML to be parsed. May be file-like
-                object.
+                object, or :class:`.RawRecord` already parsed by the backend.
             resort (bool, default True): Sort the output alphabetically?
+            backend (str, default None): Name of the parser backend, see
+                :attr:`.backends.BACKENDS`. :mod:`dhtmlparser` is used by
+                default.
+            lazy (bool, default False): Parse just the leader and control
+                fields. :attr:`datafields` are parsed when they are used for
+                the first time.
+            tags (list, default None): Parse only these data fields. Each
+                item is tag, optionally followed by the codes of subfields,
+                which should be kept (``["020", "245abnp"]``). Other fields
+                are skipped by the backend. Leader and control fields are
+                always parsed.
+            storage (str, default "dict"): How to store the parsed
+                :attr:`datafields`. ``"dict"`` for nested dicts/lists,
+                ``"table"`` for compact read-only :class:`.FieldTable`, which
+                is converted to dicts by :meth:`add_data_field`.
+            keep_original (bool, default True): Keep reference to the `xml`.
+                Set to False for long-living records, because the `xml`
+                (which may be whole DOM subtree) takes usually more memory
+                than the parsed record. :attr:`source_span` may be used to
+                find the record in the source instead.
+            track_changes (bool, default False): Remember the serialized
+                fragments of the datafields and track which fields were
+                changed (see :attr:`dirty_fields`), so the serializer
+                renders only the changed fields again. Fragments of the
+                parsed fields are taken directly from the source XML, so
+                the untouched fields are written byte by byte as they were
+                in the source and not rendered at all. Use it with
+                ``resort=False`` to get stable diffs of Aleph records - then
+                also the order of the fields matches the source.
+            index_subfields (bool, default False): Build index of the
+                subfields by ``(tag, code, i1, i2)`` when they are queried
+                for the first time, so :meth:`get_subfields` is just
+                a dictionary lookup. Useful for records, which are queried
+                many times.
+            memoize (bool, default False): Cache the results of the
+                highlevel getters of :class:`.MARCXMLQuery`. The cache is
+                cleared by the ``add_*`` methods and :meth:`mark_dirty`,
+                which has to be called, when the :attr:`leader`,
+                :attr:`controlfields` or :attr:`datafields` are changed
+                directly.
         """
+        if storage not in STORAGES:
+            raise ValueError("Unknown storage '%s'!" % storage)
+
+        self.backend = backends.get_backend(backend)
+        self.storage = storage
+        self.track_changes = track_changes
+        self.index_subfields = index_subfields
+        self.memoize = memoize
+        self.dirty_fields = set()
+        self.lazy = lazy
+        self.tags = backends.tag_filter(tags)
+
         self.leader = None
         self.oai_marc = False
         self.controlfields = OrderedDict()
         self.datafields = OrderedDict()
         self.valid_i_chars = set(list(" 0123456789*"))
 
+        # (offset, length) of the record in the source, if known
+        self.source_span = None
+
         # resort output XML alphabetically
         self.resorted = tools.resorted if resort else lambda x: x
 
@@ -83,7 +164,9 @@ class MARCXMLParser(object):
         # it is always possible to create blank object and add values into it
         # piece by piece using .add_ctl_field()/.add_data_field() methods.
         if xml is not None:
-            self._original_xml = xml
+            if keep_original:
+                self._original_xml = xml
+
             self._parse_string(xml)
 
     def _parse_string(self, xml):
@@ -92,108 +175,275 @@ class MARCXMLParser(object):
         self.controlfields and self.datafields.
 
         Args:
-            xml (str or HTMLElement): input data
+            xml (str or HTMLElement or RawRecord): input data, RawRecord is
+                used as it is, without the backend.
 
         Also detect if this is oai marc format or not (see elf.oai_marc).
         """
-        if not isinstance(xml, HTMLElement):
-            xml = dhtmlparser.parseString(str(xml))
+        if isinstance(xml, backends.RawRecord):
+            raw_record = xml
+            if not callable(xml.datafields) and self.tags is not None:
+                # the sources don't match the filtered fields
+                fields = backends.filter_fields(xml.datafields, self.tags)
+                raw_record = xml._replace(datafields=fields, sources=None)
+        else:
+            raw_record = self.backend.parse_record(
+                xml,
+                lazy=self.lazy,
+                tags=self.tags,
+                sources=self.track_changes,
+            )
 
-        # check if there are any records
-        record = xml.find("record")
-        if not record:
-            raise ValueError("There is no <record> in your MARC XML document!")
-        record = record[0]
+        self.oai_marc = raw_record.oai_marc
+        self.leader = raw_record.leader
 
-        self.oai_marc = len(record.find("oai_marc")) > 0
+        self._parse_control_fields(raw_record.controlfields)
 
-        # leader is separate only in marc21
-        if not self.oai_marc:
-            leader = record.find("leader")
-            if len(leader) >= 1:
-                self.leader = leader[0].getContent()
+        datafields = raw_record.datafields
+        if self.lazy:
+            # the sources are used, when the datafields are parsed
+            if raw_record.sources is not None:
+                datafields = raw_record
+            elif self.track_changes and \
+                    not isinstance(xml, backends.RawRecord):
+                datafields = self._sources_loader(xml)
 
-        # parse body in respect of OAI MARC format possibility
-        if self.oai_marc:
-            self._parse_control_fields(record.find("fixfield"), "id")
-            self._parse_data_fields(record.find("varfield"), "id", "label")
+            self._datafields_loader = (datafields, self.oai_marc)
         else:
-            self._parse_control_fields(record.find("controlfield"), "tag")
-            self._parse_data_fields(record.find("datafield"), "tag", "code")
+            if callable(datafields):
+                datafields = datafields()
+
+            self._datafields = self._parse_data_fields(datafields)
+            self._fragments = self._source_fragments(
+                datafields,
+                raw_record.sources,
+                self._datafields,
+                self.oai_marc,
+            )
 
         # for backward compatibility of MARC XML with OAI
         if self.oai_marc and "LDR" in self.controlfields:
             self.leader = self.controlfields["LDR"]
 
-    def _parse_control_fields(self, fields, tag_id="tag"):
+    def _sources_loader(self, xml):
         """
-        Parse control fields.
+        Return function, which parses the data fields of `xml` together with
+        their sources, for the lazy records with `track_changes`.
 
-        Args:
-            fields (list): list of HTMLElements
-            tag_id (str):  parameter name, which holds the information, about
-                           field name this is normally "tag", but in case of
-                           oai_marc "id".
+        Returns:
+            function: Returning :class:`.RawRecord`.
         """
-        for field in fields:
-            params = field.params
+        backend = self.backend
+        tags = self.tags
 
-            # skip tags without parameters
-            if tag_id not in params:
-                continue
+        def load():
+            return backend.parse_record(xml, tags=tags, sources=True)
+
+        return load
+
+    def _parse_control_fields(self, fields):
+        """
+        Parse control fields.
 
-            self.controlfields[params[tag_id]] = field.getContent().strip()
+        Args:
+            fields (list): list of ``(tag, value)`` tuples from the backend.
+        """
+        for tag, value in fields:
+            self.controlfields[tag] = value
 
-    def _parse_data_fields(self, fields, tag_id="tag", sub_id="code"):
+    def _parse_data_fields(self, fields, is_oai=None):
         """
         Parse data fields.
 
         Args:
-            fields (list): of HTMLElements
-            tag_id (str): parameter name, which holds the information, about
-                          field name this is normally "tag", but in case of
-                          oai_marc "id"
-            sub_id (str): id of parameter, which holds informations about
-                          subfield name this is normally "code" but in case of
-                          oai_marc "label"
+            fields (list): list of ``(tag, i1, i2, subfields)`` tuples from
+                   the backend, where `subfields` is list of ``(code, value)``
+                   tuples.
+            is_oai (bool/None): Dialect of the fields. If None,
+                   :attr:`.oai_marc` is used.
 
+        Returns:
+            obj: OrderedDict or :class:`.FieldTable` with the fields, \
+                 depending on the :attr:`storage`.
         """
-        for field in fields:
-            params = field.params
+        i1_name = self.get_i_name(1, is_oai)
+        i2_name = self.get_i_name(2, is_oai)
 
-            if tag_id not in params:
-                continue
+        if self.storage == "table":
+            return FieldTable(fields, i1_name, i2_name)
 
+        datafields = OrderedDict()
+        for tag, i1, i2, subfields in fields:
             # take care of iX/indX (indicator) parameters
-            field_repr = OrderedDict([
-                [self.i1_name, params.get(self.i1_name, " ")],
-                [self.i2_name, params.get(self.i2_name, " ")],
+            field_repr = DataField([
+                [i1_name, i1],
+                [i2_name, i2],
             ])
 
+            # all subrecords from the field share one context
+            context = MARCSubrecord.context(i1, i2, field_repr)
+
             # process all subfields
-            for subfield in field.find("subfield"):
-                if sub_id not in subfield.params:
-                    continue
+            for code, value in subfields:
+                content = MARCSubrecord.from_context(value, context)
+                field_repr.add_subfield(code, content)
 
-                content = MARCSubrecord(
-                    val=subfield.getContent().strip(),
-                    i1=field_repr[self.i1_name],
-                    i2=field_repr[self.i2_name],
-                    other_subfields=field_repr
-                )
+            if tag in datafields:
+                datafields[tag].append(field_repr)
+            else:
+                datafields[tag] = [field_repr]
 
-                # add or append content to list of other contents
-                code = subfield.params[sub_id]
-                if code in field_repr:
-                    field_repr[code].append(content)
-                else:
-                    field_repr[code] = [content]
+        return datafields
+
+    def _source_fragments(self, fields, sources, datafields, is_oai):
+        """
+        Build the cache of serialized fragments (see `track_changes`) from
+        the `sources` of the data `fields` collected by the backend.
+
+        Fragment is built only for the tags, which have the source of all
+        their fields.
+
+        Args:
+            fields (list): ``(tag, i1, i2, subfields)`` tuples from the
+                   backend.
+            sources (list): Source XML of each of the `fields` or None.
+            datafields (obj): `fields` parsed by :meth:`_parse_data_fields`.
+            is_oai (bool): Dialect of the `sources`.
 
-            tag = params[tag_id]
-            if tag in self.datafields:
-                self.datafields[tag].append(field_repr)
+        Returns:
+            dict: ``{(tag, is_oai): (fragment, snapshot of the fields)}``.
+        """
+        if not self.track_changes or sources is None:
+            return {}
+
+        tag_sources = {}
+        for field, source in zip(fields, sources):
+            tag = field[0]
+            if tag in tag_sources:
+                tag_sources[tag].append(source)
             else:
-                self.datafields[tag] = [field_repr]
+                tag_sources[tag] = [source]
+
+        # the table builds new fields on each access
+        snapshot = _snapshot
+        if isinstance(datafields, FieldTable):
+            snapshot = list
+
+        fragments = {}
+        for tag, field_sources in tag_sources.iteritems():
+            if None in field_sources:
+                continue
+
+            fragments[(tag, is_oai)] = (
+                "\n".join(field_sources) + "\n",
+                snapshot(datafields[tag]),
+            )
+
+        return fragments
+
+    def _cached_fragment(self, field_id, oai_marc):
+        """
+        Return serialized fragment of the `field_id` datafields in the
+        `oai_marc` dialect, which was cached by :meth:`_cache_fragment`.
+
+        The fields are compared with their copy made together with the
+        fragment, so the fragment is never used for the fields changed
+        directly, without :meth:`mark_dirty`.
+
+        Returns:
+            str: Fragment or None, if it is not cached, or the fields were \
+                 changed.
+        """
+        cached = self._fragments.get((field_id, oai_marc))
+        if cached is None:
+            return None
+
+        fragment, snapshot = cached
+        fields = self.datafields.get(field_id)
+        if fields is None or len(fields) != len(snapshot):
+            return None
+
+        # plain dict comparison, the OrderedDict's one is much slower
+        for field, old_field in zip(fields, snapshot):
+            if dict.__eq__(old_field, field) is not True:
+                return None
+
+        return fragment
+
+    def _cache_fragment(self, field_id, oai_marc, fragment):
+        """
+        Cache serialized `fragment` of the `field_id` datafields in the
+        `oai_marc` dialect, see :meth:`_cached_fragment`.
+        """
+        self._fragments[(field_id, oai_marc)] = (
+            fragment,
+            _snapshot(self.datafields[field_id]),
+        )
+
+    @property
+    def datafields(self):
+        """
+        Datafields stored in nested dicts/arrays. In `lazy` mode, they are
+        parsed when this property is used for the first time.
+
+        The fields are parsed to new structure, which replaces the old one
+        only when it is complete, so threads sharing the lazy record never
+        see it half-parsed.
+        """
+        loader = self._datafields_loader
+        if loader is not None:
+            fields, is_oai = loader
+            if callable(fields):
+                fields = fields()
+
+            sources = None
+            if isinstance(fields, backends.RawRecord):  # with the sources
+                fields, sources = fields.datafields, fields.sources
+
+            datafields = self._parse_data_fields(fields, is_oai)
+            fragments = self._source_fragments(
+                fields,
+                sources,
+                datafields,
+                is_oai,
+            )
+
+            # other thread may have already done the same
+            if self._datafields_loader is loader:
+                self._datafields = datafields
+                self._fragments.update(fragments)
+                self._datafields_loader = None
+
+        return self._datafields
+
+    @datafields.setter
+    def datafields(self, datafields):
+        self._datafields_loader = None
+        self._datafields = datafields
+        self._fragments = {}
+        self._subfield_index = None
+
+    def mark_dirty(self, *names):
+        """
+        Mark fields as changed. Call this, when you change the
+        :attr:`controlfields` or :attr:`datafields` directly, not by the
+        ``add_*`` methods.
+
+        Args:
+            names (str): Names of the changed fields. All fields are marked,
+                  if not set.
+        """
+        self._subfield_index = None
+
+        if not names:
+            names = list(self.controlfields) + list(self.datafields)
+            self._fragments = {}
+
+        for name in names:
+            self.dirty_fields.add(name)
+
+            for oai_marc in (False, True):
+                self._fragments.pop((name, oai_marc), None)
 
     def add_ctl_field(self, name, value):
         """
@@ -204,6 +454,7 @@ class MARCXMLParser(object):
             raise ValueError("name parameter have to be exactly 3 chars long!")
 
         self.controlfields[name] = value
+        self.mark_dirty(name)
 
     def add_data_field(self, name, i1, i2, subfields_dict):
         """
@@ -251,8 +502,14 @@ class MARCXMLParser(object):
                 "`subfields_dict` parameter has to be dict instance!"
             )
 
+        # the table is read-only
+        if isinstance(self.datafields, FieldTable):
+            fragments = self._fragments
+            self.datafields = self.datafields.thaw()
+            self._fragments = fragments  # the content is same
+
         # check local keys, convert strings to MARCSubrecord instances
-        subrecords = []
+        context = MARCSubrecord.context(i1, i2, None)
         for key, val in subfields_dict.items():
             if len(key) > 1:
                 raise KeyError(
@@ -263,13 +520,10 @@ class MARCXMLParser(object):
             if not isinstance(val, list):
                 val = [val]
 
-            subfields = map(
-                lambda x: MARCSubrecord(x, i1, i2, None),
-                val
-            )
-
-            subfields_dict[key] = subfields
-            subrecords.extend(subfields)
+            subfields_dict[key] = [
+                MARCSubrecord.from_context(x, context)
+                for x in val
+            ]
 
         # save i/ind values
         subfields_dict[self.i1_name] = i1
@@ -283,9 +537,107 @@ class MARCXMLParser(object):
 
         # to each subrecord add reference to list of all subfields in this
         # datafield
-        other_subfields = self.datafields[name]
-        for record in subrecords:
-            record.other_subfields = other_subfields
+        context["other_subfields"] = self.datafields[name]
+
+        self.mark_dirty(name)
+
+    def to_raw_record(self):
+        """
+        Convert the parsed record back to the neutral form produced by the
+        backends. Values are plain strings without the context.
+
+        Returns:
+            obj: :class:`.RawRecord` instance, which may be used as `xml` \
+                 parameter of the constructor.
+        """
+        def plain(value):
+            if isinstance(value, MARCSubrecord):
+                return value.val
+
+            return value
+
+        if isinstance(self.datafields, FieldTable):
+            datafields = [
+                (tag, i1, i2, subfields)
+                for tag, i1, i2, subfields in self.datafields.iter_fields()
+            ]
+        else:
+            # fields may use indicator names of the other dialect, if the
+            # .oai_marc was switched
+            other_i1_name = self.get_i_name(1, not self.oai_marc)
+            other_i2_name = self.get_i_name(2, not self.oai_marc)
+            indicators = {
+                self.i1_name, self.i2_name, other_i1_name, other_i2_name
+            }
+
+            datafields = [
+                (
+                    tag,
+                    field.get(self.i1_name, field.get(other_i1_name, " ")),
+                    field.get(self.i2_name, field.get(other_i2_name, " ")),
+                    [
+                        (code, plain(value))
+                        for code, value in ordered_subfields(field)
+                        if code not in indicators
+                    ],
+                )
+                for tag, fields in self.datafields.iteritems()
+                for field in fields
+            ]
+
+        return backends.RawRecord(
+            oai_marc=self.oai_marc,
+            leader=None if self.oai_marc else self.leader,
+            controlfields=[
+                (tag, plain(value))
+                for tag, value in self.controlfields.iteritems()
+            ],
+            datafields=datafields,
+        )
+
+    def __getstate__(self):
+        """
+        Compact state used by :mod:`pickle`.
+
+        The record is stored as :class:`.RawRecord` with plain strings, so
+        neither :class:`.MARCSubrecord` objects with their back-references,
+        nor the original XML are pickled. Everything is rebuilt by
+        :meth:`__setstate__`.
+        """
+        backend = next(
+            name
+            for name, module in backends.BACKENDS.items()
+            if module is self.backend
+        )
+
+        return {
+            "raw_record": tuple(self.to_raw_record()),
+            "leader": self.leader,
+            "resort": self.resorted is tools.resorted,
+            "backend": backend,
+            "lazy": self.lazy,
+            "tags": self.tags,
+            "storage": self.storage,
+            "track_changes": self.track_changes,
+            "index_subfields": self.index_subfields,
+            "memoize": self.memoize,
+            "source_span": self.source_span,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(
+            resort=state["resort"],
+            backend=state["backend"],
+            lazy=state["lazy"],
+            tags=state["tags"],
+            storage=state["storage"],
+            track_changes=state["track_changes"],
+            index_subfields=state.get("index_subfields", False),
+            memoize=state.get("memoize", False),
+        )
+        self._parse_string(backends.RawRecord(*state["raw_record"]))
+        self.leader = state["leader"]
+        self.source_span = state["source_span"]
 
     def get_i_name(self, num, is_oai=None):
         """
@@ -353,6 +705,43 @@ class MARCXMLParser(object):
             exception=throw_exceptions
         )
 
+    def _build_subfield_index(self):
+        """
+        Build the index of subfields used when :attr:`index_subfields` is
+        set.
+
+        Returns:
+            dict: ``{(tag, code, i1, i2): [MARCSubrecord, ..]}``. Each list \
+                  is stored also under the keys with None instead of `i1`, \
+                  `i2` or both, so the lookups without the indicators are \
+                  also just one dictionary hit.
+        """
+        index = {}
+        for tag, fields in self.datafields.iteritems():
+            for field in fields:
+                for code, values in field.iteritems():
+                    # skip the indicators
+                    if not isinstance(values, list) or not values:
+                        continue
+
+                    # all values from one field share the indicators
+                    i1 = values[0].i1
+                    i2 = values[0].i2
+
+                    keys = (
+                        (tag, code, i1, i2),
+                        (tag, code, i1, None),
+                        (tag, code, None, i2),
+                        (tag, code, None, None),
+                    )
+                    for key in keys:
+                        if key in index:
+                            index[key].extend(values)
+                        else:
+                            index[key] = list(values)
+
+        return index
+
     def get_subfields(self, datafield, subfield, i1=None, i2=None,
                       exception=False):
         """
@@ -400,6 +789,19 @@ class MARCXMLParser(object):
 
             return []
 
+        if self.index_subfields:
+            index = self._subfield_index
+            if index is None:
+                index = self._subfield_index = self._build_subfield_index()
+
+            key = (datafield, subfield, i1 or None, i2 or None)
+            output = list(index.get(key, ()))
+
+            if not output and exception:
+                raise KeyError(subfield + " couldn't be found in subfields!")
+
+            return output
+
         # look for subfield defined by `subfield`, `i1` and `i2` parameters
         output = []
         for datafield in self.datafields[datafield]:
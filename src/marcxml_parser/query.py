@@ -4,10 +4,13 @@
 # Interpreter version: python 2.7
 #
 # Imports =====================================================================
+from functools import wraps
+
 import remove_hairs
 from remove_hairs import remove_hairs as remove_hairs_fn
 from remove_hairs import remove_hairs_decorator
 
+from .selector import Selector
 from .serializer import MARCXMLSerializer
 
 from structures import Person
@@ -18,6 +21,17 @@ from structures import PublicationType
 # Variables ===================================================================
 remove_hairs.HAIRS = r" :;<>(){}[]\/"
 
+# selectors used by the getters
+_PUBLISHERS = (Selector("260b  "), Selector("264b"))
+_PUB_DATES = (Selector("260c  "), Selector("264c"))
+_PUB_PLACES = (Selector("260a  "), Selector("264a"))
+_ISBNS = Selector("020a")
+_INVALID_ISBNS = Selector("020z")
+_CNB_ISBNS = Selector("901i")  # used sometimes in czech national library
+_ISSNS = Selector("022a")
+_INVALID_ISSNS = (Selector("022z"), Selector("022y"))
+_LINKING_ISSNS = Selector("022l")
+
 
 # Functions & classes =========================================================
 def _undefined_pattern(value, fn, undefined):
@@ -30,12 +44,103 @@ def _undefined_pattern(value, fn, undefined):
     return value
 
 
+def _select(record, selectors):
+    """
+    Apply all `selectors` to the `record`.
+
+    Returns:
+        list: Concatenated results of the `selectors`.
+    """
+    output = []
+    for selector in selectors:
+        output.extend(selector(record))
+
+    return output
+
+
+def _cache_key(fn, args, kwargs):
+    """
+    Key of the result of `fn` in the cache. Lists in the arguments are
+    converted to tuples.
+
+    Returns:
+        tuple: Hashable key.
+    """
+    freeze = lambda x: tuple(x) if isinstance(x, list) else x
+
+    return (
+        fn,
+        tuple(freeze(arg) for arg in args),
+        tuple(sorted((key, freeze(val)) for key, val in kwargs.items())),
+    )
+
+
+def _memoized(fn):
+    """
+    Remember the result of getter `fn` in the record's cache, if the record
+    was created with `memoize`. The cache is cleared when the record is
+    changed (see :meth:`MARCXMLQuery.mark_dirty`).
+
+    Lists are returned as copies, so the caller may change them without
+    affecting the cache.
+    """
+    @wraps(fn)
+    def memoized_getter(self, *args, **kwargs):
+        if not self.memoize:
+            return fn(self, *args, **kwargs)
+
+        key = _cache_key(fn, args, kwargs)
+
+        # the record may be changed (and the cache replaced) during the call,
+        # so the result is stored only to the cache it was computed for
+        cache = self._cache
+        try:
+            value = cache[key]
+        except KeyError:
+            value = cache[key] = fn(self, *args, **kwargs)
+        except TypeError:  # unhashable arguments
+            value = fn(self, *args, **kwargs)
+
+        if isinstance(value, list):
+            return list(value)
+
+        return value
+
+    return memoized_getter
+
+
 class MARCXMLQuery(MARCXMLSerializer):
     """
     This class defines highlevel getters over MARC XML / OAI records.
+
+    With `memoize`, results of the getters are cached in the record. The
+    cache is cleared by :meth:`.add_ctl_field`, :meth:`.add_data_field`,
+    :meth:`mark_dirty` and by setting the :attr:`.datafields`. Call
+    :meth:`mark_dirty`, when you change the :attr:`.leader`,
+    :attr:`.controlfields` or :attr:`.datafields` directly.
     """
-    def __init__(self, xml=None, resort=True):
-        super(MARCXMLQuery, self).__init__(xml, resort)
+    def __init__(self, xml=None, resort=True, **kwargs):
+        self._cache = {}
+
+        super(MARCXMLQuery, self).__init__(xml, resort, **kwargs)
+
+    @MARCXMLSerializer.datafields.setter
+    def datafields(self, datafields):
+        MARCXMLSerializer.datafields.fset(self, datafields)
+        self._cache = {}
+
+    def mark_dirty(self, *names):
+        """
+        Mark fields as changed and clear the cache of the getters. Call this,
+        when you change the :attr:`.leader`, :attr:`.controlfields` or
+        :attr:`.datafields` directly, not by the ``add_*`` methods.
+
+        Args:
+            names (str): Names of the changed fields. All fields are marked,
+                  if not set.
+        """
+        super(MARCXMLQuery, self).mark_dirty(*names)
+        self._cache = {}
 
     def _parse_corporations(self, datafield, subfield, roles=["any"]):
         """
@@ -170,6 +275,7 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         return parsed_persons
 
+    @_memoized
     @remove_hairs_decorator
     def get_name(self):
         """
@@ -181,6 +287,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         return "".join(self.get_subfields("245", "a"))
 
+    @_memoized
     @remove_hairs_decorator
     def get_subname(self, undefined=""):
         """
@@ -198,6 +305,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_price(self, undefined=""):
         """
@@ -215,6 +323,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_part(self, undefined=""):
         """
@@ -232,6 +341,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_part_name(self, undefined=""):
         """
@@ -249,6 +359,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_publisher(self, undefined=""):
         """
@@ -262,7 +373,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         publishers = set([
             remove_hairs_fn(publisher)
-            for publisher in self["260b  "] + self["264b"]
+            for publisher in _select(self, _PUBLISHERS)
         ])
 
         return _undefined_pattern(
@@ -271,6 +382,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     def get_pub_date(self, undefined=""):
         """
         Args:
@@ -281,8 +393,6 @@ class MARCXMLQuery(MARCXMLSerializer):
             str: Date of publication (month and year usually) or `undefined` \
                  if `pub_date` is not found.
         """
-        dates = self["260c  "] + self["264c"]
-
         def clean_date(date):
             """
             Clean the `date` strings from special characters, but leave
@@ -305,7 +415,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         # clean all the date strings
         dates = set([
             clean_date(date)
-            for date in self["260c  "] + self["264c"]
+            for date in _select(self, _PUB_DATES)
         ])
 
         return _undefined_pattern(
@@ -314,6 +424,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_pub_order(self, undefined=""):
         """
@@ -331,6 +442,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_pub_place(self, undefined=""):
         """
@@ -344,7 +456,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         places = set([
             remove_hairs_fn(place)
-            for place in self["260a  "] + self["264a"]
+            for place in _select(self, _PUB_PLACES)
         ])
 
         return _undefined_pattern(
@@ -353,6 +465,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     @remove_hairs_decorator
     def get_format(self, undefined=""):
         """
@@ -370,6 +483,7 @@ class MARCXMLQuery(MARCXMLSerializer):
             undefined
         )
 
+    @_memoized
     def get_authors(self):
         """
         Returns:
@@ -382,6 +496,7 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         return authors
 
+    @_memoized
     def get_corporations(self, roles=["dst"]):
         """
         Args:
@@ -402,6 +517,7 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         return corporations
 
+    @_memoized
     def get_distributors(self):
         """
         Returns:
@@ -415,6 +531,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         return isbn.strip().split(" ", 1)[0]
 
+    @_memoized
     def get_invalid_ISBNs(self):
         """
         Get list of invalid ISBN (``020z``).
@@ -424,9 +541,10 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         return [
             self._clean_isbn(isbn)
-            for isbn in self["020z"]
+            for isbn in _INVALID_ISBNS(self)
         ]
 
+    @_memoized
     def get_ISBNs(self):
         """
         Get list of VALID ISBN.
@@ -437,20 +555,20 @@ class MARCXMLQuery(MARCXMLSerializer):
         invalid_isbns = set(self.get_invalid_ISBNs())
 
         valid_isbns = [
-            self._clean_isbn(isbn)
-            for isbn in self["020a"]
-            if self._clean_isbn(isbn) not in invalid_isbns
+            isbn
+            for isbn in map(self._clean_isbn, _ISBNS(self))
+            if isbn not in invalid_isbns
         ]
 
         if valid_isbns:
             return valid_isbns
 
-        # this is used sometimes in czech national library
         return [
             self._clean_isbn(isbn)
-            for isbn in self["901i"]
+            for isbn in _CNB_ISBNS(self)
         ]
 
+    @_memoized
     def get_invalid_ISSNs(self):
         """
         Get list of invalid ISSNs (``022z`` + ``022y``).
@@ -460,9 +578,10 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         return [
             self._clean_isbn(issn)
-            for issn in self["022z"] + self["022y"]
+            for issn in _select(self, _INVALID_ISSNS)
         ]
 
+    @_memoized
     def get_ISSNs(self):
         """
         Get list of VALID ISSNs (``022a``).
@@ -473,11 +592,12 @@ class MARCXMLQuery(MARCXMLSerializer):
         invalid_issns = set(self.get_invalid_ISSNs())
 
         return [
-            self._clean_isbn(issn)
-            for issn in self["022a"]
-            if self._clean_isbn(issn) not in invalid_issns
+            issn
+            for issn in map(self._clean_isbn, _ISSNS(self))
+            if issn not in invalid_issns
         ]
 
+    @_memoized
     def get_linking_ISSNs(self):
         """
         Get list of linking ISSNs (``022l``).
@@ -487,7 +607,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         return [
             self._clean_isbn(issn)
-            for issn in self["022l"]
+            for issn in _LINKING_ISSNS(self)
         ]
 
     def _filter_binding(self, binding):
@@ -504,6 +624,7 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         return binding.split(":")[-1].strip()
 
+    @_memoized
     def get_binding(self):
         """
         Returns:
@@ -512,10 +633,11 @@ class MARCXMLQuery(MARCXMLSerializer):
         # binding is stored after space in ISBN
         return [
             self._filter_binding(binding)
-            for binding in self["020a"]
+            for binding in _ISBNS(self)
             if "-" in binding and " " in binding
         ]
 
+    @_memoized
     def get_originals(self):
         """
         Returns:
@@ -524,6 +646,7 @@ class MARCXMLQuery(MARCXMLSerializer):
         """
         return self.get_subfields("765", "t")
 
+    @_memoized
     def get_urls(self):
         """
         Content of field ``856u42``. Typically URL pointing to producers
@@ -536,6 +659,7 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         return map(lambda x: x.replace("&amp;", "&"), urls)
 
+    @_memoized
     def get_internal_urls(self):
         """
         URL's, which may point to edeposit, aleph, kramerius and so on.
@@ -551,6 +675,7 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         return map(lambda x: x.replace("&amp;", "&"), internal_urls)
 
+    @_memoized
     def get_pub_type(self):
         """
         Returns:
@@ -618,52 +743,24 @@ class MARCXMLQuery(MARCXMLSerializer):
 
         First three characters are considered as `datafield`, next character
         as `subfield` and optionaly, two others as `i1` / `i2` parameters.
+        Multiple subfields may be selected at once (``"245abnp"``), see
+        :class:`.Selector` for details.
 
         Returned value is str/None in case of ``len(item)`` == 3 (ctl_fields)
         or list (or blank list) in case of ``len(item) >= 4``.
 
+        Args:
+            item (str/Selector): Selector string, or compiled
+                 :class:`.Selector`.
+
         Returns:
             list/str: See :meth:`.MARCXMLParser.get_subfields` for details, or\
                 None in case that nothing was found.
         """
-        if not isinstance(item, basestring):
-            raise ValueError("Only str/unicode indexes are supported!")
-
-        if len(item) == 3:
-            val = self.controlfields.get(item, None)
-
-            if val:
-                return val
-
-            return self.datafields.get(item, None)
-
-        if len(item) < 3:
-            raise ValueError(
-                "Required at least 3 chars for field id."
-            )
-
-        if len(item) > 6:
-            raise ValueError(
-                "Too many indexing characters. use 4-6."
-            )
+        if isinstance(item, Selector):
+            return item(self)
 
-        datafield = item[:3]
-        subfield = item[3]
-
-        i1 = None
-        i2 = None
-        if len(item) >= 5:
-            i1 = item[4]
-        if len(item) >= 6:
-            i2 = item[5]
-
-        return self.get_subfields(
-            datafield=datafield,
-            subfield=subfield,
-            i1=i1,
-            i2=i2,
-            exception=False
-        )
+        return Selector.compile(item)(self)
 
     def get(self, item, alt=None):
         """
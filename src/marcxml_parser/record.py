@@ -4,8 +4,8 @@
 # Interpreter version: python 2.7
 #
 # Imports =====================================================================
-import dhtmlparser
-
+from . import tools
+from . import backends
 from .query import MARCXMLQuery
 
 
@@ -14,31 +14,132 @@ class MARCXMLRecord(MARCXMLQuery):
     """
     Syndication of :class:`.MARCXMLParser`, :class:`.MARCXMLSerializer` and
     :class:`.MARCXMLQuery` into one class for backward compatibility.
+
+    All keyword arguments are passed to the :class:`.MARCXMLParser`.
+    """
+    def __init__(self, xml=None, resort=True, **kwargs):
+        super(MARCXMLRecord, self).__init__(xml, resort, **kwargs)
+
+
+def _parse_batch(args):
+    """
+    Parse batch of records in the worker process.
+
+    Args:
+        args (tuple): ``(backend, tags, sources, list of (span, record
+             string))``.
+
+    Returns:
+        list: ``(source span, RawRecord)`` tuples.
+    """
+    backend, tags, sources, batch = args
+    parse_record = backends.get_backend(backend).parse_record
+
+    return [
+        (span, parse_record(record_xml, tags=tags, sources=sources))
+        for span, record_xml in batch
+    ]
+
+
+def _parallel_raw_records(records, backend, tags, workers, ordered,
+                          batch_size, max_pending, sources=False):
+    """
+    Parse `records` (``(span, record string)`` tuples) in the pool of
+    `workers` processes. With `sources`, the source XML of the data fields
+    is collected as well (for the records with `track_changes`).
+
+    Yields:
+        tuple: ``(source span, RawRecord)`` for each item in `records`.
     """
-    def __init__(self, xml=None, resort=True):
-        super(MARCXMLRecord, self).__init__(xml, resort)
+    tasks = (
+        (backend, tags, sources, batch)
+        for batch in tools.batches(records, batch_size)
+    )
+
+    raw_batches = tools.parallel_map(
+        _parse_batch,
+        tasks,
+        workers=workers,
+        ordered=ordered,
+        max_pending=max_pending,
+    )
 
+    for raw_batch in raw_batches:
+        for span_and_record in raw_batch:
+            yield span_and_record
 
-def record_iterator(xml):
+
+def record_iterator(xml, stream=False, chunk_size=tools.CHUNK_SIZE,
+                    backend=None, workers=None, ordered=True, batch_size=100,
+                    max_pending=None, **kwargs):
     """
     Iterate over all ``<record>`` tags in `xml`.
 
     Args:
         xml (str/file): Input string with XML. UTF-8 is prefered encoding,
                         unicode should be ok.
+        stream (bool, default False): Read the `xml` incrementally and yield
+               each record as soon as it is complete, instead of parsing the
+               whole document at once. Memory usage is then bounded by the
+               size of the largest record, not by the size of the `xml`.
+               :attr:`.MARCXMLParser.source_span` of the records is set in
+               this mode.
+        chunk_size (int, default tools.CHUNK_SIZE): How much data is read at
+                   once in `stream` mode.
+        backend (str, default None): Name of the parser backend, see
+                :attr:`.backends.BACKENDS`.
+        workers (int, default None): Parse the records in pool of `workers`
+                processes. The `xml` is always read in `stream` mode and
+                split to batches of `batch_size` records.
+        ordered (bool, default True): Yield the records in the original
+                order. Set to False to get them as soon as they are parsed.
+                Used only with `workers`.
+        batch_size (int, default 100): Number of records sent to the worker
+                   process at once.
+        max_pending (int, default None): Maximal number of batches being
+                    processed at the same time. ``2 * workers`` if not set.
+        kwargs: Other arguments passed to the :class:`MARCXMLRecord`, for
+                example ``lazy=True`` or ``tags=["020", "245a"]``.
 
     Yields:
         MARCXMLRecord: For each corresponding ``<record>``.
     """
-    # handle file-like objects
-    if hasattr(xml, "read"):
-        xml = xml.read()
+    # parse the tag filter just once
+    kwargs["tags"] = backends.tag_filter(kwargs.get("tags"))
+
+    if stream or workers:
+        records = (
+            ((offset, len(record_xml)), record_xml)
+            for offset, record_xml in tools.record_spans(xml, chunk_size)
+        )
+    else:
+        # handle file-like objects
+        if hasattr(xml, "read"):
+            xml = xml.read()
+
+        # position of the records is not known for the DOM
+        records = (
+            (None, record_xml)
+            for record_xml in backends.get_backend(backend).iter_records(xml)
+        )
+
+    if workers:
+        records = _parallel_raw_records(
+            records,
+            backend=backend,
+            tags=kwargs["tags"],
+            workers=workers,
+            ordered=ordered,
+            batch_size=batch_size,
+            max_pending=max_pending,
+            sources=kwargs.get("track_changes", False),
+        )
+
+    for span, record_xml in records:
+        if isinstance(record_xml, unicode):
+            record_xml = record_xml.encode("utf-8")
 
-    dom = None
-    try:
-        dom = dhtmlparser.parseString(xml)
-    except UnicodeError:
-        dom = dhtmlparser.parseString(xml.encode("utf-8"))
+        record = MARCXMLRecord(record_xml, backend=backend, **kwargs)
+        record.source_span = span
 
-    for record_xml in dom.findB("record"):
-        yield MARCXMLRecord(record_xml)
+        yield record
@@ -0,0 +1,198 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Precompiled query selectors used by :meth:`.MARCXMLQuery.__getitem__`.
+
+Selector is parsed only once and then applied to any number of records::
+
+    ISBNS = Selector("020a")
+
+    for record in records:
+        print ISBNS(record)
+"""
+# Imports =====================================================================
+from .structures.datafield import ordered_subfields
+
+
+# Variables ===================================================================
+I_CHARS = set(" 0123456789*")  #: Characters allowed in the indicators.
+MAX_CACHED = 1024  #: Maximal number of selectors cached by :meth:`compile`.
+
+_CACHE = {}
+
+
+# Functions & classes =========================================================
+class Selector(object):
+    """
+    Compiled selector of the values from the record.
+
+    Selector is string with the three characters of the tag, followed by
+    the codes of the subfields:
+
+    - ``"001"`` selects the controlfield, or list of datafields, if there is
+      no such controlfield.
+    - ``"260c"`` selects the ``c`` subfields of the ``260`` datafields.
+    - ``"260c  "`` selects the same, but only from the fields with ``i1``
+      and ``i2`` set to space. One or two indicators may be specified after
+      the code, if they are from :attr:`I_CHARS`. Only selectors with one
+      code may have the indicators.
+    - ``"245abnp"`` selects the ``a``, ``b``, ``n`` and ``p`` subfields in
+      one pass, in the order of the fields and subfields in the record
+      (``a, n, p, n, p`` stays interleaved, see
+      :func:`.ordered_subfields`).
+
+    Note:
+        For backward compatibility, one or two characters from
+        :attr:`I_CHARS` after single code are always the indicators, so
+        ``"100a4"`` selects the ``a`` subfields with ``i1`` set to ``4``,
+        not the ``a`` and ``4`` subfields. Put the digit codes first
+        (``"1004a"``) to select more subfields.
+
+    Attributes:
+        spec (str): The selector string.
+        tag (str): Tag of the field.
+        codes (str): Codes of the subfields, blank for 3 char selectors.
+        i1 (str): Required i1/ind1 value, or None.
+        i2 (str): Required i2/ind2 value, or None.
+    """
+    def __init__(self, spec):
+        """
+        Constructor.
+
+        Args:
+            spec (str): Selector string.
+
+        Raises:
+            ValueError: If the `spec` is invalid.
+        """
+        if not isinstance(spec, basestring):
+            raise ValueError("Only str/unicode indexes are supported!")
+
+        if len(spec) < 3:
+            raise ValueError(
+                "Required at least 3 chars for field id."
+            )
+
+        self.spec = spec
+        self.tag = spec[:3]
+        self.codes = spec[3:]
+        self.i1 = None
+        self.i2 = None
+
+        # 4-6 chars long selectors with the indicators
+        rest = spec[3:]
+        if len(rest) <= 3 and all(c in I_CHARS for c in rest[1:]):
+            self.codes = rest[:1]
+
+            if len(rest) >= 2:
+                self.i1 = rest[1]
+            if len(rest) >= 3:
+                self.i2 = rest[2]
+
+        self._code_set = frozenset(self.codes)
+
+    @classmethod
+    def compile(cls, spec):
+        """
+        Return the :class:`Selector` for `spec`. Selectors are cached, so
+        each string is parsed only once.
+
+        Args:
+            spec (str): Selector string.
+
+        Returns:
+            obj: :class:`Selector` instance.
+
+        Raises:
+            ValueError: If the `spec` is invalid.
+        """
+        try:
+            return _CACHE[spec]
+        except (KeyError, TypeError):
+            pass
+
+        selector = cls(spec)
+
+        if len(_CACHE) >= MAX_CACHED:
+            _CACHE.clear()
+        _CACHE[spec] = selector
+
+        return selector
+
+    def select(self, record):
+        """
+        Apply the selector to the `record`.
+
+        Args:
+            record (obj): :class:`.MARCXMLParser` instance.
+
+        Returns:
+            list/str: List of :class:`.MARCSubrecord` (blank list if nothing \
+                      was found). For 3 chars long selectors, value of the \
+                      controlfield, list of datafields, or None.
+        """
+        if not self.codes:
+            val = record.controlfields.get(self.tag, None)
+
+            if val:
+                return val
+
+            return record.datafields.get(self.tag, None)
+
+        # single code lookup is just a hit to the record's index of subfields
+        if len(self.codes) == 1 and getattr(record, "index_subfields", False):
+            return record.get_subfields(self.tag, self.codes, self.i1, self.i2)
+
+        fields = record.datafields.get(self.tag)
+        if not fields:
+            return []
+
+        output = []
+        if len(self.codes) == 1:
+            code = self.codes
+            check_indicators = self.i1 or self.i2
+
+            for field in fields:
+                values = field.get(code)
+                if not values:
+                    continue
+
+                if check_indicators and not self._indicators_match(values):
+                    continue
+
+                output.extend(values)
+
+            return output
+
+        # selectors with more codes can't have the indicators
+        codes = self._code_set
+        for field in fields:
+            output.extend(
+                value
+                for code, value in ordered_subfields(field)
+                if code in codes
+            )
+
+        return output
+
+    def _indicators_match(self, values):
+        """
+        Do the indicators of the `values` match the selector?
+        """
+        first = values[0]
+
+        if self.i1 and first.i1 != self.i1:
+            return False
+
+        if self.i2 and first.i2 != self.i2:
+            return False
+
+        return True
+
+    __call__ = select
+
+    def __repr__(self):
+        return "%s(%r)" % (self.__class__.__name__, self.spec)
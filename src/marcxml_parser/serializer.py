@@ -4,150 +4,308 @@
 # Interpreter version: python 2.7
 #
 # Imports =====================================================================
-from string import Template
+import re
+from xml.sax.saxutils import unescape
 
+from . import tools
 from .parser import MARCXMLParser
 
 
+# Variables ===================================================================
+_MARCXML_HEADER = """<record xmlns="http://www.loc.gov/MARC21/slim/"
+xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
+xsi:schemaLocation="http://www.loc.gov/MARC21/slim
+http://www.loc.gov/standards/marcxml/schema/MARC21slim.xsd">
+"""
+
+#: oai_marc -> format strings used by the XML serializer.
+_XML_FORMATS = {
+    False: {
+        "header": _MARCXML_HEADER,
+        "ctl": '<controlfield tag="%s">%s</controlfield>\n',
+        "field": '<datafield tag="%s" %s="%s" %s="%s">',
+        "subfield": '\n<subfield code="%s">%s</subfield>',
+        "field_end": "\n</datafield>\n",
+        "footer": "</record>\n",
+    },
+    True: {
+        "header": "<record>\n<metadata>\n<oai_marc>\n",
+        "ctl": '<fixfield id="%s">%s</fixfield>\n',
+        "field": '<varfield id="%s" %s="%s" %s="%s">',
+        "subfield": '\n<subfield label="%s">%s</subfield>',
+        "field_end": "\n</varfield>\n",
+        "footer": "</oai_marc>\n</metadata>\n</record>\n",
+    },
+}
+
+
+_CHAR_REF_RE = re.compile(r"&#(x[0-9a-fA-F]+|[0-9]+);")
+
+
+# Functions ===================================================================
+def _decode_char_ref(match):
+    """
+    Convert numeric character reference (``&#233;``, ``&#xE9;``) to unicode.
+    """
+    ref = match.group(1)
+
+    try:
+        if ref.startswith("x"):
+            return unichr(int(ref[1:], 16))
+
+        return unichr(int(ref))
+    except (ValueError, OverflowError):  # out of the unicode range
+        return match.group(0)
+
+
+def _to_iso_value(value):
+    """
+    Convert XML-escaped `value` to bytestring used in ISO 2709 records.
+    """
+    if isinstance(value, unicode):
+        value = value.encode("utf-8")
+
+    if "&#" in value:
+        value = _CHAR_REF_RE.sub(
+            lambda match: _decode_char_ref(match).encode("utf-8"),
+            value
+        )
+
+    return unescape(value, {"&quot;": '"', "&apos;": "'"})
+
+
 # Classes =====================================================================
+class _Chunks(list):
+    """
+    List, which may be used as file by :meth:`.MARCXMLSerializer.write_xml`.
+    """
+    write = list.append
+
+
 class MARCXMLSerializer(MARCXMLParser):
     """
     Class which holds all the data from parser, but contains also XML
     serialization methods.
     """
-    def __init__(self, xml=None, resort=True):
-        super(MARCXMLSerializer, self).__init__(xml, resort)
+    def __init__(self, xml=None, resort=True, **kwargs):
+        super(MARCXMLSerializer, self).__init__(xml, resort, **kwargs)
 
-    def _serialize_ctl_fields(self):
-        template = '<$TAGNAME $FIELD_NAME="$FIELD_ID">$CONTENT</$TAGNAME>\n'
-        tagname = "controlfield" if not self.oai_marc else "fixfield"
-        field_name = "tag" if not self.oai_marc else "id"
+    def _real_i_names(self, dict_field, oai_marc=None):
+        """
+        Return names of the indicator keys used in `dict_field`.
 
-        output = ""
-        for field_id in self.resorted(self.controlfields):
-            # some control fields are specific for oai
-            # if not self.oai_marc and field_id in ["LDR", "FMT"]:
-            if not self.oai_marc and not field_id.isdigit():
-                continue
+        This allows to convert between OAI and XML formats simply by
+        switching .oai_marc property.
+
+        Args:
+            dict_field (dict): Datafield.
+            oai_marc (bool, default None): Expected dialect. If None,
+                     :attr:`.oai_marc` is used.
+        """
+        if oai_marc is None:
+            oai_marc = self.oai_marc
+
+        real_i1_name = self.get_i_name(1, oai_marc)
+        if real_i1_name not in dict_field:
+            real_i1_name = self.get_i_name(1, not oai_marc)
 
-            output += Template(template).substitute(
-                TAGNAME=tagname,
-                FIELD_NAME=field_name,
-                FIELD_ID=field_id,
-                CONTENT=self.controlfields[field_id]
+        real_i2_name = self.get_i_name(2, oai_marc)
+        if real_i2_name not in dict_field:
+            real_i2_name = self.get_i_name(2, not oai_marc)
+
+        return real_i1_name, real_i2_name
+
+    def _write_data_fields(self, write, field_id, oai_marc):
+        """
+        Write all datafields with `field_id` using `write` function.
+
+        Returns:
+            bool: True if anything was written.
+        """
+        formats = _XML_FORMATS[oai_marc]
+        resorted = self.resorted
+        i1_name = self.get_i_name(1, oai_marc)
+        i2_name = self.get_i_name(2, oai_marc)
+
+        written = False
+        for dict_field in self.datafields[field_id]:
+            real_i1_name, real_i2_name = self._real_i_names(
+                dict_field,
+                oai_marc
             )
 
-        return output
+            write(formats["field"] % (
+                field_id,
+                i1_name,
+                dict_field[real_i1_name],
+                i2_name,
+                dict_field[real_i2_name],
+            ))
 
-    def _serialize_data_subfields(self, subfields):
-        template = '\n<$TAGNAME $FIELD_NAME="$FIELD_ID">$CONTENT</$TAGNAME>'
+            codes = [
+                code
+                for code in dict_field
+                if code != real_i1_name and code != real_i2_name
+            ]
+            for code in resorted(codes):
+                for subfield in dict_field[code]:
+                    write(formats["subfield"] % (code, subfield))
 
-        tagname = "subfield"
-        field_name = "code" if not self.oai_marc else "label"
+            write(formats["field_end"])
+            written = True
 
-        output = ""
-        for field_id in self.resorted(subfields):
-            for subfield in subfields[field_id]:
-                output += Template(template).substitute(
-                    TAGNAME=tagname,
-                    FIELD_NAME=field_name,
-                    FIELD_ID=field_id,
-                    CONTENT=subfield
-                )
+        return written
 
-        return output
+    def write_xml(self, fp, oai_marc=None, leader_fixfield=False):
+        """
+        Serialize object to XML and write it to `fp` piece by piece.
 
-    def _serialize_data_fields(self):
-        template = '<$TAGNAME $FIELD_NAME="$FIELD_ID" $I1_NAME="$I1_VAL" '
-        template += '$I2_NAME="$I2_VAL">'
-        template += '$CONTENT\n'
-        template += '</$TAGNAME>\n'
+        The fields of the record are never modified during the serialization,
+        so it may be serialized and queried from more threads at once.
 
-        tagname = "datafield" if not self.oai_marc else "varfield"
-        field_name = "tag" if not self.oai_marc else "id"
+        With `track_changes`, the datafields are rendered only once and the
+        fragments are cached in the record (``._fragments``) and reused,
+        until the fields are changed. Fragments of the parsed fields are
+        taken from the source XML, so the untouched fields are written
+        exactly as they were in the source (the order of their subfields is
+        kept even with `resort`). Each fragment is stored together with
+        a copy of its fields and used only if they are still same, so the
+        fields changed directly, without :meth:`.mark_dirty`, are rendered
+        again as well. Threads serializing the record at once may render the
+        same fragment twice, but they always get the same output.
 
-        output = ""
-        for field_id in self.resorted(self.datafields):
-            # unpac dicts from array
-            for dict_field in self.datafields[field_id]:
-                # this allows to convert between OAI and XML formats simply
-                # by switching .oai_marc property
-                oai = not self.oai_marc
-                real_i1_name = self.i1_name if self.i1_name in dict_field \
-                                            else self.get_i_name(1, oai)
-                real_i2_name = self.i2_name if self.i2_name in dict_field \
-                                            else self.get_i_name(2, oai)
-
-                i1_val = dict_field[real_i1_name]
-                i2_val = dict_field[real_i2_name]
-
-                # temporarily remove i1/i2 from dict
-                del dict_field[real_i1_name]
-                del dict_field[real_i2_name]
-
-                output += Template(template).substitute(
-                    TAGNAME=tagname,
-                    FIELD_NAME=field_name,
-                    FIELD_ID=field_id,
-                    I1_NAME=self.i1_name,
-                    I2_NAME=self.i2_name,
-                    I1_VAL=i1_val,
-                    I2_VAL=i2_val,
-                    CONTENT=self._serialize_data_subfields(dict_field)
-                )
-
-                # put back temporarily removed i1/i2
-                dict_field[real_i1_name] = i1_val
-                dict_field[real_i2_name] = i2_val
-
-        return output
-
-    def to_XML(self):
+        Args:
+            fp (file): Any object with ``.write()`` method.
+            oai_marc (bool, default None): Dialect of the output. If None,
+                     :attr:`.oai_marc` is used. The record itself is not
+                     changed.
+            leader_fixfield (bool, default False): Write the leader as the
+                            ``LDR`` fixfield of OAI MARC output, if there is
+                            no such fixfield. Used by the :mod:`.convert`, so
+                            the leader survives the conversion.
+        """
+        if oai_marc is None:
+            oai_marc = self.oai_marc
+
+        formats = _XML_FORMATS[oai_marc]
+        write = fp.write
+        resorted = self.resorted
+
+        write(formats["header"])
+
+        # serialize leader, if it is present and record is marc xml
+        if not oai_marc:
+            if self.leader:  # print only visible leaders
+                write("<leader>%s</leader>" % self.leader)
+
+            write("\n")
+
+        # control fields
+        written = False
+
+        # leader of marc xml record is carried to the LDR of oai
+        if oai_marc and leader_fixfield and self.leader and \
+           "LDR" not in self.controlfields:
+            write(formats["ctl"] % ("LDR", self.leader))
+            written = True
+
+        for field_id in resorted(self.controlfields):
+            # some control fields are specific for oai
+            if not oai_marc and not field_id.isdigit():
+                continue
+
+            write(formats["ctl"] % (field_id, self.controlfields[field_id]))
+            written = True
+
+        if not written:
+            write("\n")
+
+        # data fields
+        written = False
+        for field_id in resorted(self.datafields):
+            if not self.track_changes:
+                written |= self._write_data_fields(write, field_id, oai_marc)
+                continue
+
+            # reuse the fragment, if the field wasn't changed
+            fragment = self._cached_fragment(field_id, oai_marc)
+            if fragment is None:
+                chunks = _Chunks()
+                self._write_data_fields(chunks.write, field_id, oai_marc)
+                fragment = "".join(chunks)
+                self._cache_fragment(field_id, oai_marc, fragment)
+
+            write(fragment)
+            written |= bool(fragment)
+
+        if not written:
+            write("\n")
+
+        write(formats["footer"])
+
+    def to_XML(self, oai_marc=None, leader_fixfield=False):
         """
         Serialize object back to XML string.
 
+        Args:
+            oai_marc (bool, default None): Dialect of the output, see
+                     :meth:`write_xml`.
+            leader_fixfield (bool, default False): See :meth:`write_xml`.
+
         Returns:
             str: String which should be same as original input, if everything\
                  works as expected.
         """
-        marcxml_template = """<record xmlns="http://www.loc.gov/MARC21/slim/"
-xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
-xsi:schemaLocation="http://www.loc.gov/MARC21/slim
-http://www.loc.gov/standards/marcxml/schema/MARC21slim.xsd">
-$LEADER
-$CONTROL_FIELDS
-$DATA_FIELDS
-</record>
-"""
+        chunks = _Chunks()
+        self.write_xml(chunks, oai_marc, leader_fixfield)
 
-        oai_template = """<record>
-<metadata>
-<oai_marc>
-$LEADER$CONTROL_FIELDS
-$DATA_FIELDS
-</oai_marc>
-</metadata>
-</record>
-"""
+        return "".join(chunks)
 
-        # serialize leader, if it is present and record is marc xml
-        leader = self.leader if self.leader is not None else ""
-        if leader:  # print only visible leaders
-            leader = "<leader>" + leader + "</leader>"
-
-        # discard leader for oai
-        if self.oai_marc:
-            leader = ""
-
-        # serialize
-        xml_template = oai_template if self.oai_marc else marcxml_template
-        xml_output = Template(xml_template).substitute(
-            LEADER=leader.strip(),
-            CONTROL_FIELDS=self._serialize_ctl_fields().strip(),
-            DATA_FIELDS=self._serialize_data_fields().strip()
-        )
+    def to_ISO2709(self):
+        """
+        Serialize object to binary ISO 2709 (``.mrc``) record.
+
+        Values are unescaped from XML (including the numeric character
+        references) and unicode is encoded to UTF-8. Leader of the record is
+        used, but the record length, base address and the entry map are
+        recomputed.
+
+        All controlfields are written before the datafields, so the output
+        differs from binary records, which have some controlfields (``FMT``
+        for example) after the datafields.
+
+        Returns:
+            str: Binary record.
+
+        Raises:
+            ValueError: If the record is too long for the ISO 2709.
+        """
+        fields = [
+            (field_id, _to_iso_value(self.controlfields[field_id]))
+            for field_id in self.resorted(self.controlfields)
+            if field_id != "LDR"
+        ]
+
+        for field_id in self.resorted(self.datafields):
+            for dict_field in self.datafields[field_id]:
+                real_i1_name, real_i2_name = self._real_i_names(dict_field)
+
+                data = [
+                    _to_iso_value(dict_field[real_i1_name]),
+                    _to_iso_value(dict_field[real_i2_name]),
+                ]
+                for code in self.resorted(dict_field):
+                    if code in (real_i1_name, real_i2_name):
+                        continue
+
+                    for subfield in dict_field[code]:
+                        data.append(tools.SUBFIELD_DELIMITER)
+                        data.append(code)
+                        data.append(_to_iso_value(subfield))
+
+                fields.append((field_id, "".join(data)))
 
-        return xml_output
+        return tools.encode_iso2709(self.leader, fields)
 
     def __str__(self):
         """
@@ -0,0 +1,215 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import os
+import marshal
+import hashlib
+import tempfile
+
+from . import tools
+from .backends import RawRecord
+from .record import MARCXMLRecord
+from .record import record_iterator
+
+
+# Variables ===================================================================
+SNAPSHOT_SUFFIX = ".snapshot"  #: Suffix of the snapshot file.
+
+_MAGIC = "MXMLSNP1"
+_END = None  # marks the end of the records
+
+
+# Functions & classes =========================================================
+def content_hash(path, chunk_size=tools.CHUNK_SIZE):
+    """
+    Compute SHA1 hash of the content of file in `path`.
+
+    Args:
+        path (str): Path to the file.
+        chunk_size (int, default tools.CHUNK_SIZE): How much data is read at
+                   once.
+
+    Returns:
+        str: Hexadecimal digest.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), ""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def dump_snapshot(records, fp, source_hash=""):
+    """
+    Write `records` to `fp` as binary snapshot.
+
+    Each record is stored as :class:`.RawRecord` serialized by the
+    :mod:`marshal`, so loading it skips the XML parsing completely.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects.
+        fp (file): Real file opened in binary mode (:mod:`marshal` doesn't
+           work with file-like objects).
+        source_hash (str, default ""): Hash of the source, see
+                    :func:`content_hash`.
+
+    Returns:
+        int: Number of written records.
+    """
+    marshal.dump((_MAGIC, source_hash), fp)
+
+    count = 0
+    for record in records:
+        marshal.dump(tuple(record.to_raw_record()), fp)
+        count += 1
+
+    marshal.dump(_END, fp)
+
+    return count
+
+
+def read_snapshot_hash(fp):
+    """
+    Read the header of the snapshot in `fp`.
+
+    Args:
+        fp (file): Real file opened in binary mode.
+
+    Returns:
+        str: Hash of the source stored in the snapshot.
+
+    Raises:
+        ValueError: If the `fp` is not a snapshot.
+    """
+    try:
+        header = marshal.load(fp)
+    except (EOFError, ValueError, TypeError):
+        raise ValueError("Not a snapshot!")
+
+    if not isinstance(header, tuple) or len(header) != 2 or \
+       header[0] != _MAGIC:
+        raise ValueError("Not a snapshot!")
+
+    return header[1]
+
+
+def load_snapshot(fp, source_hash=None, resort=True, **kwargs):
+    """
+    Read records from the snapshot created by :func:`dump_snapshot`.
+
+    Args:
+        fp (file): Real file opened in binary mode.
+        source_hash (str, default None): Expected hash of the source. Not
+                    checked if not set.
+        resort (bool, default True): See :class:`.MARCXMLParser`.
+        kwargs: Other arguments passed to the :class:`.MARCXMLRecord`. Use
+                ``lazy=True`` to build the datafields only when they are
+                used.
+
+    Yields:
+        MARCXMLRecord: For each record.
+
+    Raises:
+        ValueError: If the `fp` is not a snapshot, the hash doesn't match, or
+                    the snapshot is truncated.
+    """
+    stored_hash = read_snapshot_hash(fp)
+    if source_hash is not None and stored_hash != source_hash:
+        raise ValueError("Snapshot is stale!")
+
+    while True:
+        try:
+            raw_record = marshal.load(fp)
+        except (EOFError, ValueError, TypeError):
+            raise ValueError("Snapshot is truncated!")
+
+        if raw_record is _END:
+            return
+
+        yield MARCXMLRecord(RawRecord(*raw_record), resort, **kwargs)
+
+
+def _is_fresh(snapshot_path, source_hash):
+    """
+    Does the snapshot in `snapshot_path` exist and belong to `source_hash`?
+    """
+    if not os.path.exists(snapshot_path):
+        return False
+
+    with open(snapshot_path, "rb") as f:
+        try:
+            return read_snapshot_hash(f) == source_hash
+        except ValueError:
+            return False
+
+
+def _rebuild(path, snapshot_path, source_hash, backend):
+    """
+    Parse the XML in `path`, write the snapshot and yield the raw records.
+    The snapshot is written to temporary file, which replaces the old one
+    only when all records were written.
+    """
+    directory = os.path.dirname(os.path.abspath(snapshot_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=SNAPSHOT_SUFFIX)
+
+    try:
+        with os.fdopen(fd, "wb") as snapshot, open(path, "rb") as f:
+            marshal.dump((_MAGIC, source_hash), snapshot)
+
+            for record in record_iterator(f, stream=True, backend=backend):
+                raw_record = record.to_raw_record()
+                marshal.dump(tuple(raw_record), snapshot)
+
+                yield raw_record
+
+            marshal.dump(_END, snapshot)
+
+        os.rename(tmp_path, snapshot_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def cached_records(path, snapshot_path=None, resort=True, backend=None,
+                   **kwargs):
+    """
+    Iterate over records in MARC XML collection in `path` using the
+    snapshot.
+
+    The snapshot is keyed by the :func:`content_hash` of the collection. If
+    it doesn't exist or it is stale, the collection is parsed and new
+    snapshot is written during the iteration, so the next run skips the
+    parsing.
+
+    Args:
+        path (str): Path to the MARC XML collection.
+        snapshot_path (str, default None): Path to the snapshot. `path` with
+                      :attr:`SNAPSHOT_SUFFIX` is used if not set.
+        resort (bool, default True): See :class:`.MARCXMLParser`.
+        backend (str, default None): Parser backend used when the snapshot
+                is rebuilt.
+        kwargs: Other arguments passed to the :class:`.MARCXMLRecord`. The
+                snapshot always contains whole records, so `tags` may be
+                changed between the runs.
+
+    Yields:
+        MARCXMLRecord: For each record.
+    """
+    if snapshot_path is None:
+        snapshot_path = path + SNAPSHOT_SUFFIX
+
+    source_hash = content_hash(path)
+
+    if _is_fresh(snapshot_path, source_hash):
+        with open(snapshot_path, "rb") as f:
+            for record in load_snapshot(f, source_hash, resort, **kwargs):
+                yield record
+
+        return
+
+    for raw_record in _rebuild(path, snapshot_path, source_hash, backend):
+        yield MARCXMLRecord(raw_record, resort, **kwargs)
@@ -0,0 +1,327 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+"""
+Export of the records to SQLite database with normalized schema::
+
+    records(id, oai_marc, leader, source_offset, source_length)
+    controlfields(record_id, position, tag, value)
+    datafields(id, record_id, position, tag, i1, i2)
+    subfields(datafield_id, position, code, value)
+
+Optional tables derived by the :class:`.MARCXMLQuery` getters
+(:attr:`DERIVED_TABLES`)::
+
+    authors(record_id, position, name, second_name, surname, title)
+    isbns(record_id, isbn, valid)
+
+Example::
+
+    with open("dump.xml") as f:
+        export_sqlite(record_iterator(f, stream=True), "dump.sqlite")
+
+Values are stored as unicode, with the XML entities (``&amp;``, ..)
+decoded.
+"""
+# Imports =====================================================================
+import sqlite3
+from xml.sax.saxutils import unescape
+
+from . import tools
+
+
+# Variables ===================================================================
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS records (
+        id INTEGER PRIMARY KEY,
+        oai_marc INTEGER NOT NULL,
+        leader TEXT,
+        source_offset INTEGER,
+        source_length INTEGER
+    )""",
+    """CREATE TABLE IF NOT EXISTS controlfields (
+        record_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        tag TEXT NOT NULL,
+        value TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS datafields (
+        id INTEGER PRIMARY KEY,
+        record_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        tag TEXT NOT NULL,
+        i1 TEXT,
+        i2 TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS subfields (
+        datafield_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        code TEXT NOT NULL,
+        value TEXT
+    )""",
+]
+
+_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS controlfields_record "
+    "ON controlfields (record_id)",
+    "CREATE INDEX IF NOT EXISTS controlfields_tag "
+    "ON controlfields (tag, value)",
+    "CREATE INDEX IF NOT EXISTS datafields_record ON datafields (record_id)",
+    "CREATE INDEX IF NOT EXISTS datafields_tag ON datafields (tag)",
+    "CREATE INDEX IF NOT EXISTS subfields_datafield "
+    "ON subfields (datafield_id)",
+    "CREATE INDEX IF NOT EXISTS subfields_value ON subfields (code, value)",
+]
+
+_XML_ENTITIES = {"&quot;": '"', "&apos;": "'"}
+
+
+def _text(value):
+    """
+    Convert `value` to unicode with decoded XML entities.
+    """
+    if value is None:
+        return None
+
+    if not isinstance(value, unicode):
+        value = value.decode("utf-8", "replace")
+
+    if u"&" in value:
+        value = unescape(value, _XML_ENTITIES)
+
+    return value
+
+
+def _author_rows(record_id, record):
+    return [
+        (record_id, position) + tuple(_text(value) for value in author)
+        for position, author in enumerate(record.get_authors())
+    ]
+
+
+def _isbn_rows(record_id, record):
+    valid = [(record_id, _text(isbn), 1) for isbn in record.get_ISBNs()]
+    invalid = [
+        (record_id, _text(isbn), 0)
+        for isbn in record.get_invalid_ISBNs()
+    ]
+
+    return valid + invalid
+
+
+#: Optional tables derived from the :class:`.MARCXMLQuery` getters. Each
+#: item is ``(create table, insert, index, function returning the rows)``.
+DERIVED_TABLES = {
+    "authors": (
+        """CREATE TABLE IF NOT EXISTS authors (
+            record_id INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT,
+            second_name TEXT,
+            surname TEXT,
+            title TEXT
+        )""",
+        "INSERT INTO authors VALUES (?, ?, ?, ?, ?, ?)",
+        "CREATE INDEX IF NOT EXISTS authors_surname "
+        "ON authors (surname, name)",
+        _author_rows,
+    ),
+    "isbns": (
+        """CREATE TABLE IF NOT EXISTS isbns (
+            record_id INTEGER NOT NULL,
+            isbn TEXT NOT NULL,
+            valid INTEGER NOT NULL
+        )""",
+        "INSERT INTO isbns VALUES (?, ?, ?)",
+        "CREATE INDEX IF NOT EXISTS isbns_isbn ON isbns (isbn)",
+        _isbn_rows,
+    ),
+}
+
+
+# Functions & classes =========================================================
+class _Rows(object):
+    """
+    Rows of all tables collected from one batch of records.
+    """
+    def __init__(self, derived):
+        self.records = []
+        self.controlfields = []
+        self.datafields = []
+        self.subfields = []
+        self.derived = dict((name, []) for name in derived)
+
+    def add_record(self, record_id, first_datafield_id, record):
+        """
+        Add rows of the `record`.
+
+        Returns:
+            int: Id of the next datafield.
+        """
+        raw_record = record.to_raw_record()
+        span = record.source_span or (None, None)
+
+        self.records.append((
+            record_id,
+            int(record.oai_marc),
+            _text(record.leader),
+            span[0],
+            span[1],
+        ))
+
+        self.controlfields.extend(
+            (record_id, position, tag, _text(value))
+            for position, (tag, value) in enumerate(raw_record.controlfields)
+        )
+
+        datafield_id = first_datafield_id
+        for position, field in enumerate(raw_record.datafields):
+            tag, i1, i2, subfields = field
+
+            self.datafields.append((datafield_id, record_id, position, tag,
+                                    i1, i2))
+            self.subfields.extend(
+                (datafield_id, sub_position, code, _text(value))
+                for sub_position, (code, value) in enumerate(subfields)
+            )
+
+            datafield_id += 1
+
+        for name, rows in self.derived.iteritems():
+            rows.extend(DERIVED_TABLES[name][3](record_id, record))
+
+        return datafield_id
+
+    def write(self, connection):
+        """
+        Insert all rows to the database in one transaction.
+        """
+        with connection:
+            connection.executemany(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
+                self.records
+            )
+            connection.executemany(
+                "INSERT INTO controlfields VALUES (?, ?, ?, ?)",
+                self.controlfields
+            )
+            connection.executemany(
+                "INSERT INTO datafields VALUES (?, ?, ?, ?, ?, ?)",
+                self.datafields
+            )
+            connection.executemany(
+                "INSERT INTO subfields VALUES (?, ?, ?, ?)",
+                self.subfields
+            )
+
+            for name, rows in self.derived.iteritems():
+                connection.executemany(DERIVED_TABLES[name][1], rows)
+
+
+def _next_id(connection, table):
+    """
+    Return the id following the highest id in the `table`.
+    """
+    max_id = connection.execute("SELECT MAX(id) FROM %s" % table).fetchone()
+
+    return (max_id[0] or 0) + 1
+
+
+def create_schema(connection, derived=()):
+    """
+    Create the tables (if they don't exist yet) without the indexes.
+
+    Args:
+        connection (obj): :class:`sqlite3.Connection` instance.
+        derived (list, default ()): Names of the :attr:`DERIVED_TABLES`.
+
+    Raises:
+        ValueError: For unknown `derived` tables.
+    """
+    for name in derived:
+        if name not in DERIVED_TABLES:
+            raise ValueError("Unknown derived table '%s'!" % name)
+
+    with connection:
+        for statement in _SCHEMA:
+            connection.execute(statement)
+
+        for name in derived:
+            connection.execute(DERIVED_TABLES[name][0])
+
+
+def create_indexes(connection, derived=()):
+    """
+    Create the indexes (if they don't exist yet).
+
+    Args:
+        connection (obj): :class:`sqlite3.Connection` instance.
+        derived (list, default ()): Names of the :attr:`DERIVED_TABLES`.
+    """
+    with connection:
+        for statement in _INDEXES:
+            connection.execute(statement)
+
+        for name in derived:
+            connection.execute(DERIVED_TABLES[name][2])
+
+
+def export_sqlite(records, database, derived=("authors", "isbns"),
+                  batch_size=1000, indexes=True):
+    """
+    Insert `records` to the SQLite `database`.
+
+    Records are inserted in batches of `batch_size` records by
+    :meth:`~sqlite3.Cursor.executemany`, each batch in one transaction, and
+    the indexes are created after all records are loaded. Records are added
+    to the tables already present in the `database`.
+
+    Args:
+        records (iterable): :class:`.MARCXMLRecord` objects. Any iterable,
+                for example :func:`.record_iterator` in `stream` mode, may be
+                used.
+        database (str/obj): Path to the database, or
+                 :class:`sqlite3.Connection` instance.
+        derived (list, default ("authors", "isbns")): Names of the
+                :attr:`DERIVED_TABLES`, which should be filled.
+        batch_size (int, default 1000): Number of records inserted in one
+                   transaction.
+        indexes (bool, default True): Create the indexes after the load.
+
+    Returns:
+        int: Number of inserted records.
+
+    Raises:
+        ValueError: For unknown `derived` tables.
+    """
+    close = False
+    if not isinstance(database, sqlite3.Connection):
+        database = sqlite3.connect(database)
+        close = True
+
+    try:
+        create_schema(database, derived)
+
+        record_id = _next_id(database, "records")
+        datafield_id = _next_id(database, "datafields")
+
+        count = 0
+        for batch in tools.batches(records, batch_size):
+            rows = _Rows(derived)
+
+            for record in batch:
+                datafield_id = rows.add_record(record_id, datafield_id, record)
+                record_id += 1
+
+            rows.write(database)
+            count += len(batch)
+
+        if indexes:
+            create_indexes(database, derived)
+    finally:
+        if close:
+            database.close()
+
+    return count
@@ -7,4 +7,6 @@
 from person import Person
 from corporation import Corporation
 from marcsubrecord import MARCSubrecord
+from datafield import DataField
+from field_table import FieldTable
 from publication_type import PublicationType
@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from collections import OrderedDict
+
+
+# Functions & classes =========================================================
+class DataField(OrderedDict):
+    """
+    Dict representation of one datafield (``{"ind1": "1", "ind2": " ",
+    "a": [..], ..}``), which also remembers the original order of the
+    subfields, which is lost in the dict (``a, n, p, n, p`` is stored as
+    ``{"a": [..], "n": [.., ..], "p": [.., ..]}``).
+
+    Only the sequence of the codes is remembered by :meth:`add_subfield`, the
+    values are taken from the dict, see :func:`ordered_subfields`.
+    """
+    def __init__(self, *args, **kwargs):
+        self._codes = []
+
+        super(DataField, self).__init__(*args, **kwargs)
+
+    def add_subfield(self, code, value):
+        """
+        Add the `value` to the list of `code` subfields and remember its
+        position.
+
+        Args:
+            code (str): Code of the subfield.
+            value (obj): Value of the subfield.
+        """
+        if code in self:
+            self[code].append(value)
+        else:
+            self[code] = [value]
+
+        self._codes.append(code)
+
+
+def _dict_order(field):
+    """
+    Return the subfields of `field` in the order of the dict.
+    """
+    return [
+        (code, value)
+        for code, values in field.iteritems()
+        if isinstance(values, list)  # skip the indicators
+        for value in values
+    ]
+
+
+def ordered_subfields(field):
+    """
+    Return the subfields of `field` in the original order.
+
+    The order remembered by :class:`DataField` is used only if the number
+    of the subfields of each code still matches the dict, so the values may
+    be replaced in place. Subfields of the fields, where the values were
+    added or removed directly, and of plain dicts, are returned in the order
+    of the dict (code by code).
+
+    Args:
+        field (dict): :class:`DataField` or any dict representation of the
+              datafield.
+
+    Returns:
+        list: ``(code, value)`` tuples.
+    """
+    codes = getattr(field, "_codes", None)
+    if not codes:
+        return _dict_order(field)
+
+    # if the total number of the subfields is same, but the number of some
+    # code differs, there is also code with less values than remembered
+    count = sum(
+        len(values)
+        for values in field.itervalues()
+        if isinstance(values, list)
+    )
+    if count != len(codes):
+        return _dict_order(field)
+
+    positions = {}
+    subfields = []
+    try:
+        for code in codes:
+            position = positions.get(code, 0)
+            positions[code] = position + 1
+
+            subfields.append((code, field[code][position]))
+    except (KeyError, IndexError):  # values were added / removed
+        return _dict_order(field)
+
+    return subfields
@@ -0,0 +1,173 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from array import array
+from collections import Mapping
+from collections import OrderedDict
+
+from datafield import DataField
+from marcsubrecord import MARCSubrecord
+
+
+# Functions & classes =========================================================
+def _number(numbers, item):
+    """
+    Return the number of `item` in `numbers` dict, add it if not present.
+    """
+    number = numbers.get(item)
+    if number is None:
+        number = numbers[item] = len(numbers)
+
+    return number
+
+
+def _by_number(numbers):
+    """
+    Convert ``{item: number}`` dict to list of items.
+    """
+    items = [None] * len(numbers)
+    for item, number in numbers.iteritems():
+        items[number] = item
+
+    return items
+
+
+class FieldTable(Mapping):
+    """
+    Compact, read-only storage of the datafields.
+
+    All values are kept in one string buffer and the record is described by
+    flat parallel arrays; one item per field (tag, indicator pair, first
+    subfield) and one item per subfield (code, value offset). Tags, codes and
+    indicator pairs are stored only once and referenced by their numbers.
+
+    The table is a mapping with the same interface as
+    :attr:`.MARCXMLParser.datafields` - ``table["245"]`` returns list of
+    dicts with :class:`.MARCSubrecord` objects, which are built on each
+    access. Changes of the returned objects are not stored back to the table.
+
+    Attributes:
+        i1_name (str): Name of the first indicator key in the fields.
+        i2_name (str): Name of the second indicator key in the fields.
+    """
+    def __init__(self, fields, i1_name="ind1", i2_name="ind2"):
+        """
+        Constructor.
+
+        Args:
+            fields (iterable): ``(tag, i1, i2, subfields)`` tuples from the
+                   backend, where `subfields` is list of ``(code, value)``
+                   tuples.
+            i1_name (str, default "ind1"): Name of the first indicator key.
+            i2_name (str, default "ind2"): Name of the second indicator key.
+        """
+        self.i1_name = i1_name
+        self.i2_name = i2_name
+
+        tags = OrderedDict()
+        codes = {}
+        indicators = {}
+
+        self._tags = array("H")
+        self._indicators = array("H")
+        self._field_starts = array("I", [0])
+        self._codes = array("H")
+        self._offsets = array("I", [0])
+
+        values = []
+        offset = 0
+        for tag, i1, i2, subfields in fields:
+            self._tags.append(_number(tags, tag))
+            self._indicators.append(_number(indicators, (i1, i2)))
+
+            for code, value in subfields:
+                offset += len(value)
+                values.append(value)
+
+                self._codes.append(_number(codes, code))
+                self._offsets.append(offset)
+
+            self._field_starts.append(len(self._codes))
+
+        self._buffer = "".join(values)
+        self._tag_names = _by_number(tags)
+        self._code_names = _by_number(codes)
+        self._indicator_pairs = _by_number(indicators)
+
+        # tag -> numbers of its fields
+        self._tag_index = OrderedDict(
+            (tag, array("I")) for tag in self._tag_names
+        )
+        for field_number, tag_number in enumerate(self._tags):
+            self._tag_index[self._tag_names[tag_number]].append(field_number)
+
+    def _field(self, number):
+        """
+        Build dict representation of the field with `number`.
+        """
+        i1, i2 = self._indicator_pairs[self._indicators[number]]
+        field = DataField([
+            [self.i1_name, i1],
+            [self.i2_name, i2],
+        ])
+        context = MARCSubrecord.context(i1, i2, field)
+
+        offsets = self._offsets
+        for subfield in xrange(self._field_starts[number],
+                               self._field_starts[number + 1]):
+            value = self._buffer[offsets[subfield]:offsets[subfield + 1]]
+            code = self._code_names[self._codes[subfield]]
+
+            field.add_subfield(
+                code,
+                MARCSubrecord.from_context(value, context)
+            )
+
+        return field
+
+    def __getitem__(self, tag):
+        return [self._field(number) for number in self._tag_index[tag]]
+
+    def __iter__(self):
+        return iter(self._tag_index)
+
+    def __len__(self):
+        return len(self._tag_index)
+
+    def __contains__(self, tag):
+        return tag in self._tag_index
+
+    def iter_fields(self):
+        """
+        Iterate over fields in the original order.
+
+        Yields:
+            tuple: ``(tag, i1, i2, subfields)``, where `subfields` is list of \
+                   ``(code, value)`` tuples.
+        """
+        offsets = self._offsets
+        for number, tag_number in enumerate(self._tags):
+            i1, i2 = self._indicator_pairs[self._indicators[number]]
+
+            subfields = [
+                (
+                    self._code_names[self._codes[subfield]],
+                    self._buffer[offsets[subfield]:offsets[subfield + 1]],
+                )
+                for subfield in xrange(self._field_starts[number],
+                                       self._field_starts[number + 1])
+            ]
+
+            yield self._tag_names[tag_number], i1, i2, subfields
+
+    def thaw(self):
+        """
+        Convert the table to the nested dicts/lists, which can be modified.
+
+        Returns:
+            OrderedDict: Same structure as :attr:`.MARCXMLParser.datafields`.
+        """
+        return OrderedDict((tag, self[tag]) for tag in self)
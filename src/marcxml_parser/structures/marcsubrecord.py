@@ -6,7 +6,25 @@
 # Imports =====================================================================
 
 
+# Variables ===================================================================
+_INDICATORS = {}  # cache of the indicator strings
+
+
 # Functions & classes =========================================================
+def _intern_indicator(indicator):
+    """
+    Return shared instance of the `indicator` string.
+    """
+    return _INDICATORS.setdefault(indicator, indicator)
+
+
+def _new_subrecord(cls, val):
+    """
+    Create subrecord without context, used by :mod:`pickle`.
+    """
+    return str.__new__(cls, val)
+
+
 class MARCSubrecord(str):
     """
     This class is used to store data returned from
@@ -19,22 +37,87 @@ class MARCSubrecord(str):
     This context is provided by the ``i1``/``i2`` values, but sometimes it is
     also useful to have access to the other subfields from this `subrecord`.
 
+    The context is stored in dictionary, which is shared by all subrecords
+    from the same datafield (see :meth:`context` and :meth:`from_context`), so
+    the subrecord itself costs just a little more than plain string. The
+    context is copied, when the attribute of the subrecord is set or deleted,
+    so the change doesn't affect its siblings.
+
     Attributes:
         val (str): Value of `subrecord`.
-        ind1 (char): Indicator one.
-        ind2 (char): Indicator two.
+        i1 (char): Indicator one.
+        i2 (char): Indicator two.
         other_subfields (dict): Dictionary with other subfields from the same
                                 `subrecord`.
 
     """
-    def __new__(self, val, i1, i2, other_subfields):
-        return str.__new__(self, val)
+    def __new__(cls, val, i1, i2, other_subfields):
+        return cls.from_context(val, cls.context(i1, i2, other_subfields))
+
+    @staticmethod
+    def context(i1, i2, other_subfields):
+        """
+        Create context, which may be shared by subrecords of one datafield.
+
+        Args:
+            i1 (char): Indicator one.
+            i2 (char): Indicator two.
+            other_subfields (dict): Other subfields from the same datafield.
+
+        Returns:
+            dict: Context for :meth:`from_context`.
+        """
+        return {
+            "i1": _intern_indicator(i1),
+            "i2": _intern_indicator(i2),
+            "other_subfields": other_subfields,
+        }
+
+    @classmethod
+    def from_context(cls, val, context):
+        """
+        Create subrecord with `val`, which uses the `context` as its
+        attributes.
+
+        Args:
+            val (str): Value of the subrecord.
+            context (dict): Result of :meth:`context`.
+
+        Returns:
+            obj: :class:`MARCSubrecord` instance.
+        """
+        subrecord = str.__new__(cls, val)
+        object.__setattr__(subrecord, "__dict__", context)
+
+        return subrecord
+
+    @property
+    def val(self):
+        return str.__str__(self)
+
+    def _own_context(self):
+        """
+        Replace the shared context with its copy (copy on write).
+        """
+        object.__setattr__(self, "__dict__", dict(self.__dict__))
+
+    def __setattr__(self, name, value):
+        if name == "__dict__":
+            value = dict(value)
+        else:
+            self._own_context()
+
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        self._own_context()
+        object.__delattr__(self, name)
 
-    def __init__(self, val, i1, i2, other_subfields):
-        self.val = val
-        self.i1 = i1
-        self.i2 = i2
-        self.other_subfields = other_subfields
+    def __reduce__(self):
+        # context is set as a state, after the subrecord is created, so the
+        # reference cycle over the `other_subfields` can be pickled
+        return _new_subrecord, (self.__class__, self.val), self.__dict__
 
-    def __str__(self):
-        return self.val
+    def __setstate__(self, context):
+        # shared context is pickled only once, so it stays shared
+        object.__setattr__(self, "__dict__", context)
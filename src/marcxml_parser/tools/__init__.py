@@ -5,3 +5,6 @@
 #
 # Imports =====================================================================
 from .resorted import *
+from .record_splitter import *
+from .parallel import *
+from .iso2709_codec import *
@@ -0,0 +1,77 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+
+
+# Variables ===================================================================
+RECORD_TERMINATOR = "\x1d"
+FIELD_TERMINATOR = "\x1e"
+SUBFIELD_DELIMITER = "\x1f"
+
+LEADER_LENGTH = 24
+DEFAULT_LEADER = "     nam a22     4a 4500"  #: Used for records without leader.
+
+
+# Functions & classes =========================================================
+def encode_iso2709(leader, fields):
+    """
+    Put together binary ISO 2709 record.
+
+    Record length, base address and the entry map in the `leader` are
+    recomputed, the rest of the `leader` is used as it is.
+
+    Args:
+        leader (str): Leader of the record, unicode is encoded to UTF-8.
+               :attr:`DEFAULT_LEADER` is used, if it is not 24 characters
+               long.
+        fields (list): ``(tag, data)`` tuples, where `data` is bytestring with
+               the content of the field without the field terminator.
+
+    Returns:
+        str: Binary record.
+
+    Raises:
+        ValueError: If the record is too long for the ISO 2709.
+    """
+    if isinstance(leader, unicode):
+        leader = leader.encode("utf-8")
+
+    if not leader or len(leader) != LEADER_LENGTH:
+        leader = DEFAULT_LEADER
+
+    directory = []
+    body = []
+    position = 0
+    for tag, data in fields:
+        length = len(data) + 1  # + FIELD_TERMINATOR
+
+        if length > 9999 or position > 99999:
+            raise ValueError("Field '%s' is too long for ISO 2709!" % tag)
+
+        directory.append("%s%04d%05d" % (tag, length, position))
+        body.append(data)
+        body.append(FIELD_TERMINATOR)
+        position += length
+
+    base_address = LEADER_LENGTH + 12 * len(directory) + 1
+    record_length = base_address + position + 1
+    if record_length > 99999:
+        raise ValueError("Record is too long for ISO 2709!")
+
+    leader = "%05d%s22%05d%s4500" % (
+        record_length,
+        leader[5:10],
+        base_address,
+        leader[17:20],
+    )
+
+    return "".join([
+        leader,
+        "".join(directory),
+        FIELD_TERMINATOR,
+        "".join(body),
+        RECORD_TERMINATOR,
+    ])
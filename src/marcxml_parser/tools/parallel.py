@@ -0,0 +1,144 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import Queue
+import cPickle
+import itertools
+import multiprocessing
+
+
+# Functions & classes =========================================================
+def _picklable_error(error):
+    """
+    Return the `error`, or :exc:`RuntimeError` describing it, if the `error`
+    can't be pickled.
+    """
+    try:
+        cPickle.dumps(error, cPickle.HIGHEST_PROTOCOL)
+    except Exception:
+        return RuntimeError("%s: %s" % (error.__class__.__name__, error))
+
+    return error
+
+
+def _call(args):
+    """
+    Call the function in worker process. Exceptions are returned instead of
+    raised, so the parent always knows, which task has finished.
+
+    The result is pickled here, because the pool never calls the callback for
+    results, which can't be pickled, and the parent would wait forever.
+    """
+    fn, seq, item = args
+
+    try:
+        result = fn(item)
+        return seq, cPickle.dumps(result, cPickle.HIGHEST_PROTOCOL), None
+    except Exception as e:
+        return seq, None, _picklable_error(e)
+
+
+def batches(iterable, size):
+    """
+    Group items from `iterable` to lists of `size` items.
+
+    Args:
+        iterable (iterable): Any iterable.
+        size (int): Size of the batches. Last batch may be smaller.
+
+    Yields:
+        list: Lists of items.
+    """
+    iterator = iter(iterable)
+
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+
+        yield batch
+
+
+def parallel_map(fn, iterable, workers, ordered=True, max_pending=None):
+    """
+    Map `fn` over `iterable` in pool of `workers` processes.
+
+    Items are taken from `iterable` only when there is a free slot, so at most
+    `max_pending` items are in flight (sent to workers or waiting to be
+    yielded) at any moment and the memory usage stays flat even for infinite
+    or very large iterables.
+
+    Args:
+        fn (callable): Function defined on module level, so it can be pickled.
+        iterable (iterable): Items, which will be passed to `fn`.
+        workers (int): Number of worker processes.
+        ordered (bool, default True): Yield results in the same order as the
+                items were in `iterable`. If False, results are yielded as
+                soon as they are ready.
+        max_pending (int, default None): Maximal number of items in flight.
+                    ``2 * workers`` if not set.
+
+    Yields:
+        obj: Results of the `fn` calls.
+
+    Raises:
+        Exception: Any exception raised by `fn` in the worker process.
+            Errors of results, which can't be pickled, are raised too.
+    """
+    if max_pending is None:
+        max_pending = 2 * workers
+
+    max_pending = max(max_pending, 1)
+    results = Queue.Queue()
+    finished = {}  # seq -> result, used to restore the order
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        submitted = 0
+        yielded = 0
+        items = iter(iterable)
+        exhausted = False
+
+        while not exhausted or yielded < submitted:
+            # fill the free slots
+            while not exhausted and submitted - yielded < max_pending:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+
+                pool.apply_async(
+                    _call,
+                    ((fn, submitted, item),),
+                    callback=results.put
+                )
+                submitted += 1
+
+            if yielded == submitted:
+                continue
+
+            seq, result, error = results.get()
+            if error is not None:
+                raise error
+
+            result = cPickle.loads(result)
+
+            if not ordered:
+                yielded += 1
+                yield result
+                continue
+
+            finished[seq] = result
+            while yielded in finished:
+                result = finished.pop(yielded)
+                yielded += 1
+                yield result
+
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import re
+from StringIO import StringIO
+
+
+# Variables ===================================================================
+CHUNK_SIZE = 1024 * 1024  #: Default size of the chunks read from the input.
+
+_RECORD_TAG_RE = re.compile(r"<(?:record(?=[\s>/])|(/)record\s*>)")
+
+
+# Functions & classes =========================================================
+def record_spans(xml, chunk_size=CHUNK_SIZE):
+    """
+    Incrementally find all ``<record>`` elements in `xml`.
+
+    The input is read in chunks of `chunk_size` characters and only the
+    unfinished part of the buffer is kept between reads, so the memory usage
+    is bounded by the size of the largest record, not by the size of the
+    input. The search continues from the last scanned position after each
+    read, so records larger than `chunk_size` are scanned only once.
+
+    Nested ``<record>`` elements (MARC record wrapped in the OAI-PMH
+    ``<record>``) are returned as part of the outermost element.
+
+    Args:
+        xml (str/file): Input string or file-like object with XML.
+        chunk_size (int, default CHUNK_SIZE): How much to read at once.
+
+    Yields:
+        tuple: ``(offset, record_xml)``, where `offset` is position of the \
+               ``<record`` in the input and `record_xml` is string with the \
+               whole element, including the opening and closing tags.
+    """
+    if not hasattr(xml, "read"):
+        xml = StringIO(xml)
+
+    buff = ""
+    buff_offset = 0  # position of the `buff` in the input
+    pos = 0  # position in the `buff`, where the search should continue
+    start = None  # position of the unfinished outermost record in `buff`
+    depth = 0  # number of the unclosed <record> elements
+    eof = False
+
+    while True:
+        match = _RECORD_TAG_RE.search(buff, pos)
+
+        if match and match.group(1):  # </record>
+            pos = match.end()
+
+            if start is None:  # closing tag without the opening one
+                continue
+
+            depth -= 1
+            if not depth:
+                yield buff_offset + start, buff[start:pos]
+                start = None
+
+            continue
+
+        if match:  # <record ..>
+            tag_end = buff.find(">", match.end())
+
+            if tag_end != -1:
+                if start is None:
+                    start = match.start()
+
+                if buff[tag_end - 1] != "/":  # not <record />
+                    depth += 1
+
+                pos = tag_end + 1
+                if not depth:
+                    yield buff_offset + start, buff[start:pos]
+                    start = None
+
+                continue
+
+            pos = match.start()  # wait for the rest of the opening tag
+        else:
+            # keep the possible beginning of unfinished tag
+            last_tag = buff.rfind("<", pos)
+            pos = last_tag if last_tag != -1 else len(buff)
+
+        if eof:
+            return
+
+        # drop the data which are no longer required
+        keep_from = pos if start is None else start
+        buff_offset += keep_from
+        buff = buff[keep_from:]
+        pos -= keep_from
+        if start is not None:
+            start = 0
+
+        # read at least as much as is kept, so the copying of the large
+        # records is linear to their size
+        chunk = xml.read(max(chunk_size, len(buff)))
+        if not chunk:
+            eof = True
+
+        buff += chunk
+
+
+def split_records(xml, chunk_size=CHUNK_SIZE):
+    """
+    Same as :func:`record_spans`, but yields just the XML of the records.
+
+    Args:
+        xml (str/file): Input string or file-like object with XML.
+        chunk_size (int, default CHUNK_SIZE): How much to read at once.
+
+    Yields:
+        str: XML of each ``<record>`` element.
+    """
+    for _, record_xml in record_spans(xml, chunk_size):
+        yield record_xml
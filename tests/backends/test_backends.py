@@ -0,0 +1,234 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import os.path
+import glob
+
+import pytest
+
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser import record_iterator
+from marcxml_parser import backends
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
+
+
+# Functions & classes =========================================================
+def data_files():
+    return sorted(glob.glob(os.path.join(DATA_DIR, "*.xml")))
+
+
+def assert_same_records(first, second):
+    assert first.oai_marc == second.oai_marc
+    assert first.leader == second.leader
+    assert first.controlfields == second.controlfields
+    assert first.datafields == second.datafields
+
+    # MARCSubrecords are compared as strings, check also the indicators
+    for tag, fields in first.datafields.items():
+        for field, other_field in zip(fields, second.datafields[tag]):
+            for code, subfields in field.items():
+                if not isinstance(subfields, list):
+                    continue
+
+                for sub, other_sub in zip(subfields, other_field[code]):
+                    assert (sub.i1, sub.i2) == (other_sub.i1, other_sub.i2)
+                    assert sub.other_subfields == other_sub.other_subfields
+
+    assert first.to_XML() == second.to_XML()
+
+
+# Tests =======================================================================
+def test_get_backend():
+    assert backends.get_backend() is backends.BACKENDS["dhtmlparser"]
+    assert backends.get_backend("expat") is backends.expat_backend
+
+    with pytest.raises(ValueError):
+        backends.get_backend("azgabash")
+
+
+@pytest.mark.parametrize("fn", data_files())
+def test_backends_agree(fn):
+    with open(fn) as f:
+        data = f.read()
+
+    reference = list(record_iterator(data))
+    records = list(record_iterator(data, backend="expat"))
+
+    assert records
+    assert len(records) == len(reference)
+    for record, ref in zip(records, reference):
+        assert record.backend is backends.expat_backend
+        assert_same_records(record, ref)
+
+
+@pytest.mark.parametrize("backend", backends.BACKENDS.keys())
+def test_no_record(backend):
+    with pytest.raises(ValueError):
+        backends.get_backend(backend).parse_record("<root><x /></root>")
+
+
+def test_expat_keeps_entities():
+    raw = backends.expat_backend.parse_record("""<record>
+<datafield tag="856" ind1="4" ind2="2">
+<subfield code="u"> http://a.cz/?a=1&amp;b=&quot;2&quot; </subfield>
+<subfield code="x"/>
+</datafield>
+</record>""")
+
+    assert raw.datafields == [
+        ("856", "4", "2", [
+            ("u", "http://a.cz/?a=1&amp;b=&quot;2&quot;"),
+            ("x", ""),
+        ]),
+    ]
+
+
+@pytest.mark.parametrize("backend", backends.BACKENDS.keys())
+def test_gt_in_attributes(backend):
+    raw = backends.get_backend(backend).parse_record("""<record>
+<leader note="a>b">-----nam-a22------a-4500</leader>
+<controlfield tag="001" note="x>y">xe</controlfield>
+<datafield tag="245" ind1="1" ind2="0" note="&gt;>">
+<subfield code="a" note="a>b">Title</subfield>
+<subfield code="b" note=">"><!-- x>y -->Subtitle</subfield>
+<subfield code="c" note="a>b"/>
+</datafield>
+</record>""")
+
+    assert raw.leader == "-----nam-a22------a-4500"
+    assert raw.controlfields == [("001", "xe")]
+    assert raw.datafields[0][:3] == ("245", "1", "0")
+    assert raw.datafields[0][3][0] == ("a", "Title")
+    assert raw.datafields[0][3][1][1].endswith("Subtitle")
+    assert raw.datafields[0][3][2] == ("c", "")
+
+
+def test_gt_in_attributes_backends_agree():
+    data = """<record>
+<datafield tag="245" ind1="1" ind2="0">
+<subfield code="a" note="a>b">Title</subfield>
+<subfield code="b" note=">"><!-- x>y -->Subtitle</subfield>
+</datafield>
+</record>"""
+
+    reference = list(record_iterator(data))
+    records = list(record_iterator(data, backend="expat"))
+
+    assert records[0]["245a"] == ["Title"]
+    assert_same_records(records[0], reference[0])
+
+
+def test_expat_malformed_xml():
+    with pytest.raises(ValueError):
+        backends.expat_backend.parse_record("<record><leader></record>")
+
+
+@pytest.mark.parametrize("backend", backends.BACKENDS.keys())
+def test_comments_and_unknown_elements(backend):
+    raw = backends.get_backend(backend).parse_record("""<record>
+<!-- <controlfield tag="002">commented out</controlfield> -->
+<leader>-----nam-a22------a-4500</leader>
+<controlfield tag="001">xe</controlfield>
+<controlfield>no tag</controlfield>
+<datafield tag="020" ind1="1">
+<subfield code="a">isbn</subfield>
+<subfield>no code</subfield>
+</datafield>
+<unknown><datafield tag="999"></datafield></unknown>
+</record>""")
+
+    assert raw.oai_marc is False
+    assert raw.leader == "-----nam-a22------a-4500"
+    assert raw.controlfields == [("001", "xe")]
+    assert raw.datafields == [
+        ("020", "1", " ", [("a", "isbn")]),
+        ("999", " ", " ", []),
+    ]
+
+
+def test_tag_filter():
+    assert backends.tag_filter(None) is None
+    assert backends.tag_filter(["020", "245ab", "245n", "100a", "100"]) == {
+        "020": None,
+        "245": frozenset("abn"),
+        "100": None,
+    }
+    assert backends.tag_filter("245a") == {"245": frozenset("a")}
+
+    tags = {"245": None}
+    assert backends.tag_filter(tags) is tags
+
+    with pytest.raises(ValueError):
+        backends.tag_filter(["24"])
+
+
+@pytest.mark.parametrize("backend", backends.BACKENDS.keys())
+@pytest.mark.parametrize("lazy", [False, True])
+def test_tags_projection(backend, lazy):
+    tags = backends.tag_filter(["020", "245ab", "856u"])
+
+    for fn in data_files():
+        with open(fn) as f:
+            data = f.read()
+
+        for record in record_iterator(data):
+            projected = MARCXMLRecord(
+                record._original_xml,
+                backend=backend,
+                lazy=lazy,
+                tags=tags,
+            )
+
+            assert projected.controlfields == record.controlfields
+            assert set(projected.datafields) <= set(tags)
+            assert projected["020a"] == record["020a"]
+            assert projected["245a"] == record["245a"]
+            assert projected["245b"] == record["245b"]
+            assert projected["245c"] == []
+            assert projected["856u"] == record["856u"]
+            assert projected["856z"] == []
+
+
+def test_filter_fields():
+    fields = [
+        ("020", " ", " ", [("a", "x"), ("z", "y")]),
+        ("100", " ", " ", [("a", "x")]),
+    ]
+
+    assert backends.filter_fields(fields, None) is fields
+    assert backends.filter_fields(fields, {"020": frozenset("z")}) == [
+        ("020", " ", " ", [("z", "y")]),
+    ]
+
+
+@pytest.mark.parametrize("backend", backends.BACKENDS.keys())
+def test_field_sources(backend):
+    fields = [
+        """<datafield tag='245' ind1="1" ind2="0" note="a>b">
+<subfield code="a">Title &amp; <!-- x>y --></subfield>
+<subfield code="b"/>
+</datafield >""",
+        '<datafield tag="100" ind1="1" ind2=" ">'
+        '<subfield code="a">Name</subfield></datafield>',
+        """<datafield tag="020" ind1=" " ind2=" "/>""",
+    ]
+    data = "<record>\n%s\n</record>" % "\n".join(fields)
+    parse_record = backends.get_backend(backend).parse_record
+
+    raw = parse_record(data, sources=True)
+    assert len(raw.sources) == len(raw.datafields)
+    assert raw.sources[:2] == fields[:2]
+    assert raw.sources[2] in (None, fields[2])
+
+    raw = parse_record(data, tags={"245": frozenset("a"), "100": None},
+                       sources=True)
+    assert raw.sources == [None, fields[1]]
+
+    assert parse_record(data).sources is None
+    assert parse_record(data, lazy=True, sources=True).sources is None
@@ -9,3 +9,4 @@ def test_structures_imports():
     from marcxml_parser.structures import Corporation
     from marcxml_parser.structures import MARCSubrecord
     from marcxml_parser.structures import PublicationType
+    from marcxml_parser.structures import DataField
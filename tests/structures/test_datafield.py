@@ -0,0 +1,71 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import pickle
+from collections import OrderedDict
+
+from marcxml_parser.structures import DataField
+from marcxml_parser.structures.datafield import ordered_subfields
+
+
+# Functions & classes =========================================================
+def datafield():
+    field = DataField([["ind1", "1"], ["ind2", "0"]])
+
+    for code, value in [("a", "A"), ("n", "N1"), ("p", "P1"), ("n", "N2")]:
+        field.add_subfield(code, value)
+
+    return field
+
+
+# Tests =======================================================================
+def test_datafield():
+    field = datafield()
+
+    assert field == OrderedDict([
+        ["ind1", "1"],
+        ["ind2", "0"],
+        ["a", ["A"]],
+        ["n", ["N1", "N2"]],
+        ["p", ["P1"]],
+    ])
+    assert ordered_subfields(field) == \
+        [("a", "A"), ("n", "N1"), ("p", "P1"), ("n", "N2")]
+
+
+def test_ordered_subfields_changed_field():
+    # values replaced in place keep their position
+    field = datafield()
+    field["n"][0] = "changed"
+    assert ordered_subfields(field) == \
+        [("a", "A"), ("n", "changed"), ("p", "P1"), ("n", "N2")]
+
+    field = datafield()
+    field["n"].append("N3")
+    assert ordered_subfields(field) == \
+        [("a", "A"), ("n", "N1"), ("n", "N2"), ("n", "N3"), ("p", "P1")]
+
+    field = datafield()
+    del field["p"]
+    assert ordered_subfields(field) == [("a", "A"), ("n", "N1"), ("n", "N2")]
+
+    field = datafield()
+    field["b"] = ["B"]
+    assert ordered_subfields(field)[-1] == ("b", "B")
+
+
+def test_ordered_subfields_plain_dict():
+    field = OrderedDict([["i1", " "], ["i2", " "], ["a", ["A"]], ["b", ["B"]]])
+
+    assert ordered_subfields(field) == [("a", "A"), ("b", "B")]
+
+
+def test_datafield_pickle():
+    field = pickle.loads(pickle.dumps(datafield(), 2))
+
+    assert isinstance(field, DataField)
+    assert ordered_subfields(field) == \
+        [("a", "A"), ("n", "N1"), ("p", "P1"), ("n", "N2")]
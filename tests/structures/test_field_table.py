@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+from marcxml_parser.structures import FieldTable
+
+
+# Variables ===================================================================
+FIELDS = [
+    ("020", " ", " ", [("a", "80-251-0225-4"), ("c", "Kč 100")]),
+    ("245", "1", "0", [("a", "Title"), ("b", "subtitle"), ("a", "again")]),
+    ("020", " ", " ", [("a", "978-80-251-0225-9")]),
+    ("500", " ", " ", []),
+]
+
+
+# Tests =======================================================================
+def test_field_table_mapping():
+    table = FieldTable(FIELDS)
+
+    assert list(table) == ["020", "245", "500"]
+    assert len(table) == 3
+    assert "245" in table
+    assert "600" not in table
+    assert table.get("600") is None
+
+    first, second = table["020"]
+    assert first["a"] == ["80-251-0225-4"]
+    assert first["c"] == ["Kč 100"]
+    assert second["a"] == ["978-80-251-0225-9"]
+
+    title = table["245"][0]
+    assert title.keys() == ["ind1", "ind2", "a", "b"]
+    assert title["a"] == ["Title", "again"]
+    assert title["a"][0].i1 == "1"
+    assert title["a"][0].i2 == "0"
+    assert title["a"][0].other_subfields is title
+
+    assert table["500"] == [{"ind1": " ", "ind2": " "}]
+
+
+def test_field_table_i_names():
+    table = FieldTable(FIELDS, "i1", "i2")
+
+    assert table["245"][0]["i1"] == "1"
+    assert table["245"][0]["i2"] == "0"
+
+
+def test_field_table_iter_fields():
+    assert list(FieldTable(FIELDS).iter_fields()) == FIELDS
+
+
+def test_field_table_thaw():
+    thawed = FieldTable(FIELDS).thaw()
+
+    assert thawed.keys() == ["020", "245", "500"]
+    assert len(thawed["020"]) == 2
+    assert thawed["245"][0]["b"] == ["subtitle"]
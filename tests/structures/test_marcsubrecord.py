@@ -4,6 +4,8 @@
 # Interpreter version: python 2.7
 #
 # Imports =====================================================================
+import pickle
+
 from marcxml_parser.structures import MARCSubrecord
 
 
@@ -30,3 +32,59 @@ def test_MARCSubrecord_class():
     assert m.i1 == "1"
     assert m.i2 == "2"
     assert m.other_subfields == []
+
+
+def test_MARCSubrecord_shared_context():
+    context = MARCSubrecord.context("1", " ", {})
+
+    first = MARCSubrecord.from_context("first", context)
+    second = MARCSubrecord.from_context("second", context)
+
+    assert first == "first"
+    assert first.val == "first"
+    assert type(first.val) is str
+    assert type(str(first)) is str
+    assert second.i1 == "1"
+    assert second.i2 == " "
+
+    assert first.__dict__ is second.__dict__
+
+
+def test_MARCSubrecord_copy_on_write():
+    context = MARCSubrecord.context("1", " ", {})
+
+    first = MARCSubrecord.from_context("first", context)
+    second = MARCSubrecord.from_context("second", context)
+
+    first.i1 = "2"
+    first.note = "azgabash"
+    assert (first.i1, first.note) == ("2", "azgabash")
+    assert second.i1 == "1"
+    assert not hasattr(second, "note")
+    assert context == MARCSubrecord.context("1", " ", {})
+
+    del second.i2
+    assert first.i2 == " "
+    assert not hasattr(second, "i2")
+
+    # the other subfields are still the same datafield
+    assert first.other_subfields is second.other_subfields
+
+
+def test_MARCSubrecord_pickle():
+    field = {"ind1": "1", "ind2": " "}
+    context = MARCSubrecord.context("1", " ", field)
+    field["a"] = [
+        MARCSubrecord.from_context("first", context),
+        MARCSubrecord.from_context("second", context),
+    ]
+
+    for protocol in range(3):
+        unpickled = pickle.loads(pickle.dumps(field, protocol))
+
+        first, second = unpickled["a"]
+        assert isinstance(first, MARCSubrecord)
+        assert first == "first"
+        assert second.i1 == "1"
+        assert first.other_subfields is unpickled
+        assert first.__dict__ is second.__dict__
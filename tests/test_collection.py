@@ -0,0 +1,121 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import gzip
+import StringIO
+from xml.etree import ElementTree
+
+import pytest
+
+from marcxml_parser import record_iterator
+from marcxml_parser.collection import write_collection
+
+from test_offset_index import collection
+
+
+# Functions & classes =========================================================
+class FlushCounter(StringIO.StringIO):
+    def __init__(self):
+        StringIO.StringIO.__init__(self)
+        self.flushes = 0
+
+    def flush(self):
+        self.flushes += 1
+
+
+def write_to_string(records):
+    output = StringIO.StringIO()
+    write_collection(records, output)
+
+    return output.getvalue()
+
+
+@pytest.fixture
+def records(collection):
+    with open(collection) as f:
+        return list(record_iterator(f))
+
+
+# Tests =======================================================================
+def test_write_collection(records):
+    output = StringIO.StringIO()
+
+    assert write_collection(records, output) == len(records)
+
+    data = output.getvalue()
+    assert data.startswith('<?xml version="1.0" encoding="UTF-8"?>\n')
+    assert "<collection" in data
+    assert data.endswith("</collection>\n")
+
+    written = list(record_iterator(data))
+    assert len(written) == len(records)
+    for record, written_record in zip(records, written):
+        assert not written_record.oai_marc
+        assert written_record.controlfields == dict(
+            (key, val)
+            for key, val in record.controlfields.items()
+            if key.isdigit()
+        )
+        assert sorted(written_record.datafields) == \
+            sorted(record.datafields)
+        assert written_record["245a"] == record["245a"]
+        assert written_record.get_ISBNs() == record.get_ISBNs()
+
+
+def test_write_collection_oai(records):
+    output = StringIO.StringIO()
+
+    write_collection(records, output, oai_marc=True, resumption_token="xe")
+
+    data = output.getvalue()
+    assert "<ListRecords>" in data
+    assert "<resumptionToken>xe</resumptionToken>" in data
+
+    written = list(record_iterator(data))
+    assert len(written) == len(records)
+    assert all(record.oai_marc for record in written)
+    assert [r.get_ISBNs() for r in written] == \
+        [r.get_ISBNs() for r in records]
+
+
+def test_write_collection_oai_escaping(records):
+    output = StringIO.StringIO()
+
+    write_collection(
+        records,
+        output,
+        oai_marc=True,
+        base_url="http://a.cz/oai?x=<1>&y=2",
+        resumption_token="set=a&from=2015&<x>",
+    )
+
+    ns = "{http://www.openarchives.org/OAI/2.0/}"
+    root = ElementTree.fromstring(output.getvalue())
+
+    assert root.find(ns + "request").text == "http://a.cz/oai?x=<1>&y=2"
+    assert root.find(ns + "ListRecords/" + ns + "resumptionToken").text == \
+        "set=a&from=2015&<x>"
+
+
+def test_write_collection_gzip(records, tmpdir):
+    path = str(tmpdir.join("collection.xml.gz"))
+
+    write_collection(records, path, use_gzip=True, buffer_size=10)
+
+    with gzip.open(path) as f:
+        written = list(record_iterator(f))
+
+    assert [r.to_XML() for r in written] == \
+        [r.to_XML() for r in record_iterator(write_to_string(records))]
+
+
+def test_write_collection_flush(records):
+    output = FlushCounter()
+
+    write_collection(records, output, flush_every=3)
+
+    assert output.flushes == len(records) / 3 + 1
+    assert output.getvalue() == write_to_string(records)
@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import StringIO
+
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser import record_iterator
+from marcxml_parser.convert import main
+from marcxml_parser.convert import convert
+from marcxml_parser.convert import convert_record
+
+from test_offset_index import collection
+from test_parser import unix_file
+from test_query import epub_file
+
+
+# Functions & classes =========================================================
+def convert_to_string(path, oai_marc, **kwargs):
+    output = StringIO.StringIO()
+    count = convert(path, output, oai_marc, **kwargs)
+
+    return count, output.getvalue()
+
+
+# Tests =======================================================================
+def test_convert_record_to_marc(epub_file):
+    xml = convert_record(epub_file, oai_marc=False)
+
+    assert "<controlfield" in xml
+    assert "<fixfield" not in xml
+    assert 'ind1="' in xml
+
+    record = list(record_iterator(xml))[0]
+    assert not record.oai_marc
+    assert record.leader
+    assert "LDR" not in record.controlfields
+    assert "FMT" not in record.controlfields
+
+
+def test_convert_record_to_oai(unix_file):
+    xml = convert_record(unix_file, oai_marc=True)
+
+    assert "<varfield" in xml
+    assert "<datafield" not in xml
+    assert 'i1="' in xml
+
+    record = list(record_iterator(xml))[0]
+    assert record.oai_marc
+    assert record.controlfields["LDR"] == record.leader
+
+
+def test_ldr_only_in_conversion(unix_file):
+    record = MARCXMLRecord(unix_file)
+    assert "LDR" not in record.to_XML(oai_marc=True)
+
+    record.oai_marc = True
+    assert "LDR" not in record.to_XML()
+    assert "LDR" in record.to_XML(leader_fixfield=True)
+
+
+def test_convert(collection):
+    with open(collection) as f:
+        records = list(record_iterator(f))
+
+    count, data = convert_to_string(collection, oai_marc=False)
+    assert count == len(records)
+    assert "<collection" in data
+
+    converted = list(record_iterator(data))
+    assert len(converted) == len(records)
+    for record, converted_record in zip(records, converted):
+        assert converted_record.to_XML() == record.to_XML(oai_marc=False)
+
+    count, data = convert_to_string(collection, oai_marc=True)
+    assert count == len(records)
+    assert "<OAI-PMH" in data
+
+    converted = list(record_iterator(data))
+    assert all(record.oai_marc for record in converted)
+    assert [record.to_XML() for record in converted] == [
+        record.to_XML(oai_marc=True, leader_fixfield=True)
+        for record in records
+    ]
+
+
+def test_convert_workers(collection):
+    serial = convert_to_string(collection, oai_marc=True)[1]
+    parallel = convert_to_string(
+        collection,
+        oai_marc=True,
+        workers=2,
+        batch_size=2
+    )[1]
+
+    strip_date = lambda data: data.split("</responseDate>", 1)[1]
+
+    assert strip_date(parallel) == strip_date(serial)
+
+
+def test_main(collection, tmpdir):
+    target = str(tmpdir.join("out.xml"))
+
+    main([collection, target, "--to", "oai", "--workers", "2"])
+
+    with open(target) as f:
+        converted = list(record_iterator(f))
+
+    with open(collection) as f:
+        assert len(converted) == len(list(record_iterator(f)))
+
+    assert all(record.oai_marc for record in converted)
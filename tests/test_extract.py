@@ -0,0 +1,150 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import csv
+import json
+import StringIO
+from collections import OrderedDict
+
+import pytest
+
+from marcxml_parser import tools
+from marcxml_parser import record_iterator
+from marcxml_parser.extract import Column
+from marcxml_parser.extract import extract
+from marcxml_parser.extract import write_csv
+from marcxml_parser.extract import write_jsonl
+from marcxml_parser.extract import extract_row
+from marcxml_parser.extract import iter_batches
+
+from test_offset_index import collection
+
+
+# Variables ===================================================================
+GETTERS = [
+    "get_name",
+    "get_authors",
+    "get_ISBNs",
+    "get_pub_type",
+    "is_continuing",
+    "245abnp",
+]
+
+
+# Functions & classes =========================================================
+@pytest.fixture
+def records(collection):
+    with open(collection) as f:
+        return list(record_iterator(f))
+
+
+# Tests =======================================================================
+def test_column():
+    column = Column.from_rows("x", ["a", None, "b"])
+    assert not column.is_multi
+    assert list(column) == ["a", None, "b"]
+
+    column.extend(Column.from_rows("x", [["c", "d"], []]))
+    assert column.is_multi
+    assert column.values == ["a", "b", "c", "d"]
+    assert column.offsets == [0, 1, 1, 2, 4, 4]
+    assert list(column) == [["a"], [], ["b"], ["c", "d"], []]
+    assert column[-2] == ["c", "d"]
+    assert len(column) == 5
+
+    with pytest.raises(IndexError):
+        column[5]
+
+
+def test_extract_row(records):
+    record = records[-1]
+    row = extract_row(record, GETTERS)
+
+    assert row[0] == record.get_name()
+    assert type(row[0]) is str
+    assert row[1] == record.get_authors()
+    assert row[2] == record.get_ISBNs()
+    assert row[3] == record.get_pub_type().name
+    assert row[4] is record.is_continuing()
+    assert row[5] == record["245abnp"]
+
+    assert extract_row(record.to_XML(), GETTERS) == row
+
+    with pytest.raises(ValueError):
+        extract_row(record, ["get_azgabash"])
+
+    with pytest.raises(ValueError):
+        extract_row(record, ["get_name", "get_name"])
+
+
+def test_extract(records):
+    columns = extract(records, GETTERS, batch_size=3)
+
+    assert columns.keys() == GETTERS
+    assert not columns["get_name"].is_multi
+    assert columns["get_ISBNs"].is_multi
+    assert columns["get_ISBNs"].offsets[-1] == len(columns["get_ISBNs"].values)
+
+    for cnt, record in enumerate(records):
+        assert columns["get_name"][cnt] == record.get_name()
+        assert columns["get_authors"][cnt] == record.get_authors()
+        assert columns["get_ISBNs"][cnt] == record.get_ISBNs()
+        assert columns["245abnp"][cnt] == record["245abnp"]
+
+
+def test_extract_parallel(collection, records):
+    with open(collection) as f:
+        raw_records = list(tools.split_records(f))
+
+    serial = extract(records, GETTERS)
+    parallel = extract(raw_records, GETTERS, workers=2, batch_size=2)
+
+    for name in GETTERS:
+        assert list(parallel[name]) == list(serial[name])
+
+
+def test_iter_batches(records):
+    batches = list(iter_batches(records, ["get_ISBNs"], batch_size=4))
+
+    assert [len(batch["get_ISBNs"]) for batch in batches] == [4, 4, 2]
+
+
+def test_write_csv(records):
+    output = StringIO.StringIO()
+    assert write_csv(records, GETTERS, output, batch_size=3) == len(records)
+
+    rows = list(csv.reader(StringIO.StringIO(output.getvalue())))
+    assert rows[0] == GETTERS
+    assert len(rows) == len(records) + 1
+
+    unix = next(row for row in rows if "80-251-0225-4" in row[2])
+    assert unix[1] == "Eric S. Raymond"
+    assert unix[3] == "monographic"
+    assert unix[4] == "False"
+
+
+def test_write_jsonl(records, tmpdir):
+    path = str(tmpdir.join("out.jsonl"))
+    assert write_jsonl(records, GETTERS, path, workers=2) == len(records)
+
+    with open(path) as f:
+        lines = [
+            json.loads(line, object_pairs_hook=OrderedDict)
+            for line in f
+        ]
+
+    assert len(lines) == len(records)
+    for line, record in zip(lines, records):
+        assert line.keys() == GETTERS
+        assert line["get_ISBNs"] == record.get_ISBNs()
+        assert len(line["get_authors"]) == len(record.get_authors())
+
+    unix = next(
+        line
+        for line in lines
+        if line["get_ISBNs"] == ["80-251-0225-4"]
+    )
+    assert unix["get_authors"][0]["surname"] == "Raymond"
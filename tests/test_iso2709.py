@@ -0,0 +1,188 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import StringIO
+
+import pytest
+
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser.iso2709 import parse_iso2709
+from marcxml_parser.iso2709 import write_iso2709
+from marcxml_parser.iso2709 import iso2709_iterator
+
+from test_serializer import aleph_files
+
+
+# Functions & classes =========================================================
+def binary_record(leader, fields):
+    """
+    Put together the binary record from list of ``(tag, data)`` tuples.
+    """
+    directory = ""
+    body = ""
+    for tag, data in fields:
+        data += "\x1e"
+        directory += "%s%04d%05d" % (tag, len(data), len(body))
+        body += data
+
+    directory += "\x1e"
+    base_address = 24 + len(directory)
+    length = base_address + len(body) + 1
+
+    leader = "%05d%s%05d%s" % (length, leader[5:12], base_address, leader[17:])
+
+    return leader + directory + body + "\x1d"
+
+
+@pytest.fixture
+def mrc():
+    return binary_record(
+        "00000cam a2200000 a 4500",
+        [
+            ("001", "cpk20051492461"),
+            ("008", "041216s2004    xr a   e f    001 0 cze  "),
+            ("020", "  \x1fa80-251-0225-4 (brož.) :\x1fcKč 590,00"),
+            ("100", "1 \x1faRaymond, Eric S.\x1f4aut"),
+            ("245", "10\x1faUmění programování v UNIXu /\x1fcEric S. Raymond"),
+            ("856", "42\x1fuhttp://a.cz/?a=1&b=2"),
+            ("FMT", "BK"),
+        ]
+    )
+
+
+@pytest.fixture
+def mrc_controlfields_first():
+    """
+    Same record as :func:`mrc`, but in the order written by
+    :meth:`.to_ISO2709` - all controlfields before the datafields.
+    """
+    return binary_record(
+        "00000cam a2200000 a 4500",
+        [
+            ("001", "cpk20051492461"),
+            ("008", "041216s2004    xr a   e f    001 0 cze  "),
+            ("FMT", "BK"),
+            ("020", "  \x1fa80-251-0225-4 (brož.) :\x1fcKč 590,00"),
+            ("100", "1 \x1faRaymond, Eric S.\x1f4aut"),
+            ("245", "10\x1faUmění programování v UNIXu /\x1fcEric S. Raymond"),
+            ("856", "42\x1fuhttp://a.cz/?a=1&b=2"),
+        ]
+    )
+
+
+# Tests =======================================================================
+def test_parse_iso2709(mrc):
+    raw = parse_iso2709(mrc)
+
+    assert raw.oai_marc is False
+    assert raw.leader == mrc[:24]
+    assert raw.controlfields == [
+        ("001", "cpk20051492461"),
+        ("008", "041216s2004    xr a   e f    001 0 cze  "),
+        ("FMT", "BK"),
+    ]
+    assert raw.datafields[0] == (
+        "020", " ", " ", [("a", "80-251-0225-4 (brož.) :"), ("c", "Kč 590,00")]
+    )
+    assert raw.datafields[-1] == (
+        "856", "4", "2", [("u", "http://a.cz/?a=1&amp;b=2")]
+    )
+
+
+def test_iso2709_iterator(mrc):
+    records = list(iso2709_iterator(StringIO.StringIO(mrc + "\n" + mrc)))
+
+    assert len(records) == 2
+
+    record = records[0]
+    assert isinstance(record, MARCXMLRecord)
+    assert record["001"] == "cpk20051492461"
+    assert record.get_ISBNs() == ["80-251-0225-4"]
+    assert record.get_name() == "Umění programování v UNIXu"
+    assert record.get_urls() == ["http://a.cz/?a=1&b=2"]
+    assert record.get_authors()[0].surname == "Raymond"
+
+    subfield = record["245c"][0]
+    assert (subfield.i1, subfield.i2) == ("1", "0")
+
+
+def test_iso2709_iterator_string(mrc):
+    assert len(list(iso2709_iterator(mrc * 3))) == 3
+
+
+def test_iso2709_iterator_truncated(mrc):
+    with pytest.raises(ValueError):
+        list(iso2709_iterator(mrc[:-10]))
+
+    with pytest.raises(ValueError):
+        list(iso2709_iterator("xxxxx" + mrc))
+
+
+def test_to_ISO2709(mrc_controlfields_first):
+    mrc = mrc_controlfields_first
+    record = list(iso2709_iterator(mrc, resort=False))[0]
+
+    assert record.to_ISO2709() == mrc
+
+
+def test_to_ISO2709_field_order(mrc, mrc_controlfields_first):
+    record = list(iso2709_iterator(mrc, resort=False))[0]
+
+    assert record.to_ISO2709() == mrc_controlfields_first
+
+
+def test_to_ISO2709_unicode_leader():
+    record = MARCXMLRecord()
+    record.leader = u"00000cam a2200000 a 4500"
+    record.add_data_field("245", "1", "0", {"a": "Umění"})
+
+    parsed = list(iso2709_iterator(record.to_ISO2709()))[0]
+    assert parsed.leader[5:] == "cam a2200037 a 4500"
+    assert parsed["245a"] == ["Umění"]
+
+
+def test_to_ISO2709_char_refs():
+    record = MARCXMLRecord()
+    record.add_data_field("245", "1", "0", {"a": "Caf&#233; &#x10D;aj &lt;"})
+
+    data = record.to_ISO2709()
+    assert "Café čaj <" in data
+    assert "&#" not in data
+
+
+def test_to_ISO2709_blank_record():
+    record = MARCXMLRecord()
+    record.add_data_field("245", "1", "0", {"a": "Název &amp; co"})
+
+    data = record.to_ISO2709()
+    assert data.endswith("\x1d")
+    assert int(data[:5]) == len(data)
+
+    parsed = list(iso2709_iterator(data))[0]
+    assert parsed["245a"] == ["Název &amp; co"]
+
+
+def test_write_iso2709_aleph_files():
+    records = []
+    for fn in aleph_files():
+        with open(fn) as f:
+            records.append(MARCXMLRecord(f.read(), resort=False))
+
+    out = StringIO.StringIO()
+    assert write_iso2709(records, out) == len(records)
+
+    parsed = list(iso2709_iterator(out.getvalue(), resort=False))
+    assert len(parsed) == len(records)
+
+    for record, orig in zip(parsed, records):
+        controlfields = orig.controlfields.copy()
+        controlfields.pop("LDR", None)
+
+        assert record.leader[5:] == orig.leader[5:10] + "22" + \
+            record.leader[12:17] + orig.leader[17:20] + "4500"
+        assert record.controlfields == controlfields
+        assert record.datafields.keys() == orig.datafields.keys()
+        assert record.to_ISO2709() == orig.to_ISO2709()
@@ -0,0 +1,252 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import os.path
+
+import pytest
+
+from marcxml_parser import offset_index
+from marcxml_parser import record_iterator
+from marcxml_parser.offset_index import RecordIndex
+from marcxml_parser.offset_index import build_index
+from marcxml_parser.offset_index import update_index
+from marcxml_parser.offset_index import normalize_key
+
+from test_serializer import aleph_files
+
+
+# Fixtures ====================================================================
+@pytest.fixture
+def collection(tmpdir):
+    data = "<collection>\n"
+    for fn in sorted(aleph_files()):
+        with open(fn) as f:
+            data += f.read()
+    data += "</collection>\n"
+
+    path = tmpdir.join("collection.xml")
+    path.write(data, mode="wb")
+
+    return str(path)
+
+
+# Tests =======================================================================
+def test_build_index(collection):
+    index_path = build_index(collection)
+
+    assert index_path == collection + ".idx"
+    assert os.path.exists(index_path)
+
+    with open(collection) as f:
+        reference = list(record_iterator(f))
+
+    with RecordIndex(collection) as index:
+        assert len(index) == len(reference) == 10
+        assert index.key_count == 0
+
+        for cnt, ref in enumerate(reference):
+            assert index[cnt].to_XML() == ref.to_XML()
+            assert index[cnt].source_span == index.get_span(cnt)
+
+        assert index[-1].to_XML() == reference[-1].to_XML()
+        assert len(list(index)) == 10
+
+        with pytest.raises(IndexError):
+            index[10]
+
+
+def test_index_keys(collection, tmpdir):
+    index_path = str(tmpdir.join("custom.idx"))
+    build_index(collection, index_path, keys=["001", "isbn"])
+
+    with RecordIndex(collection, index_path, backend="expat") as index:
+        assert index.key_count > 10
+
+        ordinals = index.find("001", "cpk20051492461")
+        assert len(ordinals) == 1
+        assert index[ordinals[0]]["001"] == "cpk20051492461"
+
+        records = index.get_records("isbn", "80-251-0225-4")
+        assert len(records) == 1
+        assert "80-251-0225-4" in records[0].get_ISBNs()
+
+        assert index.find("001", "azgabash") == []
+        assert index.find("isbn", "cpk20051492461") == []
+
+
+def test_index_unknown_key(collection):
+    with pytest.raises(ValueError):
+        build_index(collection, keys=["azgabash"])
+
+
+def test_blank_collection(tmpdir):
+    path = tmpdir.join("blank.xml")
+    path.write("")
+
+    build_index(str(path), keys=["001"])
+
+    with RecordIndex(str(path)) as index:
+        assert len(index) == 0
+        assert index.find("001", "x") == []
+
+
+def test_normalize_key():
+    assert normalize_key("isbn", "80-251-0225-4") == "8025102254"
+    assert normalize_key("isbn", " 80-85892-15-x ") == "808589215X"
+    assert normalize_key("issn", "1213-8215") == "12138215"
+    assert normalize_key("001", " cpk20051492461 ") == "cpk20051492461"
+    assert normalize_key("author", "Raymond, Eric S.") == "eric raymond s"
+    assert normalize_key("author", u"Jiří, Kulhánek") == "jiri kulhanek"
+    assert normalize_key("author", "Kulh\xc3\xa1nek Ji\xc5\x99\xc3\xad") == \
+        "jiri kulhanek"
+    assert normalize_key("azgabash", " X ") == " X "
+
+
+def test_index_normalized_keys(collection):
+    build_index(collection, keys=["isbn", "issn", "author"])
+
+    with RecordIndex(collection) as index:
+        assert index.keys == ("isbn", "issn", "author")
+
+        assert index.find("isbn", "8025102254") == \
+            index.find("isbn", "80-251-0225-4")
+        assert len(index.find("isbn", "8025102254")) == 1
+
+        records = index.get_records("issn", "12138215")
+        assert len(records) == 1
+        assert records[0].get_ISSNs() == ["1213-8215"]
+
+        records = index.get_records("author", "Eric S. Raymond")
+        assert len(records) == 1
+        assert records[0].get_authors()[0].surname == "Raymond"
+
+        assert len(index.find("author", "kulhanek jiri")) == 1
+
+
+def test_index_workers(collection, tmpdir):
+    parallel_path = str(tmpdir.join("parallel.idx"))
+
+    build_index(collection, keys=["001", "isbn", "author"])
+    build_index(
+        collection,
+        parallel_path,
+        keys=["001", "isbn", "author"],
+        workers=2,
+        batch_size=3
+    )
+
+    with open(collection + ".idx", "rb") as f:
+        with open(parallel_path, "rb") as parallel:
+            assert f.read() == parallel.read()
+
+
+def test_update_index(collection, monkeypatch):
+    with open(collection, "rb") as f:
+        data = f.read()
+
+    head, footer = data.rsplit("</collection>", 1)
+    first_record = data[data.index("<record"):data.index("</record>") + 9]
+
+    build_index(collection, keys=["001", "isbn"])
+
+    # append the copy of the first record
+    with open(collection, "wb") as f:
+        f.write(head + first_record + "\n</collection>" + footer)
+
+    # appended records don't invalidate the index
+    with RecordIndex(collection) as index:
+        assert len(index) == 10
+        assert index.is_valid()
+
+    # only the new record is parsed
+    parsed = []
+    record_keys = offset_index._record_keys
+    monkeypatch.setattr(
+        offset_index,
+        "_record_keys",
+        lambda xml, *args: parsed.append(xml) or record_keys(xml, *args)
+    )
+
+    update_index(collection)
+    assert parsed == [first_record]
+
+    with RecordIndex(collection) as index:
+        assert len(index) == 11
+        assert index.keys == ("001", "isbn")
+        assert index.is_valid()
+        assert index[10].to_XML() == index[0].to_XML()
+        assert index.find("001", index[0]["001"]) == [0, 10]
+
+    # same as the index built from the scratch
+    with open(collection + ".idx", "rb") as f:
+        updated = f.read()
+
+    build_index(collection, keys=["001", "isbn"])
+    with open(collection + ".idx", "rb") as f:
+        assert f.read() == updated
+
+    # nothing was appended, so the index is not rewritten
+    inode = os.stat(collection + ".idx").st_ino
+    update_index(collection)
+    assert os.stat(collection + ".idx").st_ino == inode
+
+    with RecordIndex(collection) as index:
+        assert len(index) == 11
+
+
+def test_update_index_rebuild(collection):
+    build_index(collection, keys=["001"])
+
+    # rewritten collection is indexed again
+    with open(collection, "rb") as f:
+        data = f.read()
+    with open(collection, "wb") as f:
+        f.write(data.replace("</record>", "</record >"))
+
+    with pytest.raises(ValueError):
+        RecordIndex(collection)
+
+    update_index(collection)
+    with RecordIndex(collection) as index:
+        assert index.is_valid()
+        assert len(index) == 10
+        assert index.keys == ("001",)
+
+    # different keys
+    update_index(collection, keys=["isbn"])
+    with RecordIndex(collection) as index:
+        assert index.keys == ("isbn",)
+        assert index.find("001", index[0]["001"]) == []
+
+
+def test_stale_index(collection):
+    build_index(collection, keys=["001"])
+
+    with open(collection, "rb") as f:
+        data = f.read()
+
+    # truncated collection
+    with open(collection, "wb") as f:
+        f.write(data[:len(data) // 2])
+
+    with pytest.raises(ValueError):
+        RecordIndex(collection)
+
+    # same size, different content of the last record
+    last = data.rindex("</record>")
+    with open(collection, "wb") as f:
+        f.write(data[:last - 1] + "!" + data[last:])
+
+    with pytest.raises(ValueError):
+        RecordIndex(collection)
+
+
+def test_update_missing_index(collection):
+    update_index(collection, keys=["001"])
+
+    with RecordIndex(collection) as index:
+        assert len(index) == 10
+        assert index.keys == ("001",)
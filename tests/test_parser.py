@@ -4,12 +4,15 @@
 # Interpreter version: python 2.7
 #
 # Imports =====================================================================
+import pickle
 import StringIO
 from collections import OrderedDict
 
 import pytest
 
+from marcxml_parser import tools
 from marcxml_parser.parser import MARCXMLParser
+from marcxml_parser.structures import FieldTable
 
 from test_serializer import aleph_files
 
@@ -356,3 +359,174 @@ def test_add_data_field_exceptions():
 
     with pytest.raises(ValueError):
         rec.add_data_field("OST", " ", "z", {"a": "bbb"})
+
+
+@pytest.mark.parametrize("backend", ["dhtmlparser", "expat"])
+def test_lazy_datafields(backend):
+    for fn in aleph_files():
+        with open(fn) as f:
+            data = f.read()
+
+        eager = MARCXMLParser(data, backend=backend)
+        lazy = MARCXMLParser(data, backend=backend, lazy=True)
+
+        assert lazy.leader == eager.leader
+        assert lazy.controlfields == eager.controlfields
+        assert not lazy._datafields  # not parsed yet
+
+        assert lazy.get_subfields("245", "a") == eager.get_subfields("245", "a")
+        assert lazy._datafields_loader is None
+        assert lazy.datafields == eager.datafields
+
+
+def test_lazy_add_data_field(record):
+    lazy = MARCXMLParser(unix_file(), lazy=True)
+    lazy.add_data_field("OST", " ", " ", {"a": "aaa"})
+
+    assert lazy.get_subfields("OST", "a") == ["aaa"]
+    assert lazy.datafields.keys() == record.datafields.keys() + ["OST"]
+
+
+def test_lazy_datafields_overwrite():
+    lazy = MARCXMLParser(unix_file(), lazy=True)
+    lazy.datafields = OrderedDict()
+
+    assert lazy.datafields == OrderedDict()
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_table_storage(lazy):
+    for fn in aleph_files():
+        with open(fn) as f:
+            data = f.read()
+
+        parsed = MARCXMLParser(data)
+        table = MARCXMLParser(data, lazy=lazy, storage="table")
+
+        assert isinstance(table.datafields, FieldTable)
+        assert table.datafields.keys() == parsed.datafields.keys()
+        assert table.datafields.thaw() == parsed.datafields
+
+        for tag in parsed.datafields:
+            assert table.get_subfields(tag, "a") == \
+                parsed.get_subfields(tag, "a")
+
+
+def test_table_storage_add_data_field(record):
+    table = MARCXMLParser(unix_file(), storage="table")
+    table.add_data_field("OST", " ", " ", {"a": "aaa"})
+
+    assert not isinstance(table.datafields, FieldTable)
+    assert table.get_subfields("OST", "a") == ["aaa"]
+    assert table.datafields.keys() == record.datafields.keys() + ["OST"]
+
+
+def test_unknown_storage():
+    with pytest.raises(ValueError):
+        MARCXMLParser(unix_file(), storage="azgabash")
+
+
+@pytest.mark.parametrize("storage", ["dict", "table"])
+def test_to_raw_record(storage):
+    for fn in aleph_files():
+        with open(fn) as f:
+            data = f.read()
+
+        parsed = MARCXMLParser(data, storage=storage)
+        rebuilt = MARCXMLParser(parsed.to_raw_record())
+
+        assert rebuilt.oai_marc == parsed.oai_marc
+        assert rebuilt.leader == parsed.leader
+        assert rebuilt.controlfields == parsed.controlfields
+        assert rebuilt.datafields == parsed.datafields
+
+
+@pytest.mark.parametrize("protocol", [0, 1, 2])
+@pytest.mark.parametrize("storage", ["dict", "table"])
+def test_pickle(protocol, storage):
+    for fn in aleph_files():
+        with open(fn) as f:
+            data = f.read()
+
+        parsed = MARCXMLParser(data, resort=False, storage=storage)
+        unpickled = pickle.loads(pickle.dumps(parsed, protocol))
+
+        assert not hasattr(unpickled, "_original_xml")
+        assert unpickled.storage == storage
+        assert unpickled.resorted is not tools.resorted
+        assert unpickled.oai_marc == parsed.oai_marc
+        assert unpickled.leader == parsed.leader
+        assert unpickled.controlfields == parsed.controlfields
+        assert unpickled.datafields == parsed.datafields
+
+        for fields in unpickled.datafields.values():
+            for field in fields:
+                for code, values in field.items():
+                    if isinstance(values, list):
+                        assert all(v.other_subfields is field for v in values)
+
+
+def test_pickle_options():
+    parsed = MARCXMLParser(
+        unix_file(),
+        backend="expat",
+        lazy=True,
+        tags=["020a"],
+        index_subfields=True,
+    )
+    unpickled = pickle.loads(pickle.dumps(parsed, 2))
+
+    assert unpickled.backend is parsed.backend
+    assert unpickled.lazy
+    assert unpickled.index_subfields
+    assert unpickled.tags == {"020": frozenset("a")}
+    assert unpickled.resorted is tools.resorted
+    assert unpickled.datafields == parsed.datafields
+
+
+@pytest.mark.parametrize("storage", ["dict", "table"])
+def test_index_subfields(storage):
+    indicators = [None, " ", "0", "1", "4", "7", "9"]
+
+    for fn in aleph_files():
+        with open(fn) as f:
+            data = f.read()
+
+        parsed = MARCXMLParser(data)
+        indexed = MARCXMLParser(data, storage=storage, index_subfields=True)
+
+        for tag, fields in parsed.datafields.items():
+            codes = set(
+                code for field in fields for code in field if len(code) == 1
+            )
+
+            for code in codes:
+                for i1 in indicators:
+                    for i2 in indicators:
+                        assert indexed.get_subfields(tag, code, i1, i2) == \
+                            parsed.get_subfields(tag, code, i1, i2)
+
+        assert indexed.get_subfields("XXX", "a") == []
+        with pytest.raises(KeyError):
+            indexed.get_subfields("XXX", "a", exception=True)
+        with pytest.raises(KeyError):
+            indexed.get_subfields("245", "@", exception=True)
+
+
+def test_index_subfields_invalidation():
+    indexed = MARCXMLParser(unix_file(), index_subfields=True)
+
+    isbns = indexed.get_subfields("020", "a")
+    isbns.append("changed copy")
+    assert indexed.get_subfields("020", "a") == isbns[:-1]
+
+    indexed.add_data_field("020", "1", " ", {"a": "80-85892-15-4"})
+    assert indexed.get_subfields("020", "a") == isbns[:-1] + ["80-85892-15-4"]
+    assert indexed.get_subfields("020", "a", i1="1") == ["80-85892-15-4"]
+
+    indexed.datafields["020"].pop()
+    indexed.mark_dirty("020")
+    assert indexed.get_subfields("020", "a") == isbns[:-1]
+
+    indexed.datafields = OrderedDict()
+    assert indexed.get_subfields("020", "a") == []
@@ -324,3 +324,81 @@ def test_buletin_is_periodical(buletin):
     assert not buletin.get_invalid_ISSNs()
     assert not buletin.get_linking_ISSNs()
     assert buletin.is_continuing()
+
+
+# Tests of the cache ==========================================================
+@pytest.fixture
+def memoized():
+    return MARCXMLQuery(unix_file(), memoize=True)
+
+
+def test_getters_are_not_memoized_by_default(parsed):
+    assert parsed.get_pub_type() == PublicationType.monographic
+
+    parsed.leader = parsed.leader[:6] + "s" + parsed.leader[7:]
+    assert parsed.get_pub_type() == PublicationType.continuing
+
+    parsed.controlfields["FMT"] = "SE"
+    parsed.leader = parsed.leader[:6] + "m" + parsed.leader[7:]
+    assert parsed.get_pub_type() == PublicationType.continuing
+
+    assert not parsed._cache
+
+
+def test_getters_are_memoized(memoized):
+    parsed = memoized
+    calls = []
+
+    def counting_get_subfields(*args, **kwargs):
+        calls.append(args)
+        return MARCXMLQuery.get_subfields(parsed, *args, **kwargs)
+
+    parsed.get_subfields = counting_get_subfields
+
+    pub_type = parsed.get_pub_type()
+    assert calls
+
+    del calls[:]
+    assert parsed.get_pub_type() == pub_type
+    assert parsed.is_monographic() == (pub_type == PublicationType.monographic)
+    assert not parsed.is_continuing()
+    assert not calls
+
+    authors = parsed.get_authors()
+    corporations = parsed.get_corporations(roles=["any"])
+
+    del calls[:]
+    authors.append("changed copy")
+    assert parsed.get_authors() == authors[:-1]
+    assert parsed.get_corporations(roles=["any"]) == corporations
+    assert not calls
+
+
+def test_cache_invalidation(memoized):
+    parsed = memoized
+    assert parsed.get_ISBNs() == ["80-251-0225-4"]
+
+    parsed.add_data_field("020", " ", " ", {"a": "80-85892-15-4 (váz.)"})
+    assert parsed.get_ISBNs() == ["80-251-0225-4", "80-85892-15-4"]
+
+    parsed.add_ctl_field("FMT", "SE")
+    assert parsed.get_pub_type() == PublicationType.continuing
+
+    name = parsed.get_name()
+    parsed.datafields["245"][0]["a"][0] = "Changed name"
+    assert parsed.get_name() == name
+
+    parsed.mark_dirty("245")
+    assert parsed.get_name() == "Changed name"
+
+    parsed.datafields = {}
+    assert parsed.get_ISBNs() == []
+
+    # direct changes require mark_dirty()
+    assert parsed.get_pub_type() == PublicationType.continuing
+    parsed.leader = parsed.leader[:6] + "a" + parsed.leader[7:]
+    del parsed.controlfields["FMT"]
+    assert parsed.get_pub_type() == PublicationType.continuing
+
+    parsed.mark_dirty()
+    assert parsed.get_pub_type() == PublicationType.monographic
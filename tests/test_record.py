@@ -4,8 +4,10 @@
 # Interpreter version: python 2.7
 #
 # Imports =====================================================================
+import sys
 import os.path
 import StringIO
+import threading
 
 import pytest
 
@@ -13,6 +15,7 @@ from marcxml_parser import MARCXMLRecord
 from marcxml_parser import record_iterator
 
 from test_serializer import DATA_DIR
+from test_serializer import aleph_files
 
 
 # Fixtures ====================================================================
@@ -40,3 +43,158 @@ def test_record_iterator_filelike_obj(multi_file):
     multi_file = StringIO.StringIO(multi_file)
 
     test_record_iterator(multi_file)
+
+
+def test_record_iterator_stream(multi_file):
+    records = list(record_iterator(multi_file, stream=True))
+    reference = list(record_iterator(multi_file))
+
+    assert len(records) == 3
+    for record, ref in zip(records, reference):
+        assert isinstance(record, MARCXMLRecord)
+        assert record.to_XML() == ref.to_XML()
+
+
+def test_record_iterator_source_span(multi_file):
+    for workers in [None, 2]:
+        records = list(record_iterator(
+            multi_file,
+            stream=True,
+            workers=workers,
+            keep_original=False,
+        ))
+
+        assert len(records) == 3
+        for record in records:
+            assert not hasattr(record, "_original_xml")
+
+            offset, length = record.source_span
+            record_xml = multi_file[offset:offset + length]
+
+            assert record_xml.startswith("<record")
+            assert record_xml.endswith("</record>")
+            assert MARCXMLRecord(record_xml).to_XML() == record.to_XML()
+
+    for record in record_iterator(multi_file):
+        assert record.source_span is None
+        assert hasattr(record, "_original_xml")
+
+
+def test_record_iterator_stream_filelike_obj(multi_file):
+    records = record_iterator(
+        StringIO.StringIO(multi_file),
+        stream=True,
+        chunk_size=16
+    )
+
+    assert len(list(records)) == 3
+
+
+@pytest.mark.parametrize("backend", [None, "expat"])
+def test_record_iterator_workers(multi_file, backend):
+    reference = list(record_iterator(multi_file))
+    records = list(record_iterator(
+        StringIO.StringIO(multi_file * 20),
+        backend=backend,
+        workers=2,
+        batch_size=7,
+    ))
+
+    assert len(records) == 60
+    for record, ref in zip(records, reference * 20):
+        assert isinstance(record, MARCXMLRecord)
+        assert record.to_XML() == ref.to_XML()
+
+
+def test_record_iterator_workers_unordered(multi_file):
+    records = record_iterator(
+        multi_file * 10,
+        workers=2,
+        ordered=False,
+        batch_size=2,
+    )
+
+    assert len(list(records)) == 30
+
+
+def test_record_iterator_track_changes(multi_file, monkeypatch):
+    def render(*args):
+        raise AssertionError("Untouched field was rendered!")
+
+    monkeypatch.setattr(MARCXMLRecord, "_write_data_fields", render)
+
+    for workers in [None, 2]:
+        records = record_iterator(
+            multi_file,
+            track_changes=True,
+            workers=workers,
+        )
+
+        for record in records:
+            assert "</datafield>" in record.to_XML()
+
+
+def test_record_iterator_tags(multi_file):
+    for workers in [None, 2]:
+        records = record_iterator(multi_file, tags=["020z"], workers=workers)
+
+        for record in records:
+            assert record.datafields.keys() == ["020"]
+            assert record["020a"] == []
+            assert record.get_invalid_ISBNs()
+
+
+def _snapshot(record):
+    """
+    Results of the read-only operations, which may be used concurrently.
+    """
+    output = StringIO.StringIO()
+    record.write_xml(output, oai_marc=not record.oai_marc)
+
+    return (
+        record.to_XML(),
+        output.getvalue(),
+        record.to_ISO2709(),
+        record.get_subfields("245", "a", exception=False),
+        record.get_ISBNs(),
+        [str(author) for author in record.get_authors()],
+        record.get_pub_type(),
+        record["020a"],
+    )
+
+
+def test_concurrent_serialization():
+    sources = []
+    for fn in aleph_files():
+        with open(fn) as f:
+            sources.append(f.read())
+
+    reference = [_snapshot(MARCXMLRecord(xml)) for xml in sources]
+    shared = [
+        MARCXMLRecord(xml, **kwargs)
+        for kwargs in [{}, {"lazy": True}, {"storage": "table"}]
+        for xml in sources
+    ]
+    errors = []
+
+    def worker():
+        try:
+            for _ in range(5):
+                for cnt, record in enumerate(shared):
+                    assert _snapshot(record) == reference[cnt % len(sources)]
+        except Exception as e:
+            errors.append(e)
+
+    # switch threads as often as possible
+    check_interval = sys.getcheckinterval()
+    sys.setcheckinterval(1)
+    try:
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setcheckinterval(check_interval)
+
+    assert not errors
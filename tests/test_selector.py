@@ -0,0 +1,130 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import pytest
+
+from marcxml_parser import Selector
+from marcxml_parser import MARCXMLRecord
+
+from test_parser import unix_file
+
+
+# Functions & classes =========================================================
+@pytest.fixture
+def record():
+    return MARCXMLRecord(unix_file())
+
+
+# Tests =======================================================================
+def test_parse():
+    selector = Selector("260c  ")
+    assert selector.tag == "260"
+    assert selector.codes == "c"
+    assert selector.i1 == " "
+    assert selector.i2 == " "
+
+    selector = Selector("650209")
+    assert selector.codes == "2"
+    assert selector.i1 == "0"
+    assert selector.i2 == "9"
+
+    selector = Selector("245abnp")
+    assert selector.codes == "abnp"
+    assert selector.i1 is None
+    assert selector.i2 is None
+
+    assert Selector("245ab").codes == "ab"
+
+    # indicators only after single code
+    selector = Selector("245ab10")
+    assert selector.codes == "ab10"
+    assert selector.i1 is None
+    assert selector.i2 is None
+    assert Selector("001").codes == ""
+
+
+def test_invalid():
+    with pytest.raises(ValueError):
+        Selector(1)
+
+    with pytest.raises(ValueError):
+        Selector("24")
+
+
+def test_compile():
+    assert Selector.compile("020a") is Selector.compile("020a")
+    assert repr(Selector.compile("020a")) == "Selector('020a')"
+
+
+def test_select(record):
+    for spec in ["015a", "015b", "650a09", "650209", "260c  ", "020a"]:
+        assert Selector(spec)(record) == record.get_subfields(
+            spec[:3],
+            spec[3],
+            *spec[4:]
+        )
+
+    assert Selector("001")(record) == "cpk20051492461"
+    assert Selector("015")(record) == record.datafields["015"]
+    assert Selector("azg")(record) is None
+
+
+def test_select_multiple_codes(record):
+    expected = [
+        "UNIX", "ph117153", "czenas",
+        "operační systémy", "ph115593", "czenas",
+        "programování", "ph115891", "czenas",
+        "UNIX", "eczenas",
+        "operating systems", "eczenas",
+        "programming", "eczenas",
+    ]
+
+    # order of the codes in the selector doesn't matter
+    assert record["6502a7"] == expected
+    assert Selector("6507a2").select(record) == expected
+
+    # digits after the code are the indicators
+    assert Selector("650a2").codes == "a"
+
+
+@pytest.mark.parametrize("storage", ["dict", "table"])
+def test_select_interleaved_codes(storage):
+    xml = """<record>
+<datafield tag="245" ind1="1" ind2="0">
+<subfield code="a">Title</subfield>
+<subfield code="n">Part 1</subfield>
+<subfield code="p">Name 1</subfield>
+<subfield code="n">Part 2</subfield>
+<subfield code="p">Name 2</subfield>
+</datafield>
+</record>"""
+    record = MARCXMLRecord(xml, storage=storage)
+
+    assert record["245anp"] == ["Title", "Part 1", "Name 1", "Part 2", "Name 2"]
+    assert record["245np"] == ["Part 1", "Name 1", "Part 2", "Name 2"]
+    assert record.to_raw_record().datafields[0][3] == [
+        ("a", "Title"),
+        ("n", "Part 1"),
+        ("p", "Name 1"),
+        ("n", "Part 2"),
+        ("p", "Name 2"),
+    ]
+
+    # fields changed directly are returned in the order of the dict
+    if storage == "dict":
+        record.datafields["245"][0]["p"].append("Name 3")
+        assert record["245anp"] == \
+            ["Title", "Part 1", "Part 2", "Name 1", "Name 2", "Name 3"]
+
+
+def test_apply_to_many_records(record):
+    selector = Selector("020a")
+    other = MARCXMLRecord()
+    other.add_data_field("020", " ", " ", {"a": "80-85892-15-4"})
+
+    assert selector(record) == record.get_subfields("020", "a")
+    assert selector(other) == ["80-85892-15-4"]
+    assert record[selector] == selector(record)
@@ -5,8 +5,10 @@
 #
 # Imports =====================================================================
 import os
+import re
 import os.path
 import glob
+import StringIO
 from collections import OrderedDict
 
 import pytest
@@ -26,6 +28,14 @@ def aleph_files():
     return map(lambda x: os.path.abspath(x), files)
 
 
+def source_datafields(data):
+    return re.findall(
+        r"<(?:data|var)field .*?</(?:data|var)field>",
+        data,
+        re.S
+    )
+
+
 # Tests =======================================================================
 def test_input_output(aleph_files):
     for fn in aleph_files:
@@ -37,6 +47,202 @@ def test_input_output(aleph_files):
         assert parsed.__str__().strip() == data.strip()
 
 
+def test_input_output_table_storage(aleph_files):
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        parsed = MARCXMLSerializer(data, resort=False, storage="table")
+
+        assert parsed.__str__().strip() == data.strip()
+
+
+def test_write_xml(aleph_files):
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        for oai_marc in [False, True]:
+            parsed = MARCXMLSerializer(data)
+            parsed.oai_marc = oai_marc
+
+            output = StringIO.StringIO()
+            parsed.write_xml(output)
+
+            assert output.getvalue() == parsed.to_XML()
+
+
+def test_write_xml_dialect(aleph_files):
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        parsed = MARCXMLSerializer(data)
+        original = parsed.to_XML()
+
+        output = StringIO.StringIO()
+        parsed.write_xml(output, oai_marc=not parsed.oai_marc)
+
+        assert parsed.to_XML() == original
+
+        parsed.oai_marc = not parsed.oai_marc
+        assert output.getvalue() == parsed.to_XML()
+
+
+def test_write_xml_blank_record():
+    serializer = MARCXMLSerializer()
+
+    output = StringIO.StringIO()
+    serializer.write_xml(output)
+
+    assert output.getvalue() == serializer.to_XML()
+    assert output.getvalue().endswith("\n\n\n\n</record>\n")
+
+
+def test_track_changes(aleph_files):
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        reference = MARCXMLSerializer(data)
+        tracked = MARCXMLSerializer(data, track_changes=True)
+
+        # untouched fields are written as they are in the source
+        xml = tracked.to_XML()
+        assert xml == tracked.to_XML()
+        for field in source_datafields(data):
+            assert field + "\n" in xml
+
+        assert not tracked.dirty_fields
+
+        for record in [reference, tracked]:
+            record.add_data_field("856", " ", " ", {"u": "http://kitakitsune"})
+            record.add_ctl_field("009", "azgabash")
+
+        assert tracked.dirty_fields == {"856", "009"}
+        assert ">http://kitakitsune</subfield>" in tracked.to_XML()
+
+        tracked.oai_marc = reference.oai_marc = not reference.oai_marc
+        assert tracked.to_XML() == reference.to_XML()
+
+
+@pytest.mark.parametrize("backend", [None, "expat"])
+@pytest.mark.parametrize("lazy", [False, True])
+@pytest.mark.parametrize("storage", ["dict", "table"])
+def test_track_changes_source_fragments(aleph_files, monkeypatch, backend,
+                                        lazy, storage):
+    def render(*args):
+        raise AssertionError("Untouched field was rendered!")
+
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        tracked = MARCXMLSerializer(
+            data,
+            backend=backend,
+            lazy=lazy,
+            storage=storage,
+            track_changes=True,
+        )
+
+        with monkeypatch.context() as patch:
+            patch.setattr(tracked, "_write_data_fields", render)
+            xml = tracked.to_XML()
+
+        assert sorted(source_datafields(xml)) == \
+            sorted(source_datafields(data))
+
+        tracked.add_data_field("910", " ", " ", {"a": "ABA001"})
+        assert ">ABA001</subfield>" in tracked.to_XML()
+
+
+def test_track_changes_filtered_subfields(aleph_files):
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        for backend in [None, "expat"]:
+            tracked = MARCXMLSerializer(
+                data,
+                backend=backend,
+                tags=["245a"],
+                track_changes=True,
+            )
+            reference = MARCXMLSerializer(data, backend=backend, tags=["245a"])
+
+            assert tracked.to_XML() == reference.to_XML()
+
+
+def test_track_changes_aleph_diff(aleph_files):
+    for fn in aleph_files:
+        with open(fn) as f:
+            data = f.read()
+
+        tracked = MARCXMLSerializer(data, resort=False, track_changes=True)
+        assert tracked.to_XML().strip() == data.strip()
+
+        tracked.datafields["245"][0]["a"][0] = "azgabash"
+        tracked.mark_dirty("245")
+
+        changed = set(tracked.to_XML().splitlines()) - set(data.splitlines())
+        assert len(changed) == 1
+        assert ">azgabash</subfield>" in changed.pop()
+
+
+def test_track_changes_fragments():
+    tracked = MARCXMLSerializer(track_changes=True)
+    tracked.add_data_field("020", " ", " ", {"a": "80-251-0225-4"})
+    tracked.add_data_field("245", "1", "0", {"a": "Title"})
+    tracked.to_XML()
+
+    fragment = tracked._cached_fragment("020", False)
+    assert fragment.startswith('<datafield tag="020"')
+
+    tracked.add_data_field("245", " ", " ", {"a": "Other title"})
+    assert tracked._cached_fragment("245", False) is None
+    assert tracked._cached_fragment("020", False) is fragment
+    assert "Other title" in tracked.to_XML()
+
+
+def test_track_changes_mark_dirty():
+    tracked = MARCXMLSerializer(track_changes=True)
+    tracked.add_data_field("245", "1", "0", {"a": "Title"})
+    tracked.dirty_fields.clear()
+    tracked.to_XML()
+
+    tracked.mark_dirty("245")
+    assert tracked.dirty_fields == {"245"}
+    assert tracked._cached_fragment("245", False) is None
+
+    tracked.to_XML()
+    tracked.mark_dirty()
+    assert tracked._cached_fragment("245", False) is None
+
+
+def test_track_changes_direct_changes():
+    tracked = MARCXMLSerializer(track_changes=True)
+    tracked.add_data_field("245", "1", "0", {"a": "Title"})
+    tracked.add_data_field("246", "1", "0", {"a": "Other title"})
+    tracked.to_XML()
+
+    # changed without .mark_dirty(), the fragments are not used
+    tracked.datafields["245"][0]["a"][0] = "Changed title"
+    assert "Changed title" in tracked.to_XML()
+
+    tracked.datafields["245"][0]["b"] = ["Subtitle"]
+    assert "Subtitle" in tracked.to_XML()
+
+    tracked.datafields["245"][0]["ind1"] = "0"
+    assert '<datafield tag="245" ind1="0"' in tracked.to_XML()
+
+    tracked.datafields["246"].append(tracked.datafields["245"][0])
+    assert tracked.to_XML().count("Changed title") == 2
+
+    del tracked.datafields["246"]
+    assert "Other title" not in tracked.to_XML()
+
+
 def test_order_original():
     xml = """<record xmlns="http://www.loc.gov/MARC21/slim/"
 xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance"
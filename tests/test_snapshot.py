@@ -0,0 +1,115 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import os.path
+
+import pytest
+
+from marcxml_parser import record_iterator
+from marcxml_parser.snapshot import content_hash
+from marcxml_parser.snapshot import dump_snapshot
+from marcxml_parser.snapshot import load_snapshot
+from marcxml_parser.snapshot import cached_records
+
+from test_offset_index import collection
+
+
+# Functions & classes =========================================================
+def parsed_records(path):
+    with open(path, "rb") as f:
+        return list(record_iterator(f))
+
+
+# Tests =======================================================================
+def test_dump_and_load_snapshot(collection, tmpdir):
+    records = parsed_records(collection)
+    snapshot = str(tmpdir.join("records.snapshot"))
+
+    with open(snapshot, "wb") as f:
+        assert dump_snapshot(records, f, "hash") == len(records)
+
+    with open(snapshot, "rb") as f:
+        loaded = list(load_snapshot(f, "hash"))
+
+    assert len(loaded) == len(records)
+    for record, loaded_record in zip(records, loaded):
+        assert loaded_record.leader == record.leader
+        assert loaded_record.controlfields == record.controlfields
+        assert loaded_record.datafields == record.datafields
+        assert loaded_record.get_ISBNs() == record.get_ISBNs()
+
+
+def test_load_snapshot_lazy(collection, tmpdir):
+    records = parsed_records(collection)
+    snapshot = str(tmpdir.join("records.snapshot"))
+
+    with open(snapshot, "wb") as f:
+        dump_snapshot(records, f)
+
+    with open(snapshot, "rb") as f:
+        loaded = list(load_snapshot(f, lazy=True))
+
+    assert loaded[0]._datafields_loader is not None
+    assert loaded[0].datafields == records[0].datafields
+
+
+def test_load_snapshot_errors(collection, tmpdir):
+    snapshot = str(tmpdir.join("records.snapshot"))
+
+    with open(snapshot, "wb") as f:
+        dump_snapshot(parsed_records(collection), f, "hash")
+
+    with pytest.raises(ValueError):
+        with open(snapshot, "rb") as f:
+            list(load_snapshot(f, "other hash"))
+
+    with open(snapshot, "rb") as f:
+        data = f.read()
+
+    with open(snapshot, "wb") as f:
+        f.write(data[:len(data) / 2])
+
+    with pytest.raises(ValueError):
+        with open(snapshot, "rb") as f:
+            list(load_snapshot(f))
+
+    with pytest.raises(ValueError):
+        with open(collection, "rb") as f:
+            list(load_snapshot(f))
+
+
+def test_cached_records(collection):
+    records = parsed_records(collection)
+    snapshot = collection + ".snapshot"
+
+    first_run = list(cached_records(collection))
+    assert os.path.exists(snapshot)
+
+    modified = os.path.getmtime(snapshot)
+    second_run = list(cached_records(collection, tags=["020"]))
+
+    assert os.path.getmtime(snapshot) == modified
+    assert len(first_run) == len(second_run) == len(records)
+    assert [r.datafields for r in first_run] == \
+        [r.datafields for r in records]
+    assert [r.datafields.keys() for r in second_run if r.datafields] == \
+        [["020"]] * len([r for r in records if "020" in r.datafields])
+
+
+def test_cached_records_stale(collection):
+    list(cached_records(collection))
+    old_hash = content_hash(collection)
+
+    with open(collection) as f:
+        data = f.read()
+
+    # keep just the first record
+    with open(collection, "wb") as f:
+        f.write(data[:data.index("</record>") + 9] + "\n</collection>\n")
+
+    assert content_hash(collection) != old_hash
+    assert len(list(cached_records(collection))) == 1
+    assert len(list(cached_records(collection))) == 1
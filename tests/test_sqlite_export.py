@@ -0,0 +1,151 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import sqlite3
+
+import pytest
+
+from marcxml_parser import MARCXMLRecord
+from marcxml_parser import record_iterator
+from marcxml_parser.sqlite_export import export_sqlite
+
+from test_offset_index import collection
+
+
+# Functions & classes =========================================================
+@pytest.fixture
+def records(collection):
+    with open(collection) as f:
+        return list(record_iterator(f, stream=True))
+
+
+def count(connection, table):
+    return connection.execute("SELECT COUNT(*) FROM %s" % table).fetchone()[0]
+
+
+# Tests =======================================================================
+def test_export_sqlite(records, tmpdir):
+    path = str(tmpdir.join("records.sqlite"))
+
+    assert export_sqlite(records, path, batch_size=3) == len(records)
+
+    connection = sqlite3.connect(path)
+    assert count(connection, "records") == len(records)
+    assert count(connection, "datafields") == sum(
+        len(fields)
+        for record in records
+        for fields in record.datafields.values()
+    )
+
+    for record_id, record in enumerate(records, 1):
+        oai_marc, leader, offset, length = connection.execute(
+            "SELECT oai_marc, leader, source_offset, source_length "
+            "FROM records WHERE id = ?",
+            (record_id,)
+        ).fetchone()
+
+        assert bool(oai_marc) == record.oai_marc
+        assert leader == record.leader.decode("utf-8")
+        assert (offset, length) == record.source_span
+
+        controlfields = connection.execute(
+            "SELECT tag, value FROM controlfields WHERE record_id = ? "
+            "ORDER BY position",
+            (record_id,)
+        ).fetchall()
+        assert [tag for tag, _ in controlfields] == record.controlfields.keys()
+
+        isbns = connection.execute(
+            "SELECT subfields.value FROM datafields JOIN subfields "
+            "ON subfields.datafield_id = datafields.id "
+            "WHERE record_id = ? AND tag = '020' AND code = 'a' "
+            "ORDER BY datafields.position, subfields.position",
+            (record_id,)
+        ).fetchall()
+        assert [isbn.encode("utf-8") for isbn, in isbns] == record["020a"]
+
+    indexes = [
+        name
+        for name, in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        )
+    ]
+    assert "subfields_value" in indexes
+    assert "authors_surname" in indexes
+
+
+def test_derived_tables(records):
+    connection = sqlite3.connect(":memory:")
+    export_sqlite(records, connection)
+
+    record_id = next(
+        cnt
+        for cnt, record in enumerate(records, 1)
+        if "80-251-0225-4" in record.get_ISBNs()
+    )
+
+    assert connection.execute(
+        "SELECT record_id, valid FROM isbns WHERE isbn = ?",
+        ("80-251-0225-4",)
+    ).fetchall() == [(record_id, 1)]
+
+    assert connection.execute(
+        "SELECT name, surname FROM authors WHERE record_id = ?",
+        (record_id,)
+    ).fetchall() == [(u"Eric S.", u"Raymond")]
+
+
+def test_export_without_derived_tables(records):
+    connection = sqlite3.connect(":memory:")
+    export_sqlite(records, connection, derived=(), indexes=False)
+
+    tables = [
+        name
+        for name, in connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+    ]
+    assert sorted(tables) == [
+        "controlfields", "datafields", "records", "subfields"
+    ]
+    assert not connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'"
+    ).fetchall()
+
+
+def test_export_append(records):
+    connection = sqlite3.connect(":memory:")
+    export_sqlite(records[:4], connection)
+    export_sqlite(records[4:], connection)
+
+    reference = sqlite3.connect(":memory:")
+    export_sqlite(records, reference)
+
+    for table in ["records", "datafields", "subfields", "isbns"]:
+        query = "SELECT * FROM %s ORDER BY 1, 2, 3" % table
+
+        assert connection.execute(query).fetchall() == \
+            reference.execute(query).fetchall()
+
+
+def test_entities():
+    record = MARCXMLRecord()
+    record.add_data_field("245", " ", " ", {"a": "Tom &amp; Jerry &lt;3"})
+
+    connection = sqlite3.connect(":memory:")
+    export_sqlite([record], connection)
+
+    assert connection.execute("SELECT value FROM subfields").fetchall() == [
+        (u"Tom & Jerry <3",)
+    ]
+    assert connection.execute("SELECT * FROM records").fetchall() == [
+        (1, 0, None, None, None)
+    ]
+
+
+def test_unknown_derived_table():
+    with pytest.raises(ValueError):
+        export_sqlite([], sqlite3.connect(":memory:"), derived=["azgabash"])
@@ -0,0 +1,93 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import threading
+
+import pytest
+
+from marcxml_parser.tools import batches
+from marcxml_parser.tools import parallel_map
+
+
+# Functions & classes =========================================================
+def square(x):
+    return x * x
+
+
+def fail_on_three(x):
+    if x == 3:
+        raise ValueError("three")
+
+    return x
+
+
+def unpicklable(x):
+    return threading.Lock()
+
+
+class UnpicklableError(Exception):
+    def __init__(self):
+        super(UnpicklableError, self).__init__("lock")
+        self.lock = threading.Lock()
+
+
+def fail_unpicklable(x):
+    raise UnpicklableError()
+
+
+# Tests =======================================================================
+def test_batches():
+    assert list(batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batches([], 2)) == []
+
+
+def test_parallel_map():
+    results = parallel_map(square, range(50), workers=3, max_pending=2)
+
+    assert list(results) == [x * x for x in range(50)]
+
+
+def test_parallel_map_unordered():
+    results = parallel_map(square, range(50), workers=3, ordered=False)
+
+    assert sorted(results) == [x * x for x in range(50)]
+
+
+def test_parallel_map_blank_input():
+    assert list(parallel_map(square, [], workers=2)) == []
+
+
+def test_parallel_map_bounded_input():
+    consumed = []
+
+    def items():
+        for x in range(100):
+            consumed.append(x)
+            yield x
+
+    results = parallel_map(square, items(), workers=2, max_pending=4)
+
+    assert next(results) == 0
+    assert len(consumed) <= 5
+
+    results.close()
+
+
+def test_parallel_map_exception():
+    with pytest.raises(ValueError):
+        list(parallel_map(fail_on_three, range(10), workers=2))
+
+
+def test_parallel_map_unpicklable_result():
+    with pytest.raises(TypeError):
+        list(parallel_map(unpicklable, range(3), workers=2))
+
+
+def test_parallel_map_unpicklable_exception():
+    with pytest.raises(RuntimeError) as e:
+        list(parallel_map(fail_unpicklable, range(3), workers=2))
+
+    assert "UnpicklableError" in str(e.value)
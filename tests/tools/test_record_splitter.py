@@ -0,0 +1,97 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# Interpreter version: python 2.7
+#
+# Imports =====================================================================
+import os.path
+import StringIO
+
+import pytest
+
+from marcxml_parser.tools import record_spans
+from marcxml_parser.tools import split_records
+
+
+# Variables ===================================================================
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
+
+
+# Fixtures ====================================================================
+@pytest.fixture
+def multi_file():
+    with open(os.path.join(DATA_DIR, "multirecord.xml")) as f:
+        return f.read()
+
+
+# Tests =======================================================================
+def test_split_records(multi_file):
+    records = list(split_records(multi_file))
+
+    assert len(records) == 3
+    for record in records:
+        assert record.startswith("<record")
+        assert record.endswith("</record>")
+
+
+def test_split_records_small_chunks(multi_file):
+    reference = list(split_records(multi_file))
+
+    for chunk_size in [1, 2, 7, 8, 100]:
+        records = split_records(StringIO.StringIO(multi_file), chunk_size)
+
+        assert list(records) == reference
+
+
+def test_record_spans_offsets(multi_file):
+    for offset, record in record_spans(StringIO.StringIO(multi_file), 5):
+        assert multi_file[offset:offset + len(record)] == record
+
+
+def test_split_records_edge_cases():
+    xml = """<root><records>
+    <record/><record a="1">x</record >
+    <recordx>y</recordx>
+    </records></root>"""
+
+    assert list(split_records(xml, 3)) == [
+        "<record/>",
+        '<record a="1">x</record >',
+    ]
+
+
+def test_split_records_unfinished_record():
+    assert list(split_records("<record><leader>")) == []
+
+
+def test_split_records_nested():
+    oai_record = (
+        '<record><header><identifier>x</identifier></header><metadata>'
+        '<record xmlns="http://www.loc.gov/MARC21/slim/">'
+        '<controlfield tag="001">1</controlfield></record >'
+        '</metadata></record>'
+    )
+    xml = "<ListRecords>%s\n%s</ListRecords>" % (oai_record, oai_record)
+
+    for chunk_size in [1, 5, 1000]:
+        spans = list(record_spans(StringIO.StringIO(xml), chunk_size))
+
+        assert [record for _, record in spans] == [oai_record, oai_record]
+        assert [offset for offset, _ in spans] == \
+            [13, 13 + len(oai_record) + 1]
+
+
+def test_split_records_large_record():
+    record = "<record>%s</record>" % ("<x>y</x>" * 10000)
+
+    class Input(StringIO.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return StringIO.StringIO.read(self, size)
+
+    xml = Input(record + record)
+
+    assert list(split_records(xml, 10)) == [record, record]
+    assert xml.reads < 50